@@ -0,0 +1,203 @@
+# archive_crawl module
+#   visits every Current Events archive, from July 1994 to the current month,
+#   and checks its date headers as the archived month test does. a bounded
+#   number of sessions (HTML fetchers or browsers) open the months concurrently
+#   and each result is appended to a JSON lines file as soon as it finishes.
+#   rerunning with --resume skips the months already in the file
+#
+#   usage:
+#     python3 archive_crawl.py <results.jsonl> [--backend html|browser]
+#                              [--browser chrome] [--concurrency N] [--resume]
+#                              [--replay DIRECTORY] [--fixture-port PORT]
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import queue
+import re
+import sys
+import time
+
+from fixture_server import FixtureServer
+from pages import html_backend
+from pages.base_page import BasePage
+from pages.current_events_page import CurrentEventsPage
+
+# Archived months from the first archive to a date
+# Parameter
+#   today - datetime.date, default today
+# Returns list of (month name, year) tuples, oldest first
+def archived_months(today=None):
+	today = today or datetime.date.today()
+	page = CurrentEventsPage(None)
+	months = []
+	for year in range(page.first_archived_year, today.year + 1):
+		first = page.first_archived_month if year == page.first_archived_year else 1
+		last = today.month if year == today.year else 12
+		months.extend((page.month_name(month), year) for month in range(first, last + 1))
+	return months
+
+# Check the date headers of an archived month
+#   the page must have date headers, and they must have the long date format,
+#   be in the month and year and be in ascending order. a page without any,
+#   such as an error page or one the locator no longer matches, is a mismatch
+# Parameters
+#   page - CurrentEventsPage, or its HTML backend mirror, showing the month
+#   month - month name, full spelling
+#   year - integer year
+# Returns tuple (number of date headers, list of problems as text)
+def check_month(page, month, year):
+	problems = []
+	days = []
+	headers = page.get_date_headers()
+	if not headers:
+		problems.append('no date headers')
+	for header in headers:
+		if not re.search(page.long_date_regex, header):
+			problems.append('header not in the long date format: ' + header)
+			continue
+		m, d, y, weekday = page.parse_date_header(header)
+		if (m, y) != (month, str(year)):
+			problems.append('header not in {} {}: {}'.format(month, year, header))
+		days.append((int(y), page.month_index(m), int(d)))
+	if days != sorted(days):
+		problems.append('dates are not in ascending order')
+	return len(headers), problems
+
+# Open and check one month with a session from the pool
+# Returns the result to write
+def crawl_month(sessions, page_class, month, year):
+	session = sessions.get()
+	start = time.perf_counter()
+	result = {'month': month, 'year': year}
+	try:
+		page = page_class(session)
+		page.open_archived_month(month, year)
+		result['url'] = page.get_current_url()
+		result['dates'], result['problems'] = check_month(page, month, year)
+		result['status'] = 'mismatch' if result['problems'] else 'ok'
+	except Exception as e:
+		result['status'] = 'error'
+		result['problems'] = ['{}: {}'.format(type(e).__name__, e)]
+	finally:
+		sessions.put(session)
+	result['ms'] = round((time.perf_counter() - start) * 1000)
+	return result
+
+# Months already in a results file
+#   months that ended in an error are crawled again
+def finished_months(path):
+	done = set()
+	if not os.path.exists(path):
+		return done
+	with open(path) as f:
+		for line in f:
+			try:
+				result = json.loads(line)
+			except ValueError:
+				continue  # a line cut short when the crawl was interrupted
+			if result.get('status') != 'error':
+				done.add((result['month'], result['year']))
+	return done
+
+# Crawl the months and stream the results to a file
+# Parameters
+#   path - JSON lines file to append results to
+#   sessions - list of drivers, or html_backend.HtmlSession objects, one for
+#     each month opened at a time
+#   page_class - CurrentEventsPage or html_backend.HtmlCurrentEventsPage
+#   months - list of (month name, year) to visit
+# Returns dictionary of status -> number of months
+def crawl(path, sessions, page_class, months):
+	pool = queue.Queue()
+	for session in sessions:
+		pool.put(session)
+
+	# finish a line cut short by an interrupted crawl before appending
+	if os.path.exists(path) and os.path.getsize(path):
+		with open(path, 'rb') as f:
+			f.seek(-1, os.SEEK_END)
+			partial = f.read(1) != b'\n'
+	else:
+		partial = False
+
+	counts = {'ok': 0, 'mismatch': 0, 'error': 0}
+	executor = concurrent.futures.ThreadPoolExecutor(len(sessions))
+	try:
+		with open(path, 'a') as out:
+			if partial:
+				out.write('\n')
+			futures = [ executor.submit(crawl_month, pool, page_class, month, year)
+				for month, year in months ]
+			for future in concurrent.futures.as_completed(futures):
+				result = future.result()
+				out.write(json.dumps(result) + '\n')
+				out.flush()
+				counts[result['status']] += 1
+				if result['status'] != 'ok':
+					print('{} {} {}: {}'.format(result['status'].upper(), result['month'],
+						result['year'], '; '.join(result['problems'])))
+	finally:
+		# on an interruption the months not yet started are left for --resume
+		executor.shutdown(cancel_futures=True)
+	return counts
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Check every Current Events archive month')
+	parser.add_argument('results', help='JSON lines file the results are appended to')
+	parser.add_argument('--backend', choices=['html', 'browser'], default='html',
+		help="'html' fetches pages without a browser, 'browser' opens them in browsers (default html)")
+	parser.add_argument('--browser', choices=['chrome', 'firefox'], default='chrome',
+		help='browser for the browser backend, started with the fast launch profile')
+	parser.add_argument('--concurrency', type=int, default=4,
+		help='months opened at a time (default 4)')
+	parser.add_argument('--resume', action='store_true',
+		help='skip the months already in the results file')
+	parser.add_argument('--replay', metavar='DIRECTORY',
+		help='serve pages from recorded fixtures instead of Wikipedia')
+	parser.add_argument('--fixture-port', type=int, default=8008)
+	args = parser.parse_args()
+
+	if not args.resume and os.path.exists(args.results):
+		sys.exit('{} exists, use --resume to continue the crawl or remove it'.format(args.results))
+	months = archived_months()
+	done = finished_months(args.results) if args.resume else set()
+	months = [ m for m in months if m not in done ]
+	print('Crawling {} months, {} already done'.format(len(months), len(done)))
+
+	server = None
+	if args.replay:
+		server = FixtureServer(args.replay, args.fixture_port).start()
+		BasePage.site_port = server.port
+
+	if args.backend == 'html':
+		if not html_backend.available:
+			sys.exit('The html backend needs lxml: pip3 install lxml')
+		# keep a connection for each concurrent fetch
+		maxsize = html_backend.http.connection_pool_kw.get('maxsize', 1)
+		html_backend.http.connection_pool_kw['maxsize'] = max(maxsize, args.concurrency)
+		sessions = [ html_backend.HtmlSession() for _ in range(args.concurrency) ]
+		page_class = html_backend.HtmlCurrentEventsPage
+	else:
+		from tests.wikipedia_common import start_driver
+		sessions = []
+		page_class = CurrentEventsPage
+
+	start = time.time()
+	try:
+		if args.backend == 'browser':
+			for _ in range(args.concurrency):
+				sessions.append(start_driver(args.browser, 'fast'))
+		counts = crawl(args.results, sessions, page_class, months)
+	finally:
+		if args.backend == 'browser':
+			for driver in sessions:
+				driver.quit()
+		if server:
+			server.stop()
+
+	print('Crawled {} months in {:.0f} s: {ok} ok, {mismatch} mismatched, {error} errors'.format(
+		len(months), time.time() - start, **counts))
+	sys.exit(1 if counts['mismatch'] or counts['error'] else 0)
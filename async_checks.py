@@ -0,0 +1,110 @@
+# async_checks module
+#   runs the infobox checks of TestArticlePage from one process, each article
+#   in one of a pool of browser sessions driven through the asyncio page
+#   objects (pages/async_pages.py). the sessions wait on their browsers
+#   together rather than in a process each
+#
+#   usage:
+#     python3 async_checks.py [--browser chrome] [--sessions N] [--grid-url URL]
+#                             [--launch-profile fast] [--replay DIRECTORY]
+#                             [--fixture-port PORT]
+
+import argparse
+import asyncio
+import sys
+import time
+
+from fixture_server import FixtureServer
+from pages.async_pages import AsyncArticlePage, AsyncMainPage
+from pages.base_page import BasePage
+from tests.test_article_page import TestArticlePage
+import async_webdriver
+import launch_profiles
+import wait_for
+
+# Open an article in a session from the pool and check its infobox values
+# Parameters
+#   sessions - asyncio.Queue of AsyncDriver
+#   name - name of the check
+#   search_term - title of the article
+#   expected_values - list of (label, value) tuples
+# Returns dictionary with the 'name', 'status' (ok, mismatch or error), 'problems' and 'ms'
+async def check_infobox(sessions, name, search_term, expected_values):
+	driver = await sessions.get()
+	start = time.perf_counter()
+	result = {'name': name, 'problems': []}
+	try:
+		await AsyncMainPage(driver).open_article(search_term)
+		article = AsyncArticlePage(driver)
+		infobox = await article.get_infobox_contents()
+		for label, expected_value in expected_values:
+			found_value = article.get_value_from_infobox_contents(infobox, label)
+			if found_value is None or expected_value not in found_value:
+				result['problems'].append('{}: expected {!r} in {!r}'.format(
+					label, expected_value, found_value))
+		result['status'] = 'mismatch' if result['problems'] else 'ok'
+	except Exception as e:
+		result['status'] = 'error'
+		result['problems'].append('{}: {}'.format(type(e).__name__, e))
+	finally:
+		sessions.put_nowait(driver)
+	result['ms'] = round((time.perf_counter() - start) * 1000)
+	return result
+
+# Start the sessions, run the checks and end the sessions
+# Parameters
+#   cases - dictionary of name -> (search term, expected values)
+#   count - number of browser sessions
+#   browser, profile, grid_url - see async_webdriver.start_session
+# Returns list of results of check_infobox, in the order of the cases
+async def run_checks(cases, count, browser, profile=None, grid_url=None):
+	drivers = []
+	try:
+		started = await asyncio.gather(*[ async_webdriver.start_session(browser, profile, grid_url)
+			for _ in range(count) ], return_exceptions=True)
+		drivers = [ d for d in started if not isinstance(d, BaseException) ]
+		if len(drivers) < count:
+			raise next(e for e in started if isinstance(e, BaseException))
+
+		sessions = asyncio.Queue()
+		for driver in drivers:
+			sessions.put_nowait(driver)
+		return await asyncio.gather(*[ check_infobox(sessions, name, *case)
+			for name, case in cases.items() ])
+	finally:
+		await asyncio.gather(*[ driver.quit() for driver in drivers ], return_exceptions=True)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Check article infoboxes with concurrent browser sessions')
+	parser.add_argument('--browser', choices=['chrome', 'firefox'], default='chrome')
+	parser.add_argument('--sessions', type=int, default=len(TestArticlePage.infobox_cases),
+		help='browser sessions driven at once (default one per article)')
+	parser.add_argument('--grid-url', help='start the sessions on a Selenium Grid')
+	parser.add_argument('--launch-profile', choices=launch_profiles.names, default='fast')
+	parser.add_argument('--replay', metavar='DIRECTORY',
+		help='serve pages from recorded fixtures instead of Wikipedia')
+	parser.add_argument('--fixture-port', type=int, default=8008)
+	args = parser.parse_args()
+	if args.sessions < 1:
+		parser.error('--sessions must be at least 1')
+
+	server = None
+	if args.replay:
+		server = FixtureServer(args.replay, args.fixture_port).start()
+		BasePage.site_port = server.port
+	wait_for.ready_states = launch_profiles.ready_states(args.launch_profile)
+
+	start = time.time()
+	try:
+		results = asyncio.run(run_checks(TestArticlePage.infobox_cases,
+			args.sessions, args.browser, args.launch_profile, args.grid_url))
+	finally:
+		if server:
+			server.stop()
+
+	for result in results:
+		print('{:<10} {:<9} {:>6} ms  {}'.format(result['name'], result['status'].upper(),
+			result['ms'], '; '.join(result['problems'])))
+	print('Checked {} articles with {} sessions in {:.1f} s'.format(
+		len(results), args.sessions, time.time() - start))
+	sys.exit(0 if all(result['status'] == 'ok' for result in results) else 1)
@@ -0,0 +1,289 @@
+# async_webdriver module
+#   a small asyncio client for the W3C WebDriver protocol, so one event loop
+#   can drive many browser sessions at once instead of one process per browser.
+#   each session keeps one HTTP/1.1 connection to its driver or Grid and the
+#   commands of different sessions overlap while they wait on their browsers
+#
+#   errors are raised as the selenium exceptions the Selenium driver raises,
+#   so page objects handle them the same way
+#
+#     driver = await async_webdriver.start_session('chrome', 'fast')
+#     await driver.get('https://en.wikipedia.org/wiki/Main_Page')
+#     title = await driver.title()
+#     await driver.quit()
+
+import asyncio
+import json
+import ssl
+import urllib.parse
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.driver_finder import DriverFinder
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+
+import launch_profiles
+
+# key of an element reference in commands and responses
+element_key = 'element-6066-11e4-a52e-4f735466cecf'
+
+# seconds a command may take before it fails
+command_timeout = 120
+
+# driver services started for sessions without a server URL
+services = {
+	'chrome': webdriver.ChromeService,
+	'firefox': webdriver.FirefoxService,
+}
+
+errors = ErrorHandler()
+
+# Locator as the W3C protocol takes it
+#   the protocol has no id, name or class name strategies; they are written as
+#   CSS selectors the way the Selenium driver does
+def w3c_locator(by, value):
+	if by == By.ID:
+		return By.CSS_SELECTOR, '[id="{}"]'.format(value)
+	elif by == By.NAME:
+		return By.CSS_SELECTOR, '[name="{}"]'.format(value)
+	elif by == By.CLASS_NAME:
+		return By.CSS_SELECTOR, '.' + value
+	return by, value
+
+# A keep-alive HTTP/1.1 connection to a driver or Grid
+#   one request at a time, which is how a session sends its commands
+class Connection(object):
+
+	def __init__(self, url):
+		parts = urllib.parse.urlsplit(url)
+		self.host = parts.hostname
+		self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+		self.port = parts.port or (443 if self.ssl else 80)
+		self.base = parts.path.rstrip('/')
+		self.reader = None
+		self.writer = None
+		self.lock = asyncio.Lock()
+
+	# Send a request and read its response
+	# Parameters
+	#   method - 'GET', 'POST' or 'DELETE'
+	#   path - path below the server URL, e.g. '/session'
+	#   payload - JSON body of a POST
+	# Returns tuple (HTTP status, body text)
+	async def request(self, method, path, payload=None):
+		body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+		head = '{} {} HTTP/1.1\r\nHost: {}:{}\r\nContent-Type: application/json;charset=UTF-8\r\n' \
+			'Content-Length: {}\r\nConnection: keep-alive\r\n\r\n'.format(
+				method, self.base + path, self.host, self.port, len(body))
+		async with self.lock:
+			reused = self.writer is not None
+			try:
+				return await asyncio.wait_for(self.exchange(head.encode('latin-1') + body), command_timeout)
+			except (ConnectionError, asyncio.IncompleteReadError):
+				self.close()
+				if not reused:
+					raise
+			except BaseException:
+				self.close()  # a response cut short leaves the connection unusable
+				raise
+			# the server closed an idle connection, send again on a new one
+			return await asyncio.wait_for(self.exchange(head.encode('latin-1') + body), command_timeout)
+
+	async def exchange(self, request):
+		if self.writer is None:
+			self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+		self.writer.write(request)
+		await self.writer.drain()
+
+		status_line = await self.reader.readuntil(b'\r\n')
+		status = int(status_line.split()[1])
+		headers = {}
+		while True:
+			line = await self.reader.readuntil(b'\r\n')
+			if line == b'\r\n':
+				break
+			name, _, value = line.decode('latin-1').partition(':')
+			headers[name.strip().lower()] = value.strip()
+
+		if headers.get('transfer-encoding', '').lower() == 'chunked':
+			data = b''
+			while True:
+				size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+				chunk = await self.reader.readexactly(size + 2)
+				if size == 0:
+					break
+				data += chunk[:-2]
+		elif 'content-length' in headers:
+			data = await self.reader.readexactly(int(headers['content-length']))
+		else:
+			data = await self.reader.read()
+			headers['connection'] = 'close'
+		if headers.get('connection', '').lower() == 'close':
+			self.close()
+		return status, data.decode('utf-8')
+
+	def close(self):
+		if self.writer is not None:
+			self.writer.close()
+		self.reader = self.writer = None
+
+# A browser session
+#   methods are coroutines named after the Selenium driver's; title() and
+#   current_url() are coroutines here rather than properties
+class AsyncDriver(object):
+
+	# Parameters
+	#   connection - Connection to the driver or Grid
+	#   session_id - id of the new session
+	#   service - driver service started for the session, stopped on quit()
+	def __init__(self, connection, session_id, service=None):
+		self.connection = connection
+		self.session_id = session_id
+		self.service = service
+
+	# Send a command of the session
+	# Returns the command's value, with element references as AsyncElement objects
+	#   raises the selenium exception for an error response
+	async def execute(self, method, path, payload=None):
+		status, text = await self.connection.request(
+			method, '/session/' + self.session_id + path, payload)
+		if status >= 400:
+			errors.check_response({'status': status, 'value': text})
+		return self.unwrap(json.loads(text)['value'])
+
+	def wrap(self, value):
+		if isinstance(value, AsyncElement):
+			return {element_key: value.id}
+		if isinstance(value, (list, tuple)):
+			return [ self.wrap(item) for item in value ]
+		if isinstance(value, dict):
+			return dict((key, self.wrap(item)) for key, item in value.items())
+		return value
+
+	def unwrap(self, value):
+		if isinstance(value, list):
+			return [ self.unwrap(item) for item in value ]
+		if isinstance(value, dict):
+			if element_key in value:
+				return AsyncElement(self, value[element_key])
+			return dict((key, self.unwrap(item)) for key, item in value.items())
+		return value
+
+	async def get(self, url):
+		await self.execute('POST', '/url', {'url': url})
+
+	async def current_url(self):
+		return await self.execute('GET', '/url')
+
+	async def title(self):
+		return await self.execute('GET', '/title')
+
+	async def execute_script(self, script, *args):
+		return await self.execute('POST', '/execute/sync', {'script': script, 'args': self.wrap(args)})
+
+	async def execute_async_script(self, script, *args):
+		return await self.execute('POST', '/execute/async', {'script': script, 'args': self.wrap(args)})
+
+	async def find_element(self, by, value):
+		by, value = w3c_locator(by, value)
+		return await self.execute('POST', '/element', {'using': by, 'value': value})
+
+	async def find_elements(self, by, value):
+		by, value = w3c_locator(by, value)
+		return await self.execute('POST', '/elements', {'using': by, 'value': value})
+
+	async def set_window_size(self, width, height):
+		await self.execute('POST', '/window/rect', {'width': width, 'height': height})
+
+	# End the session, and stop its driver service if it has its own
+	async def quit(self):
+		try:
+			await self.execute('DELETE', '')
+		finally:
+			self.connection.close()
+			if self.service is not None:
+				await asyncio.to_thread(self.service.stop)
+
+# An element found in a session
+class AsyncElement(object):
+
+	def __init__(self, driver, element_id):
+		self.driver = driver
+		self.id = element_id
+
+	def __eq__(self, other):
+		return isinstance(other, AsyncElement) and other.id == self.id
+
+	def __hash__(self):
+		return hash(self.id)
+
+	async def command(self, method, name, payload=None):
+		return await self.driver.execute(method, '/element/' + self.id + name, payload)
+
+	async def find_element(self, by, value):
+		by, value = w3c_locator(by, value)
+		return await self.command('POST', '/element', {'using': by, 'value': value})
+
+	async def find_elements(self, by, value):
+		by, value = w3c_locator(by, value)
+		return await self.command('POST', '/elements', {'using': by, 'value': value})
+
+	async def text(self):
+		return await self.command('GET', '/text')
+
+	async def get_property(self, name):
+		return await self.command('GET', '/property/' + name)
+
+	async def get_dom_attribute(self, name):
+		return await self.command('GET', '/attribute/' + name)
+
+	async def click(self):
+		await self.command('POST', '/click', {})
+
+	async def send_keys(self, text):
+		await self.command('POST', '/value', {'text': text})
+
+# Start the driver service of a browser in a thread, so the loop keeps running
+def start_service(browser, options, executable_path=None):
+	if browser not in services:
+		raise ValueError('No local driver service for {}, use a Grid'.format(browser))
+	service = services[browser](executable_path=executable_path)
+	if not executable_path:
+		service.path = service.env_path() or DriverFinder(service, options).get_driver_path()
+	service.start()
+	return service
+
+# Start a browser session
+# Parameters
+#   browser - chrome or firefox, or any browser the Grid offers
+#   profile - launch profile name (see launch_profiles.py), default fidelity
+#   server_url - address of a Grid or running driver, None starts a driver
+#     service for the session
+#   executable_path - driver executable of a started service, default found by
+#     Selenium Manager
+# Returns AsyncDriver
+async def start_session(browser, profile=None, server_url=None, executable_path=None):
+	options = launch_profiles.options(browser, profile or 'fidelity') \
+		or launch_profiles.default_options(browser)
+	service = None
+	if server_url is None:
+		service = await asyncio.to_thread(start_service, browser, options, executable_path)
+		server_url = service.service_url
+
+	connection = Connection(server_url)
+	try:
+		status, text = await connection.request('POST', '/session',
+			{'capabilities': {'alwaysMatch': options.to_capabilities(), 'firstMatch': [{}]}})
+		if status >= 400:
+			errors.check_response({'status': status, 'value': text})
+		driver = AsyncDriver(connection, json.loads(text)['value']['sessionId'], service)
+	except BaseException:
+		connection.close()
+		if service is not None:
+			await asyncio.to_thread(service.stop)
+		raise
+
+	size = launch_profiles.window_size(browser, profile)
+	if size:
+		await driver.set_window_size(*size)
+	return driver
@@ -0,0 +1,136 @@
+# benchmark module
+#   times page object methods against saved copies of Wikipedia pages in a
+#   headless browser, counting the WebDriver commands each one sends.
+#   results can be saved as a JSON baseline and later runs compared with it.
+#
+#   usage:
+#     python3 benchmark.py capture <browser>     save fixtures from the live site
+#     python3 benchmark.py run <browser> [--repeat N] [--save FILE]
+#                          [--compare FILE] [--threshold FRACTION]
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from pages.article_page import ArticlePage
+from pages.current_events_page import CurrentEventsPage
+from pages.home_page import HomePage
+from tests.wikipedia_common import start_driver
+import command_profiler
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+
+# fixture file -> (live URL, search text typed before saving, or None)
+fixtures = {
+	'article.html': ('https://en.wikipedia.org/wiki/Peru', None),
+	'current_events.html': ('https://en.wikipedia.org/wiki/Portal:Current_events', None),
+	'portal.html': ('https://wikipedia.org', 'bust'),
+}
+
+# Save the live pages as fixtures, with scripts removed so they stay static
+def capture(driver):
+	os.makedirs(fixtures_dir, exist_ok=True)
+	for name, (url, search) in fixtures.items():
+		driver.get(url)
+		if search:
+			HomePage(driver).enter_search_term(search)
+		html = re.sub(r'<script\b.*?</script>', '', driver.page_source, flags=re.S | re.I)
+		with open(os.path.join(fixtures_dir, name), 'w', encoding='utf-8') as f:
+			f.write(html)
+		print('Saved', name)
+
+# Read the links of every year in the archive box, as the archive link test does
+def parse_all_archive_links(page):
+	return [ page.parse_archive_links(year) for year in page.get_archive_links_by_year() ]
+
+# benchmark name -> (fixture, page class, function of the page to time)
+benchmarks = {
+	'get_infobox_contents': ('article.html', ArticlePage, ArticlePage.get_infobox_contents),
+	'get_toc_items_text': ('article.html', ArticlePage, ArticlePage.get_toc_items_text),
+	'parse_archive_links': ('current_events.html', CurrentEventsPage, parse_all_archive_links),
+	'get_archive_grid': ('current_events.html', CurrentEventsPage, CurrentEventsPage.get_archive_grid),
+	'get_date_headers': ('current_events.html', CurrentEventsPage, CurrentEventsPage.get_date_headers),
+	'get_search_suggestions': ('portal.html', HomePage, HomePage.get_search_suggestions),
+}
+
+# Time each benchmark
+# Parameters
+#   driver - WebDriver instrumented by command_profiler
+#   repeat - number of timed calls of each method
+# Returns dictionary of benchmark name -> {'ms': median wall time,
+#   'commands': WebDriver commands per call}
+def run(driver, repeat):
+	results = {}
+	for name, (fixture, page_class, method) in benchmarks.items():
+		path = os.path.join(fixtures_dir, fixture)
+		if not os.path.exists(path):
+			sys.exit('Missing fixture {}, run: python3 benchmark.py capture <browser>'.format(path))
+		driver.get('file://' + path)
+
+		times = []
+		for _ in range(repeat):
+			page = page_class(driver)  # a new page object each time, as in a test
+			command_profiler.drain()
+			start = time.perf_counter()
+			method(page)
+			times.append((time.perf_counter() - start) * 1000)
+			commands = len(command_profiler.drain())
+		results[name] = {'ms': statistics.median(times), 'commands': commands}
+	return results
+
+# Compare results with a baseline
+# Returns list of regressions as text, empty when there are none
+def compare(results, baseline, threshold):
+	regressions = []
+	print('{:<24} {:>10} {:>10} {:>9} {:>9}'.format('benchmark', 'base ms', 'ms', 'base cmd', 'cmd'))
+	for name, result in results.items():
+		base = baseline.get(name)
+		if base is None:
+			continue
+		print('{:<24} {:>10.1f} {:>10.1f} {:>9} {:>9}'.format(
+			name, base['ms'], result['ms'], base['commands'], result['commands']))
+		if result['ms'] > base['ms'] * (1 + threshold):
+			regressions.append('{}: {:.1f} ms, baseline {:.1f} ms'.format(name, result['ms'], base['ms']))
+		if result['commands'] > base['commands']:
+			regressions.append('{}: {} commands, baseline {}'.format(
+				name, result['commands'], base['commands']))
+	return regressions
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark page object methods')
+	parser.add_argument('mode', choices=['capture', 'run'])
+	parser.add_argument('browser', choices=['chrome', 'firefox'])
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--save', metavar='FILE', help='write results as a JSON baseline')
+	parser.add_argument('--compare', metavar='FILE', help='fail if results regress from a baseline')
+	parser.add_argument('--threshold', type=float, default=0.2,
+		help='allowed slow down before a benchmark fails, as a fraction (default 0.2)')
+	args = parser.parse_args()
+	if args.repeat < 1:
+		parser.error('--repeat must be at least 1')
+
+	driver = start_driver(args.browser, 'fast')
+	try:
+		if args.mode == 'capture':
+			capture(driver)
+			sys.exit()
+		command_profiler.install(driver)
+		results = run(driver, args.repeat)
+	finally:
+		driver.quit()
+
+	if args.save:
+		with open(args.save, 'w') as f:
+			json.dump({'browser': args.browser, 'results': results}, f, indent=1, sort_keys=True)
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)['results']
+		regressions = compare(results, baseline, args.threshold)
+		for regression in regressions:
+			print('REGRESSION', regression)
+		sys.exit(1 if regressions else 0)
+	print(json.dumps(results, indent=1, sort_keys=True))
@@ -0,0 +1,126 @@
+# command_profiler module
+#   records every WebDriver command sent by an instrumented driver: the command
+#   name, its duration, the size of its payload and the page object method that
+#   issued it. only drivers passed to install() are instrumented, so there is no
+#   cost when profiling is off
+#
+#   the test runner collects the samples of each test and writes a report of
+#   commands per test and per page object method at the end of the run
+
+import json
+import os
+import sys
+import time
+
+import wait_for
+
+# when True the test setup instruments each new driver. set by the test runner
+enabled = False
+
+# samples recorded since the last call to drain()
+samples = []
+
+pages_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+# label for commands not issued from a page object, e.g. by test setup
+outside_pages = '(outside page objects)'
+
+# Instrument a driver so each command it executes is recorded
+def install(driver):
+	execute = driver.execute
+
+	def profiled_execute(driver_command, params=None):
+		method = issuing_method(sys._getframe(1))
+		response = None
+		start = time.perf_counter()
+		try:
+			response = execute(driver_command, params)
+			return response
+		finally:
+			ms = (time.perf_counter() - start) * 1000
+			value = response.get('value') if isinstance(response, dict) else None
+			samples.append((method, driver_command, ms, payload_size(params) + payload_size(value)))
+
+	driver.execute = profiled_execute
+	return driver
+
+# Name of the outermost page object method on the stack, such as
+#   'ArticlePage.get_infobox_contents'. navigation waits count towards the
+#   method wait_for decorates
+def issuing_method(frame):
+	method = outside_pages
+	while frame is not None:
+		code = frame.f_code
+		location = code_location(code.co_filename)
+		if location == 'wait_for' and code.co_name == 'wrapper':
+			method = frame.f_locals['func'].__qualname__
+		elif location == 'pages':
+			name = getattr(code, 'co_qualname', code.co_name)
+			method = name.split('.<locals>')[0]
+		frame = frame.f_back
+	return method
+
+# file name -> 'pages', 'wait_for' or None
+code_locations = {}
+
+def code_location(filename):
+	if filename not in code_locations:
+		path = os.path.abspath(filename)
+		location = None
+		if os.path.dirname(path) == pages_dir:
+			location = 'pages'
+		elif os.path.splitext(path)[0] == os.path.splitext(os.path.abspath(wait_for.__file__))[0]:
+			location = 'wait_for'
+		code_locations[filename] = location
+	return code_locations[filename]
+
+# Approximate number of bytes sent or received for a value
+def payload_size(value):
+	if value is None:
+		return 0
+	return len(json.dumps(value, default=str))
+
+# Return and forget the samples recorded so far
+#   returns list of (method, command, ms, bytes) tuples
+def drain():
+	global samples
+	drained, samples = samples, []
+	return drained
+
+# 95th percentile of a list of numbers
+def p95(values):
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+# Write the report for a run
+# Parameters
+#   path - file to write
+#   records - test records from the runner, each with its 'commands' samples
+#   slowest - number of slowest commands to list
+def write_report(path, records, slowest=20):
+	by_test = {}
+	by_method = {}
+	calls = []
+	for record in records:
+		for method, command, ms, size in record.get('commands', []):
+			by_test.setdefault(record['id'], []).append(ms)
+			by_method.setdefault(method, []).append(ms)
+			calls.append((ms, size, command, method, record['id']))
+
+	def table(title, groups):
+		lines = [title, '{:>8} {:>11} {:>9}  {}'.format('commands', 'total ms', 'p95 ms', 'name')]
+		rows = sorted(groups.items(), key=lambda item: sum(item[1]), reverse=True)
+		for name, durations in rows:
+			lines.append('{:>8} {:>11.1f} {:>9.1f}  {}'.format(
+				len(durations), sum(durations), p95(durations), name))
+		return lines
+
+	lines = table('Commands per test', by_test) + ['']
+	lines += table('Commands per page object method', by_method) + ['']
+	lines.append('Slowest commands')
+	lines.append('{:>9} {:>9}  {:<22} {:<40} {}'.format('ms', 'bytes', 'command', 'method', 'test'))
+	for ms, size, command, method, test_id in sorted(calls, reverse=True)[:slowest]:
+		lines.append('{:>9.1f} {:>9}  {:<22} {:<40} {}'.format(ms, size, command, method, test_id))
+
+	with open(path, 'w') as f:
+		f.write('\n'.join(lines) + '\n')
@@ -0,0 +1,127 @@
+# command_transport module
+#   sends WebDriver commands over a pool of keep-alive connections with tunable
+#   size and timeouts, and counts the HTTP requests, the connections opened for
+#   them and the latency of each command. remote sessions are created with a
+#   PooledConnection as their command executor; install() gives the connection
+#   of a local driver the same pool and counters
+#
+#   a driver's commands reuse one open connection; more are opened only when
+#   commands of a driver overlap, e.g. from several threads, up to pool_size
+
+import threading
+import time
+
+import urllib3
+from selenium.webdriver.remote.client_config import ClientConfig
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+# connections kept open to each driver or Grid; a command waits for a free one
+#   rather than opening more. set by the test runner
+pool_size = 4
+
+# seconds to open a connection and to wait for the response to a command.
+#   set by the test runner
+connect_timeout = 10
+read_timeout = 120
+
+# HTTP requests sent and connections opened in this process
+requests = 0
+connections = 0
+
+# command name -> [count, total ms] in this process
+latency = {}
+
+lock = threading.Lock()
+
+def timeout():
+	return urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+
+def count(requests_sent, connections_opened):
+	global requests, connections
+	with lock:
+		requests += requests_sent
+		connections += connections_opened
+
+# Connection pools that count their requests and new connections
+class CountingHTTPPool(urllib3.HTTPConnectionPool):
+
+	def _new_conn(self):
+		count(0, 1)
+		return super()._new_conn()
+
+	def urlopen(self, *args, **kwargs):
+		count(1, 0)
+		return super().urlopen(*args, **kwargs)
+
+class CountingHTTPSPool(urllib3.HTTPSConnectionPool):
+
+	def _new_conn(self):
+		count(0, 1)
+		return super()._new_conn()
+
+	def urlopen(self, *args, **kwargs):
+		count(1, 0)
+		return super().urlopen(*args, **kwargs)
+
+# New pool of keep-alive connections to use for a driver's commands
+def pool_manager():
+	manager = urllib3.PoolManager(maxsize=pool_size, block=True, timeout=timeout(), retries=False)
+	manager.pool_classes_by_scheme = {'http': CountingHTTPPool, 'https': CountingHTTPSPool}
+	return manager
+
+# Run a command and add its duration to the latency of its name
+def timed(execute, command, params):
+	start = time.perf_counter()
+	try:
+		return execute(command, params)
+	finally:
+		ms = (time.perf_counter() - start) * 1000
+		with lock:
+			entry = latency.setdefault(command, [0, 0.0])
+			entry[0] += 1
+			entry[1] += ms
+
+# Command executor for a session on a remote server such as a Selenium Grid
+#   webdriver.Remote(command_executor=PooledConnection(grid_url), options=...)
+class PooledConnection(RemoteConnection):
+
+	def __init__(self, remote_server_addr):
+		super().__init__(client_config=ClientConfig(remote_server_addr,
+			keep_alive=True, timeout=timeout()))
+
+	def _get_connection_manager(self):
+		return pool_manager()
+
+	def execute(self, command, params):
+		return timed(super().execute, command, params)
+
+# Send the commands of a started driver through a counting pool
+#   the command that created the session was sent before and is not counted
+def install(driver):
+	connection = driver.command_executor
+	if isinstance(connection, PooledConnection):
+		return driver
+	connection._conn.clear()
+	connection._conn = pool_manager()
+	connection._client_config.timeout = timeout()
+	execute = connection.execute
+	connection.execute = lambda command, params: timed(execute, command, params)
+	return driver
+
+# Return the counters of this process as {'requests', 'connections', 'commands'}
+#   where commands is latency in the same form
+def stats():
+	with lock:
+		return {'requests': requests, 'connections': connections,
+			'commands': dict((name, list(entry)) for name, entry in latency.items())}
+
+# Counters since an earlier stats(), in the same form
+def since(before):
+	now = stats()
+	commands = {}
+	for name, (calls, total) in now['commands'].items():
+		earlier = before['commands'].get(name, [0, 0.0])
+		if calls > earlier[0]:
+			commands[name] = [calls - earlier[0], total - earlier[1]]
+	return {'requests': now['requests'] - before['requests'],
+		'connections': now['connections'] - before['connections'], 'commands': commands}
@@ -0,0 +1,159 @@
+# content_cache module
+#   keeps what page object methods extracted from an article, such as its
+#   infobox rows, TOC items and headlines, keyed by the article's canonical URL
+#   and revision id. a later call for the same revision, in the same test or
+#   another one, returns the saved result instead of reading the page again.
+#   an edit to the article gives it a new revision id, so results do not go stale.
+#   keys also hold a digest of the page object source (the pages package,
+#   with the extraction script and queries), so a change to how results are
+#   extracted does not return results extracted by the old code
+#
+#   entries are held in memory with least recently used eviction and, when a
+#   store file is configured, in a sqlite database shared by worker processes
+
+import collections
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import time
+
+# entries held in memory, 0 turns the cache off. set by the test runner
+max_entries = 256
+
+# sqlite file shared by worker processes, None keeps entries in memory only.
+#   set by the test runner
+store_path = None
+
+# entries kept in the store file, the least recently used are removed
+max_store_entries = 5000
+
+# lookups in this process
+hits = 0
+misses = 0
+
+# (url, revision, code digest, method qualified name, arguments) -> result,
+#   least recently used first
+entries = collections.OrderedDict()
+
+# directory whose Python source the code digest covers
+pages_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+_store = None
+_digest = None
+
+# Digest of the page object source, computed once in each process
+def code_digest():
+	global _digest
+	if _digest is None:
+		digest = hashlib.sha1()
+		for name in sorted(os.listdir(pages_dir)):
+			if name.endswith('.py'):
+				digest.update(name.encode('utf-8'))
+				with open(os.path.join(pages_dir, name), 'rb') as f:
+					digest.update(f.read())
+		_digest = digest.hexdigest()[:16]
+	return _digest
+
+# Decorator for a page object method whose result depends only on the article
+#   the page's content_key() names the article revision. pages without a
+#   revision id, such as special pages, are not cached. coroutine methods of
+#   async page objects are cached the same way
+def cached(func):
+	if inspect.iscoroutinefunction(func):
+		@functools.wraps(func)
+		async def async_wrapper(self, *args, **kwargs):
+			key = (await self.content_key()) if max_entries else None
+			if key is None:
+				return await func(self, *args, **kwargs)
+			key = key + (code_digest(), func.__qualname__) + args + tuple(sorted(kwargs.items()))
+
+			found, value = get(key)
+			if not found:
+				value = await func(self, *args, **kwargs)
+				put(key, value)
+			return copy.deepcopy(value)
+		return async_wrapper
+
+	@functools.wraps(func)
+	def wrapper(self, *args, **kwargs):
+		key = self.content_key() if max_entries else None
+		if key is None:
+			return func(self, *args, **kwargs)
+		key = key + (code_digest(), func.__qualname__) + args + tuple(sorted(kwargs.items()))
+
+		found, value = get(key)
+		if not found:
+			value = func(self, *args, **kwargs)
+			put(key, value)
+		return copy.deepcopy(value)
+	return wrapper
+
+# Look up a result
+# Returns tuple (found, value)
+def get(key):
+	global hits, misses
+	if key in entries:
+		entries.move_to_end(key)
+		hits += 1
+		return True, entries[key]
+
+	store = open_store()
+	if store is not None:
+		row = store.execute('SELECT value FROM entries WHERE key = ?', (repr(key),)).fetchone()
+		if row is not None:
+			store.execute('UPDATE entries SET used = ? WHERE key = ?', (time.time(), repr(key)))
+			store.commit()
+			hits += 1
+			value = pickle.loads(row[0])
+			remember(key, value)
+			return True, value
+
+	misses += 1
+	return False, None
+
+# Save a result
+def put(key, value):
+	value = copy.deepcopy(value)
+	remember(key, value)
+	store = open_store()
+	if store is not None:
+		store.execute('INSERT OR REPLACE INTO entries (key, value, used) VALUES (?, ?, ?)',
+			(repr(key), pickle.dumps(value), time.time()))
+		store.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries'
+			' ORDER BY used DESC LIMIT -1 OFFSET ?)', (max_store_entries,))
+		store.commit()
+
+def remember(key, value):
+	entries[key] = value
+	entries.move_to_end(key)
+	while len(entries) > max_entries:
+		entries.popitem(last=False)
+
+# Connection to the store file, None when there is none
+#   each process opens its own connection the first time it needs one
+def open_store():
+	global _store
+	if store_path is None:
+		return None
+	if _store is None or _store[0] != (store_path, os.getpid()):
+		connection = sqlite3.connect(store_path, timeout=30)
+		connection.execute('PRAGMA journal_mode=WAL')
+		connection.execute('CREATE TABLE IF NOT EXISTS entries'
+			' (key TEXT PRIMARY KEY, value BLOB, used REAL)')
+		connection.commit()
+		_store = ((store_path, os.getpid()), connection)
+	return _store[1]
+
+# Forget the entries held in memory and the lookup counts
+def clear():
+	global hits, misses
+	entries.clear()
+	hits = misses = 0
+
+# Return the lookups in this process as {'hits', 'misses'}
+def stats():
+	return {'hits': hits, 'misses': misses}
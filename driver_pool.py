@@ -0,0 +1,87 @@
+# driver_pool module
+#   keeps browser sessions alive between tests instead of starting a new
+#   browser for every test. a session is reset before it is handed out again
+#   and replaced when it no longer responds
+
+import urllib3
+
+from selenium.common import exceptions as SelExc
+
+# errors raised when a browser session no longer responds
+session_errors = (SelExc.WebDriverException, urllib3.exceptions.HTTPError, OSError)
+
+
+class DriverPool(object):
+
+	# Parameter
+	#   start_driver - function taking a browser name and returning a new WebDriver
+	def __init__(self, start_driver):
+		self.start_driver = start_driver
+		self.idle = {}          # browser name -> list of idle drivers
+		self.window_sizes = {}  # session id -> window size when the driver started
+		self.started = 0
+		self.replaced = 0
+
+	# Get a driver for a browser, reusing an idle one when available
+	# Parameter
+	#   browser - browser name as accepted by start_driver
+	# Returns a WebDriver on about:blank with no cookies or storage
+	def acquire(self, browser):
+		idle = self.idle.setdefault(browser, [])
+		while idle:
+			driver = idle.pop()
+			try:
+				self.reset(driver)
+				return driver
+			except session_errors:
+				# the session is broken (browser crashed, window closed, ...)
+				self.discard(driver)
+				self.replaced += 1
+
+		driver = self.start_driver(browser)
+		self.started += 1
+		self.window_sizes[driver.session_id] = driver.get_window_size()
+		return driver
+
+	# Return a driver to the pool after a test
+	def release(self, browser, driver):
+		self.idle.setdefault(browser, []).append(driver)
+
+	# Return the browser state to what a new session would have
+	#   raises one of session_errors if the session does not respond
+	def reset(self, driver):
+		# close any windows or tabs the previous test opened
+		handles = driver.window_handles
+		for handle in handles[1:]:
+			driver.switch_to.window(handle)
+			driver.close()
+		driver.switch_to.window(handles[0])
+
+		# storage and cookies can only be cleared for the page's own origin
+		#   through WebDriver, so clear them before leaving the page.
+		#   Chromium browsers can clear cookies of every domain
+		driver.execute_script(
+			"try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+		driver.delete_all_cookies()
+		if hasattr(driver, 'execute_cdp_cmd'):
+			driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+
+		driver.get('about:blank')
+		size = self.window_sizes.get(driver.session_id)
+		if size is not None:
+			driver.set_window_size(size['width'], size['height'])
+
+	# Quit a driver, ignoring errors from a session that is already gone
+	def discard(self, driver):
+		self.window_sizes.pop(driver.session_id, None)
+		try:
+			driver.quit()
+		except session_errors:
+			pass
+
+	# Quit every idle driver
+	def close(self):
+		for drivers in self.idle.values():
+			for driver in drivers:
+				self.discard(driver)
+		self.idle = {}
@@ -0,0 +1,88 @@
+# duration_history module
+#   remembers how long each test took in recent runs, so the runner can hand
+#   out the longest tests first. a long test such as the archived months test
+#   then starts early instead of running alone at the end while the other
+#   workers are idle. the history is kept for each browser, backend and launch
+#   profile, since a test's duration depends on them
+#
+#   the expected duration of a test is the median of its last max_samples
+#   runs; tests without a history are expected to take the median of the others
+
+import json
+import os
+import statistics
+
+root = os.path.dirname(os.path.abspath(__file__))
+
+# file of the history
+path = os.path.join(root, '__pycache__', 'duration_history.json')
+
+# durations kept for each test
+max_samples = 5
+
+# expected duration in seconds of a test when no test has a history
+default_duration = 5.0
+
+# Name of the history of a run's options, such as 'chrome/per-class/fast'
+def profile(options):
+	browser = options['browser']
+	if browser == 'remote':
+		browser += '-' + options.get('remote_browser', 'chrome')
+	return '/'.join([browser, options.get('backend') or 'per-class',
+		options.get('launch_profile') or 'fidelity'])
+
+# Return the history as a dictionary of profile -> test id -> list of durations
+def load():
+	if not os.path.exists(path):
+		return {}
+	with open(path) as f:
+		return json.load(f)
+
+def save(history):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	temp = path + '.{}.tmp'.format(os.getpid())
+	with open(temp, 'w') as f:
+		json.dump(history, f)
+	os.replace(temp, path)
+
+# Add the durations of the tests that ran
+#   passes reported from the result cache and tests lost with their worker
+#   did not run, and are left out
+# Parameters
+#   history - dictionary from load()
+#   name - profile() of the run
+#   records - the runner's records of the tests
+def add(history, name, records):
+	tests = history.setdefault(name, {})
+	for record in records:
+		if record['cached'] or record['duration'] <= 0:
+			continue
+		samples = tests.setdefault(record['id'], [])
+		samples.append(round(record['duration'], 3))
+		del samples[:-max_samples]
+
+# Expected durations of tests
+# Parameters
+#   history - dictionary from load()
+#   name - profile() of the run
+#   ids - test ids
+# Returns tuple (dictionary of test id -> seconds, number of tests without a history)
+def expected(history, name, ids):
+	tests = history.get(name, {})
+	known = dict((test_id, statistics.median(tests[test_id])) for test_id in ids if tests.get(test_id))
+	guess = statistics.median(known.values()) if known else default_duration
+	return dict((test_id, known.get(test_id, guess)) for test_id in ids), len(ids) - len(known)
+
+# Order tests longest expected first, keeping the given order between equals
+def longest_first(ids, durations):
+	return sorted(ids, key=lambda test_id: -durations[test_id])
+
+# Time to run tests in the given order when each of a number of workers takes
+#   the next test as soon as it is free, as the runner hands them out
+# Returns seconds
+def makespan(ids, durations, workers):
+	finish = [0.0] * max(1, min(workers, len(ids)))
+	for test_id in ids:
+		index = finish.index(min(finish))
+		finish[index] += durations[test_id]
+	return max(finish)
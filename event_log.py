@@ -0,0 +1,89 @@
+# event_log module
+#   streams what happens during a run to a JSON lines file, one event per line
+#   as it happens: each test's start and end, the page object methods it calls
+#   with their duration, each navigation wait and each failure. every event
+#   has the monotonic clock time 't' in seconds, which the processes of one
+#   machine share, and the 'worker' that ran the test
+#
+#   worker processes send their events to the runner's process, which is the
+#   only writer. events are written and flushed one at a time and none are
+#   kept, so a long run does not grow the memory used
+#
+#     {"t": 5321.004, "worker": 1, "event": "test_start", "test": "tests.test_home_page...."}
+#     {"t": 5321.912, "worker": 1, "event": "call", "test": "...", "method": "HomePage.open_home_page", "ms": 907.6}
+#     {"t": 5322.310, "worker": 1, "event": "navigation", "test": "...", "method": "HomePage.submit_search", "ms": 380.1, "polls": 4}
+#     {"t": 5322.420, "worker": 1, "event": "test_end", "test": "...", "status": "success", "ms": 1416.2}
+
+import json
+import time
+
+import command_profiler
+
+# number of the worker process from 1, 0 for the runner's own process.
+#   set by the test runner
+worker = 0
+
+# function taking an event, where events are sent. None sends no events.
+#   set by the test runner
+sink = None
+
+# Send an event
+# Parameters
+#   event - name of the event
+#   fields - the event's other values
+def emit(event, **fields):
+	if sink is not None:
+		sink(dict({'t': round(time.monotonic(), 4), 'worker': worker, 'event': event}, **fields))
+
+# Appends events to a file
+class EventWriter(object):
+
+	def __init__(self, path):
+		self.file = open(path, 'a', encoding='utf-8')
+
+	def write(self, event):
+		self.file.write(json.dumps(event) + '\n')
+		self.file.flush()
+
+	def close(self):
+		self.file.close()
+
+# Times the page object methods a test calls
+#   a profile function (see sys.setprofile) that reports the outermost page
+#   object method on the stack when it returns. a navigation method's wait
+#   (see wait_for) counts towards the method
+class CallTimer(object):
+
+	def __init__(self, test_id):
+		self.test_id = test_id
+		self.outer = None  # (frame, method, start) of the outermost call
+
+	def profile(self, frame, event, arg):
+		if event == 'call' and self.outer is None:
+			method = page_method(frame)
+			if method is not None:
+				self.outer = (frame, method, time.perf_counter())
+		elif event == 'return' and self.outer is not None and frame is self.outer[0]:
+			frame, method, start = self.outer
+			self.outer = None
+			emit('call', test=self.test_id, method=method,
+				ms=round((time.perf_counter() - start) * 1000, 1))
+
+# code object -> page object method name or None, for page_method. wait_for's
+#   wrapper is named after the function it wraps, so its code is not kept
+page_methods = {}
+
+# Name of the page object method a frame runs, such as 'MainPage.open_main_page',
+#   None for other code
+def page_method(frame):
+	code = frame.f_code
+	if code in page_methods:
+		return page_methods[code]
+	location = command_profiler.code_location(code.co_filename)
+	if location == 'wait_for' and code.co_name == 'wrapper':
+		return frame.f_locals['func'].__qualname__
+	method = None
+	if location == 'pages' and not code.co_name.startswith(('<', '_')):
+		method = getattr(code, 'co_qualname', code.co_name)
+	page_methods[code] = method
+	return method
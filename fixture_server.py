@@ -0,0 +1,237 @@
+# fixture_server module
+#   records the HTTP responses of the Wikipedia sites while the tests run and
+#   replays them from localhost, so runs do not depend on the network.
+#
+#   live hosts are served from subdomains of localhost on one port, e.g.
+#     https://en.wikipedia.org/wiki/Peru  ->  http://en.wikipedia.localhost:8008/wiki/Peru
+#   links in pages, scripts and API responses are rewritten the same way
+#
+#   usage: python3 fixture_server.py record|replay <directory> [--port 8008]
+
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import re
+import threading
+import urllib.parse
+
+import urllib3
+
+# domains served through the fixture server
+domains = ('wikipedia', 'wikimedia', 'wikidata', 'mediawiki')
+
+# absolute and protocol relative links to the domains, also with JSON escaped slashes
+link_regex = re.compile(
+	r'(?:https?:)?(//|\\/\\/)((?:[a-z0-9-]+\.)*)(' + '|'.join(domains) + r')\.org\b')
+
+# host names built in scripts, such as '//' + lang + '.wikipedia.org'
+script_host_regex = re.compile(r'''(["'])\.(''' + '|'.join(domains) + r''')\.org\b''')
+
+# query parameters that only defeat caches and would make replays miss
+volatile_params = ('_',)
+
+# response headers not passed on to the browser
+dropped_headers = ('connection', 'keep-alive', 'transfer-encoding', 'content-length',
+	'content-encoding', 'strict-transport-security', 'content-security-policy',
+	'content-security-policy-report-only', 'set-cookie', 'alt-svc')
+
+text_types = ('text/', 'application/json', 'application/javascript',
+	'application/x-javascript', 'application/xml')
+
+# Map a live URL to the fixture server
+# Parameters
+#   url - absolute URL on one of the served domains
+#   port - port of the fixture server
+# Returns the URL on the fixture server, other URLs are returned unchanged
+def local_url(url, port):
+	def replace(m):
+		return 'http://{}{}.localhost:{}'.format(m.group(2), m.group(3), port)
+	return link_regex.sub(replace, url, count=1)
+
+# Map the host of a request to the fixture server back to the live host
+#   e.g. 'en.wikipedia.localhost:8008' -> 'en.wikipedia.org'
+def live_host(local_host):
+	host = local_host.split(':')[0]
+	if host.endswith('.localhost'):
+		host = host[:-len('.localhost')] + '.org'
+	return host
+
+# Rewrite the links to served domains in the text of a response
+def rewrite(text, port, content_type):
+	def replace(m):
+		slashes = m.group(1)
+		scheme = 'http:' + slashes if slashes == '//' else 'http:\\/\\/'
+		return '{}{}{}.localhost:{}'.format(scheme, m.group(2), m.group(3), port)
+	text = link_regex.sub(replace, text)
+	if 'javascript' in content_type:
+		text = script_host_regex.sub(
+			lambda m: '{}.{}.localhost:{}'.format(m.group(1), m.group(2), port), text)
+	return text
+
+# Stores responses on disk, one JSON file per request with the body alongside
+class Store(object):
+
+	def __init__(self, directory):
+		self.directory = directory
+
+	# Key of a request, ignoring volatile query parameters
+	def key(self, method, url):
+		parts = urllib.parse.urlsplit(url)
+		query = [ (name, value) for name, value
+			in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+			if name not in volatile_params ]
+		normal = parts._replace(query=urllib.parse.urlencode(sorted(query)))
+		return hashlib.sha1((method + ' ' + normal.geturl()).encode('utf-8')).hexdigest()
+
+	def paths(self, method, url):
+		host = urllib.parse.urlsplit(url).hostname
+		base = os.path.join(self.directory, host, self.key(method, url))
+		return base + '.json', base + '.body'
+
+	# Returns (status, headers, body) or None when the request was not recorded
+	def load(self, method, url):
+		meta_path, body_path = self.paths(method, url)
+		if not os.path.exists(meta_path):
+			return None
+		with open(meta_path) as f:
+			meta = json.load(f)
+		with open(body_path, 'rb') as f:
+			body = f.read()
+		return meta['status'], meta['headers'], body
+
+	def save(self, method, url, status, headers, body):
+		meta_path, body_path = self.paths(method, url)
+		os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+		meta = {'method': method, 'url': url, 'status': status, 'headers': headers}
+		# write then rename so parallel workers never read a partial fixture
+		for path, data, mode in ((body_path, body, 'wb'),
+				(meta_path, json.dumps(meta, indent=1), 'w')):
+			tmp = '{}.{}.tmp'.format(path, threading.get_ident())
+			with open(tmp, mode) as f:
+				f.write(data)
+			os.replace(tmp, path)
+
+# Serves requests from the store, fetching and recording them first in record mode
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+
+	protocol_version = 'HTTP/1.1'
+
+	def do_GET(self):
+		self.respond()
+
+	def do_HEAD(self):
+		self.respond()
+
+	def do_POST(self):
+		self.respond()
+
+	def respond(self):
+		server = self.server
+		url = 'https://{}{}'.format(live_host(self.headers.get('Host', '')), self.path)
+		method = 'GET' if self.command == 'HEAD' else self.command
+
+		if server.recording:
+			try:
+				fixture = self.fetch(method, url)
+			except urllib3.exceptions.HTTPError as e:
+				return self.send_text(502, 'Unable to record {} {}: {}\n'.format(method, url, e))
+			server.store.save(method, url, *fixture)
+		else:
+			fixture = server.store.load(method, url)
+			if fixture is None:
+				server.misses += 1
+				return self.send_text(404, 'Not recorded: {} {}\n'.format(method, url))
+		server.hits += 1
+
+		status, headers, body = fixture
+		content_type = dict((k.lower(), v) for k, v in headers).get('content-type', '')
+		if content_type.startswith(text_types):
+			body = rewrite(body.decode('utf-8', 'replace'), server.port, content_type).encode('utf-8')
+
+		self.send_response(status)
+		for name, value in headers:
+			if name.lower() in dropped_headers:
+				continue
+			if name.lower() in ('location', 'link', 'content-location'):
+				value = rewrite(value, server.port, '')
+			self.send_header(name, value)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		if self.command != 'HEAD':
+			self.wfile.write(body)
+
+	# Send a plain text response generated by the server itself
+	def send_text(self, status, text):
+		body = text.encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Type', 'text/plain; charset=utf-8')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		if self.command != 'HEAD':
+			self.wfile.write(body)
+
+	# Request a URL from the live site
+	# Returns (status, headers, body) with headers as a list of [name, value]
+	def fetch(self, method, url):
+		headers = dict((name, self.headers[name]) for name
+			in ('User-Agent', 'Accept', 'Accept-Language', 'Content-Type')
+			if self.headers.get(name))
+		if self.headers.get('Origin'):
+			origin = urllib.parse.urlsplit(self.headers['Origin']).netloc
+			headers['Origin'] = 'https://' + live_host(origin)
+		headers['Accept-Encoding'] = 'identity'
+		length = int(self.headers.get('Content-Length') or 0)
+		body = self.rfile.read(length) if length else None
+		response = self.server.http.request(method, url, headers=headers, body=body,
+			redirect=False, preload_content=True)
+		return response.status, [ [k, v] for k, v in response.headers.iteritems() ], response.data
+
+	def log_message(self, format, *args):
+		if self.server.verbose:
+			super().log_message(format, *args)
+
+# HTTP server for recording or replaying fixtures
+# Parameters
+#   directory - where fixtures are stored
+#   port - port to listen on localhost
+#   recording - True fetches from the live site and saves every response,
+#     False serves only what was recorded
+class FixtureServer(http.server.ThreadingHTTPServer):
+
+	daemon_threads = True
+
+	def __init__(self, directory, port=8008, recording=False, verbose=False):
+		super().__init__(('127.0.0.1', port), FixtureHandler)
+		self.store = Store(directory)
+		self.port = self.server_address[1]
+		self.recording = recording
+		self.verbose = verbose
+		self.http = urllib3.PoolManager(maxsize=8) if recording else None
+		self.hits = 0
+		self.misses = 0
+
+	# Serve from a background thread
+	def start(self):
+		thread = threading.Thread(target=self.serve_forever, daemon=True)
+		thread.start()
+		return self
+
+	def stop(self):
+		self.shutdown()
+		self.server_close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Record or replay Wikipedia fixtures')
+	parser.add_argument('mode', choices=['record', 'replay'])
+	parser.add_argument('directory')
+	parser.add_argument('--port', type=int, default=8008)
+	args = parser.parse_args()
+
+	server = FixtureServer(args.directory, args.port, args.mode == 'record', verbose=True)
+	print('Serving {} fixtures from {} on port {}'.format(args.mode, args.directory, server.port))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		server.server_close()
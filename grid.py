@@ -0,0 +1,105 @@
+# grid module
+#   reads the capacity of a Selenium Grid from its /status endpoint and tells
+#   when a test failed because its remote session was lost, so the runner can
+#   size its workers to the free slots and run such tests again.
+#   a standalone Grid (java -jar selenium-server-<version>.jar standalone)
+#   reports its slots the same way as a hub with nodes
+
+import collections
+import json
+import time
+
+import urllib3
+
+http = urllib3.PoolManager(timeout=urllib3.Timeout(connect=5, read=10), retries=False)
+
+# seconds between /status requests while waiting for a free slot
+poll_interval = 1.0
+
+# times a test whose session was lost is run again before it is reported
+max_requeues = 2
+
+# exceptions in a test's traceback that show the session or its node went away,
+#   rather than the test failing
+lost_session_errors = ('InvalidSessionIdException', 'NoSuchDriverException',
+	'SessionNotCreatedException', 'MaxRetryError', 'ProtocolError',
+	'RemoteDisconnected', 'ConnectionRefusedError', 'ConnectionResetError')
+
+# Read the status of a Grid
+# Parameter
+#   grid_url - address of the hub or standalone server, e.g. http://localhost:4444
+# Returns the 'value' of the /status response
+def status(grid_url):
+	response = http.request('GET', grid_url.rstrip('/') + '/status')
+	if response.status != 200:
+		raise urllib3.exceptions.HTTPError(
+			'Grid status returned HTTP {} from {}'.format(response.status, grid_url))
+	return json.loads(response.data.decode('utf-8'))['value']
+
+# Slots of the nodes that are up, by browser name
+# Parameter
+#   grid_status - value returned by status()
+# Returns tuple (total, free) of Counters of browser name -> number of slots
+def slots(grid_status):
+	total = collections.Counter()
+	free = collections.Counter()
+	for node in grid_status.get('nodes', []):
+		if node.get('availability') != 'UP':
+			continue
+		for slot in node.get('slots', []):
+			browser = slot.get('stereotype', {}).get('browserName')
+			total[browser] += 1
+			if not slot.get('session'):
+				free[browser] += 1
+	return total, free
+
+# True when a record failed because its session was lost
+def session_lost(record):
+	if record['status'] != 'error':
+		return False
+	lines = record['detail'].strip().splitlines()
+	return bool(lines) and any(name in lines[-1] for name in lost_session_errors)
+
+# Dispatches tests only when the Grid has a free slot for their browser
+#   the runner asks ready() between reading results, so it keeps draining
+#   results and checking its workers while there is no free slot
+class Capacity(object):
+
+	# Parameters
+	#   grid_url - address of the hub or standalone server
+	#   browser - browser name of the slots the tests need
+	#   timeout - seconds to wait for a free slot before dispatching anyway,
+	#     leaving the request to wait in the Grid's session queue
+	def __init__(self, grid_url, browser, timeout=60):
+		self.grid_url = grid_url
+		self.browser = browser
+		self.timeout = timeout
+		self.free = 0  # free slots seen in the last /status not yet handed out
+		self.checked = None  # monotonic time of the last /status request
+		self.waiting_since = None  # monotonic time ready() first returned False
+
+	# Number of slots for the browser on the nodes that are up
+	def total(self):
+		return slots(status(self.grid_url))[0][self.browser]
+
+	# Whether a test can be handed out now, without waiting
+	#   /status is read at most once every poll_interval seconds, and each
+	#   free slot it reports is handed out once
+	# Returns True when a slot is free or the wait for one timed out
+	def ready(self):
+		now = time.monotonic()
+		if self.free == 0 and (self.checked is None or now - self.checked >= poll_interval):
+			self.checked = now
+			try:
+				self.free = slots(status(self.grid_url))[1][self.browser]
+			except (urllib3.exceptions.HTTPError, ValueError, KeyError):
+				pass  # the hub is busy or restarting, try again
+		if self.free > 0:
+			self.free -= 1
+		elif self.waiting_since is None:
+			self.waiting_since = now
+			return False
+		elif now - self.waiting_since < self.timeout:
+			return False
+		self.waiting_since = None
+		return True
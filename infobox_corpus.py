@@ -0,0 +1,253 @@
+# infobox_corpus module
+#   checks the infoboxes of a corpus of articles, as TestArticlePage's infobox
+#   tests do for six. the corpus is a JSON lines file with one article per line:
+#
+#     {"title": "Peru", "expected": [["Currency", "Sol"], ["Capital", "Lima"]]}
+#
+#   the corpus is read a line at a time and a bounded number of articles are
+#   checked at once, by HTML fetchers or browsers. each result is appended to
+#   a JSON lines file as soon as it finishes, so memory use does not grow with
+#   the corpus. rerunning with --resume skips the articles already checked,
+#   and progress is reported in articles per minute
+#
+#   usage:
+#     python3 infobox_corpus.py <corpus.jsonl> <results.jsonl> [--backend html|browser]
+#                               [--browser chrome] [--concurrency N] [--resume]
+#                               [--replay DIRECTORY] [--fixture-port PORT]
+#     python3 infobox_corpus.py --sample <corpus.jsonl>
+#       writes the articles of TestArticlePage's infobox tests as a corpus
+
+import argparse
+import concurrent.futures
+import json
+import os
+import queue
+import sys
+import time
+
+from selenium.common import exceptions as SelExc
+
+from fixture_server import FixtureServer
+from pages import html_backend
+from pages.article_page import ArticlePage
+from pages.base_page import BasePage
+from pages.main_page import MainPage
+import content_cache
+
+# results between progress reports
+progress_every = 100
+
+# Articles of a corpus file
+# Parameters
+#   path - corpus file
+#   done - Watermark of the lines already checked
+# Yields tuples (line number from 1, title, list of (label, expected value))
+def read_corpus(path, done):
+	with open(path, encoding='utf-8') as f:
+		for number, line in enumerate(f, 1):
+			if not line.strip() or number in done:
+				continue
+			article = json.loads(line)
+			yield number, article['title'], [ tuple(pair) for pair in article['expected'] ]
+
+# Lines of the corpus that were checked
+#   results finish out of order, so the lines are kept as the highest line
+#   below which all have a result and the lines with a result above it, which
+#   are only those finished out of order. lines whose last result was an
+#   error are kept apart and are checked again
+class Watermark(object):
+
+	def __init__(self):
+		self.mark = 0
+		self.above = set()
+		self.errors = set()
+
+	def add(self, number, error=False):
+		if error:
+			self.errors.add(number)
+		else:
+			self.errors.discard(number)
+		if number > self.mark:
+			self.above.add(number)
+			while self.mark + 1 in self.above:
+				self.mark += 1
+				self.above.remove(self.mark)
+
+	def __contains__(self, number):
+		return (number <= self.mark or number in self.above) and number not in self.errors
+
+# Lines already checked according to a results file
+#   articles whose last result was an error are checked again
+def finished_lines(path):
+	done = Watermark()
+	if not os.path.exists(path):
+		return done
+	with open(path) as f:
+		for line in f:
+			try:
+				result = json.loads(line)
+			except ValueError:
+				continue  # a line cut short when the run was interrupted
+			done.add(result['line'], result.get('status') == 'error')
+	return done
+
+# Open an article with a session from the pool and check its infobox
+# Returns the result to write
+def check_article(sessions, main_class, article_class, number, title, expected_values):
+	session = sessions.get()
+	start = time.perf_counter()
+	result = {'line': number, 'title': title, 'problems': []}
+	try:
+		main_class(session).open_article(title)
+		article = article_class(session)
+		infobox = article.get_infobox_contents()
+		for label, expected_value in expected_values:
+			found_value = article.get_value_from_infobox_contents(infobox, label)
+			if found_value is None or expected_value not in found_value:
+				result['problems'].append('{}: expected {!r} in {!r}'.format(
+					label, expected_value, found_value))
+		result['status'] = 'mismatch' if result['problems'] else 'ok'
+	except SelExc.NoSuchElementException:
+		result['status'] = 'mismatch'
+		result['problems'].append('the article has no infobox')
+	except Exception as e:
+		result['status'] = 'error'
+		result['problems'].append('{}: {}'.format(type(e).__name__, e))
+	finally:
+		sessions.put(session)
+	result['ms'] = round((time.perf_counter() - start) * 1000)
+	return result
+
+# Check the articles of a corpus and stream the results to a file
+# Parameters
+#   corpus - iterable of (line number, title, expected values), see read_corpus()
+#   path - JSON lines file to append results to
+#   sessions - list of drivers, or html_backend.HtmlSession objects, one for
+#     each article checked at a time
+#   main_class, article_class - MainPage and ArticlePage, or their html_backend mirrors
+# Returns dictionary of status -> number of articles
+def check_corpus(corpus, path, sessions, main_class, article_class):
+	pool = queue.Queue()
+	for session in sessions:
+		pool.put(session)
+
+	# finish a line cut short by an interrupted run before appending
+	if os.path.exists(path) and os.path.getsize(path):
+		with open(path, 'rb') as f:
+			f.seek(-1, os.SEEK_END)
+			partial = f.read(1) != b'\n'
+	else:
+		partial = False
+
+	counts = {'ok': 0, 'mismatch': 0, 'error': 0}
+	start = time.time()
+	executor = concurrent.futures.ThreadPoolExecutor(len(sessions))
+	in_flight = set()
+	try:
+		with open(path, 'a') as out:
+			if partial:
+				out.write('\n')
+
+			def write(done):
+				for future in done:
+					result = future.result()
+					out.write(json.dumps(result) + '\n')
+					out.flush()
+					counts[result['status']] += 1
+					checked = sum(counts.values())
+					if checked % progress_every == 0:
+						print('{} articles, {:.0f} per minute'.format(
+							checked, checked * 60 / (time.time() - start)))
+
+			# keep up to two articles per session submitted, so the corpus is
+			#   not read ahead of the checks
+			for number, title, expected_values in corpus:
+				if len(in_flight) >= 2 * len(sessions):
+					done, in_flight = concurrent.futures.wait(
+						in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+					write(done)
+				in_flight.add(executor.submit(check_article, pool, main_class, article_class,
+					number, title, expected_values))
+			write(concurrent.futures.wait(in_flight)[0])
+	finally:
+		# on an interruption the articles not yet started are left for --resume
+		executor.shutdown(cancel_futures=True)
+	return counts
+
+# Write the articles of TestArticlePage's infobox tests as a corpus
+def write_sample(path):
+	from tests.test_article_page import TestArticlePage
+	with open(path, 'w', encoding='utf-8') as f:
+		for search_term, expected_values in TestArticlePage.infobox_cases.values():
+			f.write(json.dumps({'title': search_term, 'expected': expected_values}) + '\n')
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Check the infoboxes of a corpus of articles')
+	parser.add_argument('corpus', help='JSON lines file with the title and expected values of each article')
+	parser.add_argument('results', nargs='?', help='JSON lines file the results are appended to')
+	parser.add_argument('--sample', action='store_true',
+		help="write the infobox tests' articles to the corpus file and exit")
+	parser.add_argument('--backend', choices=['html', 'browser'], default='html',
+		help="'html' fetches pages without a browser, 'browser' opens them in browsers (default html)")
+	parser.add_argument('--browser', choices=['chrome', 'firefox'], default='chrome',
+		help='browser for the browser backend, started with the fast launch profile')
+	parser.add_argument('--concurrency', type=int, default=8,
+		help='articles checked at a time (default 8)')
+	parser.add_argument('--resume', action='store_true',
+		help='skip the articles already in the results file')
+	parser.add_argument('--replay', metavar='DIRECTORY',
+		help='serve pages from recorded fixtures instead of Wikipedia')
+	parser.add_argument('--fixture-port', type=int, default=8008)
+	args = parser.parse_args()
+	if args.concurrency < 1:
+		parser.error('--concurrency must be at least 1')
+
+	if args.sample:
+		write_sample(args.corpus)
+		sys.exit(0)
+	if not args.results:
+		parser.error('the results file is required')
+	if not args.resume and os.path.exists(args.results):
+		sys.exit('{} exists, use --resume to continue the run or remove it'.format(args.results))
+	done = finished_lines(args.results) if args.resume else Watermark()
+
+	# each article is read once, so keeping extracted content would only use memory
+	content_cache.max_entries = 0
+
+	server = None
+	if args.replay:
+		server = FixtureServer(args.replay, args.fixture_port).start()
+		BasePage.site_port = server.port
+
+	if args.backend == 'html':
+		if not html_backend.available:
+			sys.exit('The html backend needs lxml: pip3 install lxml')
+		# keep a connection for each concurrent fetch
+		maxsize = html_backend.http.connection_pool_kw.get('maxsize', 1)
+		html_backend.http.connection_pool_kw['maxsize'] = max(maxsize, args.concurrency)
+		sessions = [ html_backend.HtmlSession() for _ in range(args.concurrency) ]
+		main_class, article_class = html_backend.HtmlMainPage, html_backend.HtmlArticlePage
+	else:
+		from tests.wikipedia_common import start_driver
+		sessions = []
+		main_class, article_class = MainPage, ArticlePage
+
+	start = time.time()
+	try:
+		if args.backend == 'browser':
+			for _ in range(args.concurrency):
+				sessions.append(start_driver(args.browser, 'fast'))
+		counts = check_corpus(read_corpus(args.corpus, done), args.results,
+			sessions, main_class, article_class)
+	finally:
+		if args.backend == 'browser':
+			for driver in sessions:
+				driver.quit()
+		if server:
+			server.stop()
+
+	checked = sum(counts.values())
+	elapsed = time.time() - start
+	print('Checked {} articles in {:.0f} s, {:.0f} per minute: {ok} ok, {mismatch} mismatched,'
+		' {error} errors'.format(checked, elapsed, checked * 60 / elapsed if elapsed else 0, **counts))
+	sys.exit(1 if counts['mismatch'] or counts['error'] else 0)
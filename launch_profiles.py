@@ -0,0 +1,72 @@
+# launch_profiles module
+#   named sets of options for starting a browser
+#     fidelity - the browser as a person uses it: headed, default options
+#     fast - headless where the browser supports it, 'eager' page load strategy
+#            (commands return once the DOM is ready, without waiting for images
+#            and other subresources), extensions, GPU and animations turned off
+#            and a fixed viewport
+
+from selenium import webdriver
+
+names = ['fidelity', 'fast']
+
+# viewport of the fast profile
+viewport = (1280, 800)
+
+# Options to start a browser with
+# Parameters
+#   browser - one of firefox, ie, chrome or safari
+#   profile - one of names
+# Returns the browser's options object, None for the browser's defaults
+def options(browser, profile):
+	if profile == 'fidelity':
+		return None
+	if profile != 'fast':
+		raise ValueError('Launch profile not recognized: {}'.format(profile))
+
+	opts = default_options(browser)
+	if browser == 'chrome':
+		opts.add_argument('--headless=new')
+		opts.add_argument('--disable-extensions')
+		opts.add_argument('--disable-gpu')
+		opts.add_argument('--disable-dev-shm-usage')
+		opts.add_argument('--force-prefers-reduced-motion')
+		opts.add_argument('--window-size={},{}'.format(*viewport))
+	elif browser == 'firefox':
+		# a new Firefox profile has no extensions installed
+		opts.add_argument('-headless')
+		opts.add_argument('--width={}'.format(viewport[0]))
+		opts.add_argument('--height={}'.format(viewport[1]))
+		opts.set_preference('layers.acceleration.disabled', True)
+		opts.set_preference('ui.prefersReducedMotion', 1)
+		opts.set_preference('toolkit.cosmeticAnimations.enabled', False)
+	# IE and Safari cannot run headless, the other settings still apply
+
+	opts.page_load_strategy = 'eager'
+	return opts
+
+# New options object of a browser with its default settings
+#   remote sessions need one to tell the Grid which browser to start
+def default_options(browser):
+	if browser == 'chrome':
+		return webdriver.ChromeOptions()
+	elif browser == 'firefox':
+		return webdriver.FirefoxOptions()
+	elif browser == 'ie':
+		return webdriver.IeOptions()
+	elif browser == 'safari':
+		return webdriver.SafariOptions()
+	raise ValueError('Browser parameter not recognized: {}'.format(browser))
+
+# Window size to set after the browser starts, None to leave it as it is
+def window_size(browser, profile):
+	if profile == 'fast' and browser in ('ie', 'safari'):
+		return viewport
+	return None
+
+# document.readyState values that show a page has loaded under a profile
+#   with the eager strategy the DOM is ready at 'interactive'
+def ready_states(profile):
+	if profile == 'fast':
+		return ('interactive', 'complete')
+	return ('complete',)
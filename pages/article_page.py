@@ -2,6 +2,8 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 
 from pages.base_page import BasePage
+from pages.extraction import Query
+import content_cache
 
 class ArticlePage(BasePage):
 
@@ -11,27 +13,30 @@ class ArticlePage(BasePage):
 	toc_item = (By.CLASS_NAME, 'toctext')
 	headline = (By.CLASS_NAME, 'mw-headline')
 
+	infobox_rows = BasePage.table_rows.inside(infobox)
+	toc_items_text = Query(toc_item, within=toc_box)
+	headlines_text = Query(headline)
+
 	# Get the text from the article header
 	def get_article_header(self):
-		return self.driver.find_element(*ArticlePage.article_header).text
+		return self.with_element(ArticlePage.article_header, lambda e: e.text)
 
 	# Get the text in the infobox
 	def get_infobox_text(self):
-		return self.driver.find_element(*ArticlePage.infobox).text
+		return self.with_element(ArticlePage.infobox, lambda e: e.text)
 
 	# Parse the contents of the infobox
 	# Returns list of two-item tuples containing text from th and td elements
+	@content_cache.cached
 	def get_infobox_contents(self):
-		i = self.driver.find_element(*ArticlePage.infobox)
-		return self.table_to_list_of_tuples(i)
+		return self.rows_to_tuples(self.extract(ArticlePage.infobox_rows))
 
 	# Get from the infobox the value related to a label
 	# Parameter
 	#   header_text - label to search for
 	# Returns text related to the label
 	def get_value_from_infobox(self, header_text):
-		i = self.driver.find_element(*ArticlePage.infobox)
-		return self.get_value_in_table(i, header_text)
+		return self.value_in_rows(self.extract(ArticlePage.infobox_rows), header_text)
 
 	# Get a value from a list of tuples
 	# Parameters
@@ -48,13 +53,12 @@ class ArticlePage(BasePage):
 
 	# Get the Table of Contents text
 	# Returns list of strings from ToC box
+	@content_cache.cached
 	def get_toc_items_text(self):
-		toc = self.driver.find_element(*ArticlePage.toc_box)
-		toc_items = toc.find_elements(*ArticlePage.toc_item)
-		return [ item.text for item in toc_items ]
+		return self.extract(ArticlePage.toc_items_text)
 
 	# Get the headlines text
 	# Returns list of strings from headers in the article
+	@content_cache.cached
 	def get_headlines_text(self):
-		headlines = self.driver.find_elements(*ArticlePage.headline)
-		return [ headline.text for headline in headlines ]
+		return self.extract(ArticlePage.headlines_text)
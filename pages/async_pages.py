@@ -0,0 +1,284 @@
+# async_pages module
+#   asyncio versions of the page objects, driving a session of async_webdriver.
+#   methods that talk to the browser are coroutines returning the same shapes
+#   as the Selenium page object methods they mirror, so one process can run
+#   the checks of many browser sessions at once:
+#
+#     driver = await async_webdriver.start_session('chrome', 'fast')
+#     await AsyncMainPage(driver).open_article('Peru')
+#     rows = await AsyncArticlePage(driver).get_infobox_contents()
+#
+#   locators, queries and helpers that do not talk to the browser are those
+#   of the Selenium page objects
+
+import time
+
+from selenium.common import exceptions as SelExc
+from selenium.webdriver.common.by import By
+
+from pages import base_page
+from pages import extraction
+from pages.base_page import BasePage
+from pages.home_page import HomePage
+from pages.main_page import MainPage
+from pages.article_page import ArticlePage
+from pages.current_events_page import CurrentEventsPage
+import content_cache
+import wait_for
+
+class AsyncPage(BasePage):
+
+	# Find an element, reusing the element found earlier for the same locator
+	async def find(self, locator):
+		element = self.element_cache.get(locator)
+		if element is None:
+			element = await self.driver.find_element(*locator)
+			self.element_cache[locator] = element
+			self.count_cache_lookup(False)
+		else:
+			self.count_cache_lookup(True)
+		return element
+
+	# Call a coroutine function with the element for a locator
+	#   if the cached element has gone stale it is found again and the call repeated
+	async def with_element(self, locator, action):
+		try:
+			return await action(await self.find(locator))
+		except SelExc.StaleElementReferenceException:
+			self.clear_element_cache()
+			return await action(await self.find(locator))
+
+	# Open a page by its URL on the live site
+	#   the load is reported to wait_for.observers like other navigations
+	async def open_url(self, url):
+		self.clear_element_cache()
+		start = time.perf_counter()
+		await self.driver.get(self.site_url(url))
+		stats = {'polls': 0, 'ms': (time.perf_counter() - start) * 1000}
+		wait_for.notify(self, 'open_url', stats)
+
+	# Return (canonical URL, revision id) of the article on the page
+	async def content_key(self):
+		if base_page.content_key_entry not in self.element_cache:
+			url, revision = await self.driver.execute_script(base_page.content_key_script)
+			self.element_cache[base_page.content_key_entry] = (url, revision) if revision else None
+		return self.element_cache[base_page.content_key_entry]
+
+	async def get_page_title(self):
+		return await self.driver.title()
+
+	async def get_current_url(self):
+		return await self.driver.current_url()
+
+	async def get_body_text(self):
+		body = await self.driver.find_element(By.TAG_NAME, 'body')
+		return (await body.text()).replace("\xa0"," ")
+
+	# Read data described by a Query in a single browser command
+	#   see BasePage.extract
+	async def extract(self, query, root=None):
+		if root is None and query.within in self.element_cache:
+			self.count_cache_lookup(True)
+			try:
+				return (await self.driver.execute_script(extraction.script,
+					query.inside(None).to_spec(), self.element_cache[query.within]))[0]
+			except SelExc.StaleElementReferenceException:
+				self.clear_element_cache()
+
+		data, container = await self.driver.execute_script(
+			extraction.script, query.to_spec(), root)
+		if data is None:
+			raise SelExc.NoSuchElementException(
+				"Unable to locate element: {}".format(query.within))
+		if root is None and container is not None:
+			self.element_cache[query.within] = container
+			self.count_cache_lookup(False)
+		return data
+
+	async def table_to_list_of_tuples(self, table_element):
+		return self.rows_to_tuples(await self.extract(self.table_rows, table_element))
+
+	async def get_value_in_table(self, table_element, header_text):
+		return self.value_in_rows(await self.extract(self.table_rows, table_element), header_text)
+
+	# Click on a link
+	#   waits for the URL to change and the new page to load
+	@wait_for.new_url_and_title
+	async def click_link(self, link_obj):
+		await link_obj.click()
+
+	# Type into a search field and wait for its suggestion list to update
+	#   see BasePage.type_and_wait_for_suggestions
+	async def type_and_wait_for_suggestions(self, input_locator, box_locator,
+			links_locator, search_string, max_wait):
+		links_css = extraction.locator_spec(links_locator)['css']
+		await self.driver.execute_script(base_page.watch_suggestions_script,
+			extraction.locator_spec(box_locator)['css'], links_css)
+		await self.with_element(input_locator, lambda e: e.send_keys(search_string))
+		return await self.driver.execute_async_script(base_page.wait_for_suggestions_script,
+			links_css, int(max_wait * 1000), base_page.suggestions_settle_ms)
+
+	async def enter_header_search_term(self, search_string):
+		suggestions = await self.type_and_wait_for_suggestions(
+			BasePage.search_input, BasePage.search_suggestions_box,
+			BasePage.search_input_suggestions, search_string, 1)
+		return [ {'title': s['text'], 'link': s['href']} for s in suggestions ]
+
+	# Submit the search in the header search
+	#   the search button is clicked, which submits its form
+	@wait_for.new_url_and_title
+	async def submit_header_search(self):
+		await self.with_element(BasePage.submit_search_button, lambda e: e.click())
+
+	async def get_header_search_suggestions(self):
+		return await self.extract(BasePage.header_suggestions)
+
+class AsyncHomePage(AsyncPage):
+
+	homePageUrl = HomePage.homePageUrl
+	search_input = HomePage.search_input
+	submit_search_button = HomePage.submit_search_button
+	search_input_suggestions = HomePage.search_input_suggestions
+	search_suggestions_box = HomePage.search_suggestions_box
+	search_suggestions = HomePage.search_suggestions
+
+	parse_suggestion = HomePage.parse_suggestion
+
+	async def open_home_page(self):
+		await self.open_url(self.homePageUrl)
+
+	# Enter search term into search field, returns the updated suggestions
+	async def enter_search_term(self, search_str):
+		suggestions = await self.type_and_wait_for_suggestions(
+			self.search_input, self.search_suggestions_box,
+			self.search_input_suggestions, search_str, 2)
+		return [ self.parse_suggestion(s['text'], s['href']) for s in suggestions ]
+
+	@wait_for.new_url_and_title
+	async def submit_search(self):
+		await self.with_element(self.submit_search_button, lambda e: e.click())
+
+	async def get_search_suggestions(self):
+		return [ self.parse_suggestion(s['text'], s['link'])
+			for s in await self.extract(self.search_suggestions) ]
+
+	async def find_element_language_link(self, language):
+		css = "[data-el-section='primary links'] a[title *= '{}']".format(language)
+		return await self.driver.find_element(By.CSS_SELECTOR, css)
+
+	@wait_for.new_url_and_title
+	async def click_language_link(self, language):
+		await (await self.find_element_language_link(language)).click()
+
+class AsyncMainPage(AsyncPage):
+
+	main_page_url = MainPage.main_page_url
+	search_url = MainPage.search_url
+	top_banner = MainPage.top_banner
+	left_panel = MainPage.left_panel
+
+	article_url = MainPage.article_url
+
+	async def open_main_page(self):
+		await self.open_url(self.main_page_url)
+
+	# Open the article with a title in a single navigation
+	async def open_article(self, title):
+		await self.open_url(self.article_url(title))
+
+	# Open an article for a search term using the header search
+	async def open_article_by_search(self, search_term):
+		await self.enter_header_search_term(search_term)
+		await self.submit_header_search()
+
+	async def click_left_panel_link(self, link_text):
+		lnk_loc = (By.PARTIAL_LINK_TEXT, link_text)
+		lnk = await self.with_element(self.left_panel, lambda e: e.find_element(*lnk_loc))
+		await self.click_link(lnk)
+
+	async def get_topbanner_text(self):
+		return await self.with_element(self.top_banner, lambda e: e.text())
+
+class AsyncArticlePage(AsyncPage):
+
+	article_header = ArticlePage.article_header
+	infobox = ArticlePage.infobox
+	infobox_rows = ArticlePage.infobox_rows
+	toc_items_text = ArticlePage.toc_items_text
+	headlines_text = ArticlePage.headlines_text
+
+	get_value_from_infobox_contents = ArticlePage.get_value_from_infobox_contents
+
+	async def get_article_header(self):
+		return await self.with_element(self.article_header, lambda e: e.text())
+
+	async def get_infobox_text(self):
+		return await self.with_element(self.infobox, lambda e: e.text())
+
+	# Parse the contents of the infobox
+	# Returns list of two-item tuples containing text from th and td elements
+	@content_cache.cached
+	async def get_infobox_contents(self):
+		return self.rows_to_tuples(await self.extract(self.infobox_rows))
+
+	async def get_value_from_infobox(self, header_text):
+		return self.value_in_rows(await self.extract(self.infobox_rows), header_text)
+
+	@content_cache.cached
+	async def get_toc_items_text(self):
+		return await self.extract(self.toc_items_text)
+
+	@content_cache.cached
+	async def get_headlines_text(self):
+		return await self.extract(self.headlines_text)
+
+class AsyncCurrentEventsPage(AsyncPage):
+
+	first_archived_year = CurrentEventsPage.first_archived_year
+	first_archived_month = CurrentEventsPage.first_archived_month
+	archive_url = CurrentEventsPage.archive_url
+	date_header = CurrentEventsPage.date_header
+	events_by_month_box = CurrentEventsPage.events_by_month_box
+	year_archives = CurrentEventsPage.year_archives
+	archive_grid = CurrentEventsPage.archive_grid
+	date_headers = extraction.Query(date_header)
+	archive_links = extraction.Query((By.TAG_NAME, 'a'), fields={
+		'href': extraction.Field(attribute='href'),
+		'title': extraction.Field(attribute='title'),
+		'text': extraction.Field()})
+
+	parse_date_header = CurrentEventsPage.parse_date_header
+	archive_grid_from_rows = CurrentEventsPage.archive_grid_from_rows
+
+	async def get_archive_links_by_year(self):
+		return await self.driver.find_elements(*self.year_archives)
+
+	# Create a list of link attributes, read in one browser command
+	# return: list of dictionaries containing the href, title and text
+	async def parse_archive_links(self, links_parent):
+		return await self.extract(self.archive_links, links_parent)
+
+	async def get_archive_grid(self):
+		return self.archive_grid_from_rows(await self.extract(self.archive_grid))
+
+	# Open the archive for a month and year with the link at the bottom of the page
+	#   clicking scrolls the link into view
+	async def click_link_archived_month(self, month, year):
+		link_css = "a[href*='{}_{}']".format(month, year)
+		lnk = await self.with_element(self.events_by_month_box,
+			lambda box: box.find_element(By.CSS_SELECTOR, link_css))
+		await self.click_link(lnk)
+
+	async def open_archived_month(self, month, year):
+		await self.open_url(self.archive_url.format(month, year))
+
+	async def get_date_headers(self):
+		return await self.extract(self.date_headers)
+
+# Selenium page class -> async page class
+page_classes = {
+	HomePage: AsyncHomePage,
+	MainPage: AsyncMainPage,
+	ArticlePage: AsyncArticlePage,
+	CurrentEventsPage: AsyncCurrentEventsPage,
+}
@@ -1,10 +1,104 @@
-import time
-
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.common import exceptions as SelExc
 
+import time
+
+from pages import extraction
+import fixture_server
+import wait_for
+
+# element cache entry holding the page's content_key()
+content_key_entry = 'content_key'
+
+# Return the canonical URL and revision id of the page. RLCONF is set inline
+#   in the head, before mw.config is available
+content_key_script = """
+var link = document.querySelector("link[rel='canonical']");
+var config = window.mw && mw.config ? mw.config.get() : (window.RLCONF || {});
+return [link ? link.href : document.URL, config.wgRevisionId || null];
+"""
+
+# milliseconds the suggestion list must stay unchanged to be considered settled
+suggestions_settle_ms = 100
+
+# Watch a suggestion list for changes. arguments are the CSS selectors of the
+#   suggestions box and of the suggestion links. the list's current contents
+#   are kept so a later script can tell whether it changed
+watch_suggestions_script = """
+var box = arguments[0], links = arguments[1];
+if (window.__suggestionWatch) window.__suggestionWatch.observer.disconnect();
+
+function element(node) {
+	return node.nodeType === 1 ? node : node.parentElement;
+}
+// a mutation inside the box, such as new suggestions or their text
+function inBox(node) {
+	var el = element(node);
+	return el && el.closest(box);
+}
+// an added node that is the box or holds it, when the box is rendered anew
+function addsBox(node) {
+	var el = element(node);
+	return el && (el.closest(box) || el.querySelector(box));
+}
+
+var watch = { changes: 0, last: 0 };
+watch.before = JSON.stringify(Array.prototype.map.call(
+	document.querySelectorAll(links), function (a) { return [a.innerText, a.href]; }));
+watch.observer = new MutationObserver(function (records) {
+	for (var i = 0; i < records.length; i++) {
+		var added = Array.prototype.slice.call(records[i].addedNodes);
+		if (inBox(records[i].target) || added.some(addsBox)) {
+			watch.changes++;
+			watch.last = Date.now();
+			return;
+		}
+	}
+});
+watch.observer.observe(document.documentElement,
+	{ childList: true, subtree: true, characterData: true, attributes: true });
+window.__suggestionWatch = watch;
+"""
+
+# Wait in the browser for the watched suggestion list to update.
+#   arguments are the CSS selector of the suggestion links, the maximum wait and
+#   the settle time in milliseconds. resolves with the list once it has changed
+#   and been quiet for the settle time, once the suggestions were re-rendered
+#   with the same contents and stayed quiet for three times the settle time
+#   (the request completed without a different result), or at the maximum wait
+wait_for_suggestions_script = """
+var links = arguments[0], maxWait = arguments[1], settle = arguments[2];
+var done = arguments[arguments.length - 1];
+var watch = window.__suggestionWatch, start = Date.now();
+
+function visibleText(el) {
+	if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return '';
+	return el.innerText.replace(/^[\\s\\xa0]+|[\\s\\xa0]+$/g, '');
+}
+function read() {
+	return Array.prototype.map.call(document.querySelectorAll(links),
+		function (a) { return { text: visibleText(a), href: a.href }; });
+}
+function finish() {
+	if (watch) watch.observer.disconnect();
+	window.__suggestionWatch = null;
+	done(read());
+}
+function check() {
+	var now = Date.now();
+	if (!watch || now - start >= maxWait) return finish();
+	if (watch.changes > 0) {
+		var changed = JSON.stringify(Array.prototype.map.call(
+			document.querySelectorAll(links), function (a) { return [a.innerText, a.href]; })) !== watch.before;
+		if (now - watch.last >= (changed ? settle : 3 * settle)) return finish();
+	}
+	setTimeout(check, 20);
+}
+check();
+"""
+
 class BasePage(object):
 
 	import wait_for
@@ -12,9 +106,98 @@ class BasePage(object):
 	search_input = (By.ID, 'searchInput')
 	submit_search_button = (By.CSS_SELECTOR, '#searchButton')
 	search_input_suggestions = (By.CSS_SELECTOR, '.suggestions-results > a')
+	search_suggestions_box = (By.CSS_SELECTOR, '.suggestions')
+
+	header_suggestions = extraction.Query(search_input_suggestions, fields={
+		'title': extraction.Field(),
+		'link': extraction.Field(attribute='href')})
+
+	# text of the first th and td element of each row in a table
+	table_rows = extraction.Query((By.TAG_NAME, 'tr'), fields={
+		'label': extraction.Field((By.TAG_NAME, 'th')),
+		'value': extraction.Field((By.TAG_NAME, 'td'))})
+
+	# port of a local fixture server (see fixture_server.py) to open pages from,
+	#   None opens the live site. set by the test runner
+	site_port = None
+
+	# elements found through the cache by all pages in this process
+	element_cache_hits = 0
+	element_cache_misses = 0
 
 	def __init__(self, driver):
 		self.driver = driver
+		self.element_cache = {}  # locator -> WebElement found on the current page
+		self.cache_hits = 0
+		self.cache_misses = 0
+
+	# Find an element, reusing the WebElement found earlier for the same locator
+	#   the cache is cleared when the page navigates and when an element goes stale
+	# Parameter
+	#   locator - (By, value) tuple
+	def find(self, locator):
+		element = self.element_cache.get(locator)
+		if element is None:
+			element = self.driver.find_element(*locator)
+			self.element_cache[locator] = element
+			self.count_cache_lookup(False)
+		else:
+			self.count_cache_lookup(True)
+		return element
+
+	# Call a function with the element for a locator
+	#   if the cached element has gone stale it is found again and the call repeated
+	# Parameters
+	#   locator - (By, value) tuple
+	#   action - function taking the WebElement
+	# Returns the function's result
+	def with_element(self, locator, action):
+		try:
+			return action(self.find(locator))
+		except SelExc.StaleElementReferenceException:
+			self.clear_element_cache()
+			return action(self.find(locator))
+
+	# Forget the elements found on the page, e.g. after it navigated
+	def clear_element_cache(self):
+		self.element_cache = {}
+
+	def count_cache_lookup(self, hit):
+		if hit:
+			self.cache_hits += 1
+			BasePage.element_cache_hits += 1
+		else:
+			self.cache_misses += 1
+			BasePage.element_cache_misses += 1
+
+	# Return the cache 'hits' and 'misses' of this page object
+	def element_cache_stats(self):
+		return {'hits': self.cache_hits, 'misses': self.cache_misses}
+
+	# Return the address to open for a URL on the live site
+	def site_url(self, url):
+		if BasePage.site_port is None:
+			return url
+		return fixture_server.local_url(url, BasePage.site_port)
+
+	# Open a page by its URL on the live site
+	#   the page comes from the fixture server when one is configured
+	#   the load is reported to wait_for.observers like other navigations
+	def open_url(self, url):
+		self.clear_element_cache()
+		start = time.perf_counter()
+		self.driver.get(self.site_url(url))
+		stats = {'polls': 0, 'ms': (time.perf_counter() - start) * 1000}
+		wait_for.notify(self, 'open_url', stats)
+
+	# Return (canonical URL, revision id) of the article on the page
+	#   None when the page has no revision, e.g. a special page. the key is kept
+	#   in the element cache so it is read once after each navigation
+	def content_key(self):
+		if content_key_entry not in self.element_cache:
+			url, revision = self.driver.execute_script(content_key_script)
+			self.element_cache[content_key_entry] = (url, revision) if revision else None
+		return self.element_cache[content_key_entry]
 
 	# Return the page title
 	def get_page_title(self):
@@ -28,6 +211,34 @@ class BasePage(object):
 	def get_body_text(self):
 		return self.driver.find_element(By.TAG_NAME, 'body').text.replace("\xa0"," ")
 
+	# Read data described by a Query in a single browser command
+	# Parameters
+	#   query - extraction.Query
+	#   root - optional web element to search within, default is the whole page
+	# Returns list with the text, or dictionary of fields, of each matched element
+	#   raises NoSuchElementException if the query's container is not found
+	#
+	#   the container a query searches within goes into the element cache, so
+	#   later queries and find() calls for the same locator do not look it up again
+	def extract(self, query, root=None):
+		if root is None and query.within in self.element_cache:
+			self.count_cache_lookup(True)
+			try:
+				return self.driver.execute_script(extraction.script,
+					query.inside(None).to_spec(), self.element_cache[query.within])[0]
+			except SelExc.StaleElementReferenceException:
+				self.clear_element_cache()
+
+		data, container = self.driver.execute_script(
+			extraction.script, query.to_spec(), root)
+		if data is None:
+			raise SelExc.NoSuchElementException(
+				"Unable to locate element: {}".format(query.within))
+		if root is None and container is not None:
+			self.element_cache[query.within] = container
+			self.count_cache_lookup(False)
+		return data
+
 	# Get rows from a table and return as a list
 	# Parameter
 	#   table_element - table web element to parse
@@ -36,22 +247,13 @@ class BasePage(object):
 	#   value is text from td element
 	#   missing th or td element is assigned None
 	def table_to_list_of_tuples(self, table_element):
-		vals = []
-		row_elements = table_element.find_elements(By.TAG_NAME, "tr")
-		for row in row_elements:
-			try:
-				h = row.find_element(By.TAG_NAME, "th").text.strip().replace("\xa0"," ")
-			except SelExc.NoSuchElementException:
-				h = None
+		return self.rows_to_tuples(self.extract(self.table_rows, table_element))
 
-			try:
-				d = row.find_element(By.TAG_NAME, "td").text.strip().replace("\xa0"," ")
-			except SelExc.NoSuchElementException:
-				d = None
-			
-			vals.append((h, d))
-
-		return vals
+	# Convert rows read with the table_rows query to (label, value) tuples
+	def rows_to_tuples(self, rows):
+		def clean(text):
+			return None if text is None else text.strip().replace("\xa0"," ")
+		return [ (clean(row['label']), clean(row['value'])) for row in rows ]
 
 	# Return a value from a table
 	# Parameters
@@ -61,71 +263,73 @@ class BasePage(object):
 	#     table data (td) text if a matching row header if found
 	#     None if a matching row header is not found
 	def get_value_in_table(self, table_element, header_text):
-		row_elements = table_element.find_elements(By.TAG_NAME, "tr")
-		for row in row_elements:
-			try:
-				h = row.find_element(By.TAG_NAME, "th").text.strip()
-			except SelExc.NoSuchElementException:
-				h = ''
+		return self.value_in_rows(self.extract(self.table_rows, table_element), header_text)
 
+	# Find a value in rows read with the table_rows query
+	#   returns the value of the first row whose label contains header_text,
+	#   None if there is no such row
+	def value_in_rows(self, rows, header_text):
+		for row in rows:
+			h = row['label'].strip() if row['label'] is not None else ''
 			if header_text in h:
-				try:
-					d = row.find_element(By.TAG_NAME, "td").text.strip()
-				except SelExc.NoSuchElementException:
-					d = None
-				return d
+				return row['value'].strip() if row['value'] is not None else None
 
 		return None  # header text was not found
 
 	# Click on a link
 	#   parameter: link_obj is a selenium object which can be clicked on.
-	#     assumes link opens another page. waits for page title and URL to change
+	#     assumes link opens another page. waits for the URL to change and the new page to load
 	@wait_for.new_url_and_title
 	def click_link(self, link_obj):
 		link_obj.click()
 
+	# Type into a search field and wait for its suggestion list to update
+	#   an observer installed in the page records changes to the suggestions
+	#   while the keys are sent, then one asynchronous script waits in the browser
+	#   for the list to change and settle, or for max_wait, and returns it
+	# Parameters
+	#   input_locator - locator of the search field
+	#   box_locator - CSS locator of the element containing the suggestions
+	#   links_locator - CSS locator of the suggestion links
+	#   search_string - text to type
+	#   max_wait - maximum seconds to wait for the suggestions to change
+	# Returns list of dictionaries with the 'text' and 'href' of each suggestion
+	def type_and_wait_for_suggestions(self, input_locator, box_locator,
+			links_locator, search_string, max_wait):
+		links_css = extraction.locator_spec(links_locator)['css']
+		self.driver.execute_script(watch_suggestions_script,
+			extraction.locator_spec(box_locator)['css'], links_css)
+		self.with_element(input_locator, lambda e: e.send_keys(search_string))
+		return self.driver.execute_async_script(wait_for_suggestions_script,
+			links_css, int(max_wait * 1000), suggestions_settle_ms)
+
 	# Enter the search term in the header
 	#   function does not submit the search
 	# Parameter
 	#   search_string - text to enter into search field
+	# Returns the suggestions once the list has updated, in the form of
+	#   get_header_search_suggestions()
 	def enter_header_search_term(self, search_string):
-		before_list = self.get_header_search_suggestions()
-		before_time = time.time()
-		self.driver.find_element(
-			*BasePage.search_input).send_keys(search_string)
-		# wait for autosuggest list to update
-		while True:
-			after_list = self.get_header_search_suggestions()
-			after_time = time.time()
-			if (before_list != after_list) or ((after_time-before_time) > 1):
-				break
+		# wait for sooner of: the autosuggest list to update, or 1 second
+		suggestions = self.type_and_wait_for_suggestions(
+			BasePage.search_input, BasePage.search_suggestions_box,
+			BasePage.search_input_suggestions, search_string, 1)
+		return [ {'title': s['text'], 'link': s['href']} for s in suggestions ]
 
 	# Submit the search in the header search
-	#   assumes the search term is already entered. waits for page title and URL to change
+	#   assumes the search term is already entered. waits for the URL to change and the new page to load
 	@wait_for.new_url_and_title
 	def submit_header_search(self):
-		self.driver.find_element(*BasePage.submit_search_button).send_keys(Keys.RETURN)
+		self.with_element(BasePage.submit_search_button, lambda e: e.send_keys(Keys.RETURN))
 
 	# Get the list of suggestions from the header search field
 	#   Returns list of suggestions represented as a dictionary with items
 	#     'title' contain text of suggestion and 'link' containing href.
 	#
-	#   Note: method does not attempt to wait for list to "settle" although
-	#     it does recover from selenium Stale Element exception
+	#   Note: method does not attempt to wait for list to "settle".
+	#     the list is read in one browser command so it cannot go stale part way
 	def get_header_search_suggestions(self):
-		while True:
-			try:
-				suggestions = [ 
-					{'title': element.text, 
-					 'link' : element.get_attribute('href') }
-					for element in self.driver.find_elements(
-						*BasePage.search_input_suggestions)
-				]
-				break
-			except SelExc.StaleElementReferenceException:
-				pass
-
-		return suggestions
+		return self.extract(BasePage.header_suggestions)
 
 	# regex to match dates formatted "June 20, 2019 (Thursday)"
 	#   allowing for text between date and day-of-week
@@ -5,15 +5,24 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 
 from pages.base_page import BasePage
+from pages.extraction import Field, Query
 
 class CurrentEventsPage(BasePage):
 
 	first_archived_year = 1994
 	first_archived_month = 7
+	archive_url = "https://en.wikipedia.org/wiki/Portal:Current_events/{}_{}"
 	date_header = (By.CSS_SELECTOR, "[role='heading'] [class='summary']")
 	events_by_month_box = (By.CSS_SELECTOR, "[aria-labelledby='Events_by_month']")
 	year_archives = (By.CSS_SELECTOR, "[aria-labelledby='Events_by_month'] .hlist dl")
 
+	# the links of each year in the Events by month box
+	archive_grid = Query(year_archives, fields={
+		'links': Query((By.TAG_NAME, 'a'), fields={
+			'text': Field(),
+			'title': Field(attribute='title'),
+			'href': Field(attribute='href')})})
+
 	# Get archive links by year for all years
 	# return: list of elements containing each year
 	def get_archive_links_by_year(self):
@@ -37,6 +46,18 @@ class CurrentEventsPage(BasePage):
 		yr = map(get_attributes, links)
 		return list(yr)
 
+	# Read the whole Events by month box in one browser command
+	# return: list with a row for each year in page order, each a list of
+	#   (text, title, href) tuples of the year's links, the year link first and
+	#   then its months. rows without links are kept, empty
+	def get_archive_grid(self):
+		return self.archive_grid_from_rows(self.extract(self.archive_grid))
+
+	# Convert the rows of the archive_grid query to the get_archive_grid form
+	def archive_grid_from_rows(self, rows):
+		return [ [ (link['text'], link['title'], link['href']) for link in row['links'] ]
+			for row in rows ]
+
 	# Open the page for current events archive for a month and year
 	#   using links at the bottom of current events page
 	# Parameters
@@ -44,11 +65,18 @@ class CurrentEventsPage(BasePage):
 	#   year - 4 digit year
 	def click_link_archived_month(self, month, year):
 		link_css = "a[href*='{}_{}']".format(month, year)
-		box = self.driver.find_element(*self.events_by_month_box)
-		lnk = box.find_element(By.CSS_SELECTOR, link_css)
+		lnk = self.with_element(self.events_by_month_box,
+			lambda box: box.find_element(By.CSS_SELECTOR, link_css))
 		ActionChains(self.driver).move_to_element(lnk).perform()
 		self.click_link(lnk)
 
+	# Open the page for current events archive for a month and year by its URL
+	# Parameters
+	#   month - month name, full spelling
+	#   year - 4 digit year
+	def open_archived_month(self, month, year):
+		self.open_url(self.archive_url.format(month, year))
+
 	# Return the headers for each date on the page
 	def get_date_headers(self):
 		hdrs = self.driver.find_elements(*self.date_header)
@@ -0,0 +1,146 @@
+# extraction module
+#   page objects declare what they read from a page as a Query of Fields.
+#   BasePage.extract runs a query as one script in the browser and returns
+#   plain Python data, instead of one WebDriver command per element and value
+
+from selenium.webdriver.common.by import By
+
+# Convert a (By, value) locator into the form the extraction script understands
+def locator_spec(locator):
+	by, value = locator
+	if by == By.CSS_SELECTOR:
+		return {'css': value}
+	elif by == By.ID:
+		return {'css': '[id="{}"]'.format(css_escape(value))}
+	elif by == By.NAME:
+		return {'css': '[name="{}"]'.format(css_escape(value))}
+	elif by == By.CLASS_NAME:
+		return {'css': '[class~="{}"]'.format(css_escape(value))}
+	elif by == By.TAG_NAME:
+		return {'css': value}
+	elif by == By.XPATH:
+		return {'xpath': value}
+	elif by == By.LINK_TEXT:
+		return {'link': value, 'partial': False}
+	elif by == By.PARTIAL_LINK_TEXT:
+		return {'link': value, 'partial': True}
+	raise ValueError('Locator strategy not supported: {}'.format(by))
+
+# Escape a value placed inside a double quoted CSS attribute selector
+def css_escape(value):
+	return value.replace('\\', '\\\\').replace('"', '\\"')
+
+# A value read from each element matched by a Query
+# Parameters
+#   locator - optional (By, value) of a descendant to read from. the first match is
+#     read and None is returned when there is no match. None reads the element itself
+#   attribute - name of the attribute to read. None reads the element's rendered text
+class Field(object):
+
+	def __init__(self, locator=None, attribute=None):
+		self.locator = locator
+		self.attribute = attribute
+
+	def to_spec(self):
+		return {
+			'kind': 'field',
+			'locator': locator_spec(self.locator) if self.locator else None,
+			'attribute': self.attribute,
+		}
+
+# Elements to find on a page and what to read from each of them
+# Parameters
+#   locator - (By, value) of the elements
+#   fields - dictionary of names to Field or nested Query objects. each element
+#     gives a dictionary with the same names. None gives the text of each element
+#   within - optional (By, value) of a container to search in, the first match
+#     is used. the query fails when the container is missing
+class Query(object):
+
+	def __init__(self, locator, fields=None, within=None):
+		self.locator = locator
+		self.fields = fields
+		self.within = within
+
+	# Return a copy of the query that searches within a container
+	def inside(self, within):
+		return Query(self.locator, self.fields, within)
+
+	def to_spec(self):
+		return {
+			'kind': 'query',
+			'locator': locator_spec(self.locator),
+			'within': locator_spec(self.within) if self.within else None,
+			'fields': None if self.fields is None else
+				dict((name, field.to_spec()) for name, field in self.fields.items()),
+		}
+
+# Runs a query spec. arguments[0] is the spec, arguments[1] an optional element
+#   to search from. returns [data, container] where container is the element the
+#   query searched within (null without one) and data is null when it is missing.
+#   text follows WebElement.text: rendered text, trimmed, empty when hidden
+script = """
+var spec = arguments[0], root = arguments[1] || document;
+
+function findAll(loc, ctx) {
+	if (loc.css !== undefined) {
+		return Array.prototype.slice.call(ctx.querySelectorAll(loc.css));
+	}
+	if (loc.xpath !== undefined) {
+		var found = document.evaluate(loc.xpath, ctx, null,
+			XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+		var nodes = [];
+		for (var i = 0; i < found.snapshotLength; i++) nodes.push(found.snapshotItem(i));
+		return nodes;
+	}
+	return Array.prototype.slice.call(ctx.querySelectorAll('a')).filter(function (a) {
+		var t = text(a);
+		return loc.partial ? t.indexOf(loc.link) >= 0 : t === loc.link;
+	});
+}
+
+function text(el) {
+	if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return '';
+	return el.innerText.replace(/^[\\s\\xa0]+|[\\s\\xa0]+$/g, '');
+}
+
+function attribute(el, name) {
+	var value = el.getAttribute(name);
+	// like WebElement.get_attribute, links are returned as absolute URLs
+	if (value !== null && (name === 'href' || name === 'src')) value = el[name];
+	return value;
+}
+
+function read(field, el) {
+	if (field.kind === 'query') return run(field, el);
+	if (field.locator) {
+		var found = findAll(field.locator, el);
+		if (!found.length) return null;
+		el = found[0];
+	}
+	return field.attribute ? attribute(el, field.attribute) : text(el);
+}
+
+function container(query, ctx) {
+	if (!query.within) return ctx;
+	var found = findAll(query.within, ctx);
+	return found.length ? found[0] : null;
+}
+
+function select(query, ctx) {
+	return findAll(query.locator, ctx).map(function (el) {
+		if (!query.fields) return text(el);
+		var row = {};
+		for (var name in query.fields) row[name] = read(query.fields[name], el);
+		return row;
+	});
+}
+
+function run(query, ctx) {
+	ctx = container(query, ctx);
+	return ctx ? select(query, ctx) : null;
+}
+
+var ctx = container(spec, root);
+return [ctx ? select(spec, ctx) : null, spec.within ? ctx : null];
+"""
@@ -1,9 +1,7 @@
-import time
-
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.common import exceptions as SelExc
 
+from pages import extraction
 from pages.base_page import BasePage
 
 class HomePage(BasePage):
@@ -15,63 +13,56 @@ class HomePage(BasePage):
 	search_input = (By.ID, 'searchInput')
 	submit_search_button = (By.XPATH, "//button[@type='submit']")
 	search_input_suggestions = (By.CSS_SELECTOR, '#typeahead-suggestions a')
+	search_suggestions_box = (By.CSS_SELECTOR, '#typeahead-suggestions')
+
+	search_suggestions = extraction.Query(search_input_suggestions, fields={
+		'text': extraction.Field(),
+		'link': extraction.Field(attribute='href')})
 
 	# Open the home page
 	def open_home_page(self):
-		self.driver.get(self.homePageUrl)
+		self.open_url(self.homePageUrl)
 
 	# Enter search term into search field
 	#   search is not submited
 	# Parameter
 	#   search_str - string to enter into search field
+	# Returns the suggestions once the list has updated, in the form of
+	#   get_search_suggestions()
 	def enter_search_term(self, search_str):
 		max_wait = 2 # maximum time to wait for search suggestions to change
-		before_list = self.get_search_suggestions()
-		before_time = time.time()		
-		self.driver.find_element(*HomePage.search_input).send_keys(search_str)
-		# wait for sooner of: the autosuggestion list to change, or 1 second
-		while True:
-			after_list = self.get_search_suggestions()
-			after_time = time.time()
-			if (after_list != before_list) or ((after_time-before_time) > max_wait):
-				break
+		suggestions = self.type_and_wait_for_suggestions(
+			HomePage.search_input, HomePage.search_suggestions_box,
+			HomePage.search_input_suggestions, search_str, max_wait)
+		return [ self.parse_suggestion(s['text'], s['href']) for s in suggestions ]
 
 	# Submit the search already entered in the header
-	#   waits for page title and URL to change
+	#   waits for the URL to change and the new page to load
 	@wait_for.new_url_and_title
 	def submit_search(self):
-		self.driver.find_element(*HomePage.submit_search_button).submit()
+		self.with_element(HomePage.submit_search_button, lambda e: e.submit())
 
 	# Get the suggestions from the search input
 	# Returns a list of suggestions represented by dictionaries containing
 	#   'title' of the suggestion
 	#   'summary' with any additional text
 	#   'link' containing the href in the suggestion
+	#
+	#   the list is read in one browser command so it cannot go stale part way
 	def get_search_suggestions(self):
-		suggestions = []
-		start_time = time.time()
+		return [ self.parse_suggestion(s['text'], s['link'])
+			for s in self.extract(HomePage.search_suggestions) ]
 
-		while True:
-			try:
-				for element in self.driver.find_elements(
-						*HomePage.search_input_suggestions):
-					text = element.text.split("\n")
-					suggestion = {
-						'title'  : text[0],
-						'summary': text[1] if len(text) == 2 else '',
-						'link'   : element.get_attribute('href')}
-					suggestions.append(suggestion)
-				break
-			except (SelExc.StaleElementReferenceException, SelExc.NoSuchElementException) as e:
-				# When Stale Element or No Such Element (often for href) is thrown
-				#   reset suggestions list, find and parse elements again
-				#   throw exception if too much time spent attempting it
-				if time.time() - start_time < 1: #  limit attempts to 1 second
-					suggestions = []
-					pass
-				else:
-					raise Exception(e)
-		return suggestions
+	# Split the text of a suggestion into its title and summary
+	# Parameters
+	#   text - rendered text of the suggestion link
+	#   link - href of the suggestion link
+	def parse_suggestion(self, text, link):
+		text = text.split("\n")
+		return {
+			'title'  : text[0],
+			'summary': text[1] if len(text) == 2 else '',
+			'link'   : link}
 
 	def find_element_language_link(self, language):
 		css = "[data-el-section='primary links'] a[title *= '{}']".format(language)
@@ -96,7 +87,7 @@ class HomePage(BasePage):
 		'''
 
 	# Click a specified language link
-	#   waits for page title and URL to change
+	#   waits for the URL to change and the new page to load
 	# Parameter
 	#   language_code: 2 letter language code in link for lanaguage's main page
 	@wait_for.new_url_and_title
@@ -0,0 +1,321 @@
+# html_backend module
+#   page objects that read the server rendered HTML of a page without a browser.
+#   pages are fetched with a pooled HTTP client and parsed with lxml, and the
+#   methods return the same shapes as the Selenium page objects they mirror,
+#   so read-only checks can run without starting a browser.
+#
+#   HtmlSession stands in for the WebDriver: it holds the current document and
+#   follows links by fetching their href. there is no script, so search
+#   suggestions are not available and searches go straight to the article
+#
+#   lxml is optional; without it available is False and tests use the browser
+
+import re
+import time
+import urllib.parse
+
+import urllib3
+from selenium.common import exceptions as SelExc
+
+try:
+	import lxml.html
+except ImportError:
+	lxml = None
+
+from pages import base_page
+from pages.base_page import BasePage
+from pages.main_page import MainPage
+from pages.article_page import ArticlePage
+from pages.current_events_page import CurrentEventsPage
+import content_cache
+import wait_for
+
+# redirects followed before a fetch fails
+max_redirects = 10
+
+revision_regex = re.compile(r'"wgRevisionId":\s*(\d+)')
+
+# True when the HTML parser is installed
+available = lxml is not None
+
+# connections are kept open and shared by every session in this process
+http = urllib3.PoolManager(
+	num_pools=4, maxsize=4,
+	timeout=urllib3.Timeout(connect=10, read=30),
+	retries=urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504)),
+	headers=urllib3.make_headers(accept_encoding=True,
+		user_agent='selenium-python-wikipedia tests (html backend)'))
+
+# XPath predicate for an element with a class, as CSS .name matches it
+def has_class(name):
+	return "contains(concat(' ', normalize-space(@class), ' '), ' {} ')".format(name)
+
+# Text of an element as a browser renders it, roughly
+#   line breaks and block elements start new lines, whitespace is collapsed,
+#   and scripts, styles and elements hidden with an inline style are left out
+def element_text(element):
+	lines = ['']
+
+	def walk(node):
+		if not isinstance(node.tag, str) or node.tag in ('script', 'style'):
+			return
+		if 'display:none' in (node.get('style') or '').replace(' ', ''):
+			return
+		block = node.tag in ('br', 'p', 'div', 'li', 'tr', 'dd', 'dt', 'h1', 'h2', 'h3', 'h4', 'table', 'ul', 'ol')
+		if block:
+			lines.append('')
+		lines[-1] += node.text or ''
+		for child in node:
+			walk(child)
+			lines[-1] += child.tail or ''
+		if block:
+			lines.append('')
+
+	walk(element)
+	lines = [ ' '.join(line.split()) for line in lines ]
+	return '\n'.join(line for line in lines if line)
+
+# Stand-in for a WebDriver holding the document last fetched
+class HtmlSession(object):
+
+	# not a browser session, see resource_blocking.py
+	session_id = None
+
+	def __init__(self):
+		self.current_url = None
+		self.document = None
+		self.title = ''
+
+	# Fetch a page and make it the current document
+	#   redirects are followed, current_url is the final address
+	def get(self, url):
+		for _ in range(max_redirects + 1):
+			target, headers = self.request_target(url)
+			response = http.request('GET', target, headers=headers, redirect=False)
+			location = response.get_redirect_location()
+			if not location:
+				break
+			url = urllib.parse.urljoin(url, location)
+		if response.status >= 400 or location:
+			raise urllib3.exceptions.HTTPError('HTTP {} for {}'.format(response.status, url))
+
+		self.current_url = url
+		self.document = lxml.html.fromstring(response.data, base_url=url)
+		self.title = (self.document.findtext('.//title') or '').strip()
+
+	# Address and headers to request a URL with
+	#   the fixture server's sites are subdomains of localhost, which the
+	#   resolver may not know, so they are requested from 127.0.0.1 by Host.
+	#   the headers replace the pool's, so they start from them
+	def request_target(self, url):
+		parts = urllib.parse.urlsplit(url)
+		if not (parts.hostname or '').endswith('.localhost'):
+			return url, dict(http.headers)
+		local = parts._replace(netloc='127.0.0.1:{}'.format(parts.port or 80))
+		return urllib.parse.urlunsplit(local), dict(http.headers, Host=parts.netloc)
+
+	def quit(self):
+		self.document = None
+
+# Methods shared by the HTML page objects
+class HtmlPage(BasePage):
+
+	# Open a page by its URL on the live site
+	def open_url(self, url):
+		self.navigate(self.site_url(url), 'open_url')
+
+	# Fetch a page and report the load to wait_for.observers
+	# Parameters
+	#   url - address to fetch
+	#   name - name of the page object method reported with the load
+	def navigate(self, url, name):
+		self.clear_element_cache()
+		start = time.perf_counter()
+		self.driver.get(url)
+		stats = {'polls': 0, 'ms': (time.perf_counter() - start) * 1000}
+		self.last_navigation_wait = stats
+		wait_for.notify(self, name, stats)
+
+	# Return (canonical URL, revision id) of the article, None when the page has
+	#   no revision id. read from the page's RLCONF script
+	def content_key(self):
+		if base_page.content_key_entry not in self.element_cache:
+			canonical = self.select("//link[@rel='canonical']/@href")
+			url = self.driver.current_url
+			if canonical:
+				url = urllib.parse.urljoin(url, canonical[0])
+			key = None
+			for script in self.select('//script/text()'):
+				match = revision_regex.search(script)
+				if match:
+					key = (url, int(match[1])) if int(match[1]) else None
+					break
+			self.element_cache[base_page.content_key_entry] = key
+		return self.element_cache[base_page.content_key_entry]
+
+	# Follow a link element to its page
+	def click_link(self, link):
+		self.navigate(urllib.parse.urljoin(self.driver.current_url, link.get('href')), 'click_link')
+
+	# Elements matching an XPath expression in the current document
+	def select(self, xpath, root=None):
+		return (self.driver.document if root is None else root).xpath(xpath)
+
+	# First element matching an XPath expression
+	#   raises NoSuchElementException when there is none, as find_element does
+	def select_one(self, xpath, root=None):
+		elements = self.select(xpath, root)
+		if not elements:
+			raise SelExc.NoSuchElementException(
+				'Unable to locate element: {}'.format(xpath))
+		return elements[0]
+
+	# Return the current page text
+	def get_body_text(self):
+		return element_text(self.select_one('//body')).replace("\xa0"," ")
+
+	# Read the first th and td of each row in a table, as the table_rows query does
+	def read_table_rows(self, table):
+		rows = []
+		for tr in self.select('.//tr', table):
+			th = tr.xpath('.//th')
+			td = tr.xpath('.//td')
+			rows.append({
+				'label': element_text(th[0]) if th else None,
+				'value': element_text(td[0]) if td else None,
+			})
+		return rows
+
+class HtmlMainPage(HtmlPage):
+
+	main_page_url = MainPage.main_page_url
+	search_url = MainPage.search_url
+	top_banner = "//*[@id='mp-topbanner']"
+	left_panel = "//*[@id='mw-panel']"
+
+	article_url = MainPage.article_url
+
+	# Open the Main page
+	def open_main_page(self):
+		self.open_url(self.main_page_url)
+
+	# Open the article with a title in a single navigation
+	def open_article(self, title):
+		self.navigate(self.site_url(self.article_url(title)), 'open_article')
+
+	# Open an article for a search term
+	#   the search goes straight to the article with that title, as the first
+	#   search suggestion does in the browser
+	# Parameters
+	#   search_term - string searched for
+	def open_article_by_search(self, search_term):
+		self.navigate(self.site_url(self.article_url(search_term)), 'open_article_by_search')
+
+	# Follow a link on the left side panel
+	# Parameters
+	#   link_text - the text on the link to follow
+	def click_left_panel_link(self, link_text):
+		for link in self.select(self.left_panel + '//a[@href]'):
+			if link_text in element_text(link):
+				return self.click_link(link)
+		raise SelExc.NoSuchElementException(
+			'Unable to locate link: {}'.format(link_text))
+
+	# Get the text from the banner at the top of the page
+	def get_topbanner_text(self):
+		return element_text(self.select_one(self.top_banner))
+
+class HtmlArticlePage(HtmlPage):
+
+	article_header = "//*[@id='firstHeading']"
+	infobox = "//table[{}]".format(has_class('infobox'))
+	toc_item = "//*[@id='toc']//*[{}]".format(has_class('toctext'))
+	headline = "//*[{}]".format(has_class('mw-headline'))
+
+	get_value_from_infobox_contents = ArticlePage.get_value_from_infobox_contents
+
+	# Get the text from the article header
+	def get_article_header(self):
+		return element_text(self.select_one(self.article_header))
+
+	# Get the text in the infobox
+	def get_infobox_text(self):
+		return element_text(self.select_one(self.infobox))
+
+	# Parse the contents of the infobox
+	# Returns list of two-item tuples containing text from th and td elements
+	@content_cache.cached
+	def get_infobox_contents(self):
+		return self.rows_to_tuples(self.read_table_rows(self.select_one(self.infobox)))
+
+	# Get from the infobox the value related to a label
+	def get_value_from_infobox(self, header_text):
+		return self.value_in_rows(self.read_table_rows(self.select_one(self.infobox)), header_text)
+
+	# Get the Table of Contents text
+	@content_cache.cached
+	def get_toc_items_text(self):
+		return [ element_text(item) for item in self.select(self.toc_item) ]
+
+	# Get the headlines text
+	@content_cache.cached
+	def get_headlines_text(self):
+		return [ element_text(item) for item in self.select(self.headline) ]
+
+class HtmlCurrentEventsPage(HtmlPage):
+
+	first_archived_year = CurrentEventsPage.first_archived_year
+	first_archived_month = CurrentEventsPage.first_archived_month
+	archive_url = CurrentEventsPage.archive_url
+	date_header = "//*[@role='heading']//*[@class='summary']"
+	events_by_month_box = "//*[@aria-labelledby='Events_by_month']"
+	year_archives = events_by_month_box + "//*[{}]//dl".format(has_class('hlist'))
+
+	parse_date_header = CurrentEventsPage.parse_date_header
+	archive_grid_from_rows = CurrentEventsPage.archive_grid_from_rows
+
+	# Get archive links by year for all years
+	# return: list of elements containing each year
+	def get_archive_links_by_year(self):
+		return self.select(self.year_archives)
+
+	# Create a list of link attributes
+	# parameter:
+	#   links_parent - element containing <a> nodes
+	# return: list of dictionaries containing the absolute href, title and text
+	#   from <a> node
+	def parse_archive_links(self, links_parent):
+		return [ {
+			"href": urllib.parse.urljoin(self.driver.current_url, el.get("href")),
+			"title": el.get("title"),
+			"text": element_text(el),
+		} for el in links_parent.xpath('.//a') ]
+
+	# Read the whole Events by month box
+	# return: list of rows of (text, title, href) tuples, as CurrentEventsPage's
+	def get_archive_grid(self):
+		return self.archive_grid_from_rows([ {'links': self.parse_archive_links(year)}
+			for year in self.get_archive_links_by_year() ])
+
+	# Open the page for current events archive for a month and year
+	# Parameters
+	#   month - month name, full spelling
+	#   year - 4 digit year
+	def click_link_archived_month(self, month, year):
+		link = "{}//a[contains(@href, '{}_{}')]".format(self.events_by_month_box, month, year)
+		self.click_link(self.select_one(link))
+
+	# Open the page for current events archive for a month and year by its URL
+	def open_archived_month(self, month, year):
+		self.navigate(self.site_url(self.archive_url.format(month, year)), 'open_archived_month')
+
+	# Return the headers for each date on the page
+	def get_date_headers(self):
+		return [ element_text(header) for header in self.select(self.date_header) ]
+
+# Selenium page class -> page class of this backend
+page_classes = {
+	MainPage: HtmlMainPage,
+	ArticlePage: HtmlArticlePage,
+	CurrentEventsPage: HtmlCurrentEventsPage,
+}
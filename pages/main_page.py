@@ -1,3 +1,5 @@
+import urllib.parse
+
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 
@@ -6,12 +8,27 @@ from pages.base_page import BasePage
 class MainPage(BasePage):
 
 	main_page_url = "https://en.wikipedia.org/wiki/Main_Page"
+	search_url = "https://en.wikipedia.org/w/index.php"
 	top_banner = (By.ID, 'mp-topbanner')
 	left_panel = (By.ID, 'mw-panel')
 
 	# Open the Main page
 	def open_main_page(self):
-		self.driver.get(self.main_page_url)
+		self.open_url(self.main_page_url)
+
+	# Open the article with a title in a single navigation, without the search UI
+	#   the search page's 'go' option opens the page with the title, matching
+	#   case insensitively and following redirects, e.g. "north by northwest"
+	#   opens North by Northwest
+	# Parameters
+	#   title - title of the article
+	def open_article(self, title):
+		self.open_url(self.article_url(title))
+
+	# Return the address that opens the article with a title
+	def article_url(self, title):
+		query = urllib.parse.urlencode({'search': title, 'title': 'Special:Search', 'go': 'Go'})
+		return self.search_url + '?' + query
 
 	# Open an article for a search term using the header search
 	#   should open the article page that's the first search suggestion
@@ -26,9 +43,9 @@ class MainPage(BasePage):
 	#   link_text - the text on the link to click
 	def click_left_panel_link(self, link_text):
 		lnk_loc = (By.PARTIAL_LINK_TEXT, link_text)
-		lnk = self.driver.find_element(*self.left_panel).find_element(*lnk_loc)
+		lnk = self.with_element(self.left_panel, lambda e: e.find_element(*lnk_loc))
 		self.click_link(lnk)
 
 	# Get the text from the banner at the top of the page
 	def get_topbanner_text(self):
-		return self.driver.find_element(*self.top_banner).text
+		return self.with_element(self.top_banner, lambda e: e.text)
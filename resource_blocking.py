@@ -0,0 +1,159 @@
+# resource_blocking module
+#   stops the browser downloading resources the tests never read, such as
+#   images, web fonts, analytics beacons and banners
+#     Chrome - requests are blocked by URL pattern through DevTools, and the
+#              blocked requests are counted from the performance log
+#     Firefox - images and fonts are turned off with profile preferences and
+#               blocked images are counted in the page. URL patterns cannot be
+#               applied through preferences
+#   blocked requests are never sent, so bytes saved are estimated from a
+#   typical size for each resource type
+
+import collections
+import json
+
+from selenium import webdriver
+
+import wait_for
+
+# URL patterns for each resource type, used where the browser blocks by URL
+type_patterns = {
+	'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.webp', '*.ico'],
+	'font': ['*.woff', '*.woff2', '*.ttf', '*.otf'],
+	'media': ['*.ogg', '*.ogv', '*.oga', '*.webm', '*.mp3', '*.mp4'],
+}
+
+# typical bytes per resource type, to estimate what blocking saved
+typical_bytes = {
+	'image': 20000,
+	'font': 40000,
+	'media': 500000,
+	'other': 2000,
+}
+
+# Resource types and URL patterns to block
+# Parameters
+#   resource_types - names from type_patterns
+#   url_patterns - patterns with * wildcards, matched against the whole URL
+class Blocklist(object):
+
+	def __init__(self, resource_types=(), url_patterns=()):
+		self.resource_types = list(resource_types)
+		self.url_patterns = list(url_patterns)
+
+	# All URL patterns, including those for the resource types
+	def patterns(self):
+		patterns = list(self.url_patterns)
+		for resource_type in self.resource_types:
+			patterns.extend(type_patterns[resource_type])
+		return patterns
+
+default_blocklist = Blocklist(
+	resource_types=['image', 'font', 'media'],
+	url_patterns=[
+		'*/beacon/*',                      # page view and event beacons
+		'*intake-analytics.wikimedia.org*',
+		'*Special:BannerLoader*',          # fundraising and notice banners
+		'*CentralNotice*',
+		'*centralautologin*',
+	])
+
+# blocklist applied to new browsers, None blocks nothing. set by the test runner
+blocklist = None
+
+# navigations kept for each driver
+history_size = 1000
+
+# Add what is needed at launch to the options of a browser
+# Parameters
+#   browser - browser name
+#   options - the browser's options object, None for its defaults
+# Returns the options to start the browser with
+def apply(browser, options):
+	if blocklist is None:
+		return options
+	if browser == 'chrome':
+		options = options or webdriver.ChromeOptions()
+		options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+	elif browser == 'firefox':
+		options = options or webdriver.FirefoxOptions()
+		if 'image' in blocklist.resource_types:
+			options.set_preference('permissions.default.image', 2)
+		if 'font' in blocklist.resource_types:
+			options.set_preference('browser.display.use_document_fonts', 0)
+	return options
+
+# Block resources in a started browser and count them on each navigation
+# Returns the ResourceBlocker, None when nothing is blocked
+def install(driver, browser):
+	if blocklist is None:
+		return None
+	if browser == 'chrome' and not hasattr(driver, 'execute_cdp_cmd'):
+		return None  # DevTools commands are not available through a Grid
+	blocker = ResourceBlocker(driver, browser, blocklist)
+	session_id = driver.session_id
+	blockers[session_id] = blocker
+
+	# forget the blocker with its session, so a long run does not keep them all
+	quit = driver.quit
+	def quit_and_forget():
+		blockers.pop(session_id, None)
+		quit()
+	driver.quit = quit_and_forget
+	if on_navigation not in wait_for.observers:
+		wait_for.observers.append(on_navigation)
+	return blocker
+
+# session id -> ResourceBlocker
+blockers = {}
+
+# Add the requests blocked by a navigation to its stats
+#   stats gain 'blocked_requests' and 'blocked_bytes' (estimated)
+def on_navigation(page, name, stats):
+	blocker = blockers.get(page.driver.session_id)
+	if blocker is not None:
+		counts = blocker.collect()
+		stats['blocked_requests'] = sum(counts.values())
+		stats['blocked_bytes'] = estimate_bytes(counts)
+
+def estimate_bytes(counts):
+	return sum(typical_bytes.get(resource_type, typical_bytes['other']) * count
+		for resource_type, count in counts.items())
+
+# Counts the requests blocked in one browser
+class ResourceBlocker(object):
+
+	def __init__(self, driver, browser, blocklist):
+		self.driver = driver
+		self.browser = browser
+		self.navigations = collections.deque(maxlen=history_size)
+		if browser == 'chrome':
+			driver.execute_cdp_cmd('Network.enable', {})
+			driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocklist.patterns()})
+
+	# Count the requests blocked since the last call
+	#   the counts are also kept in navigations with the page's URL
+	# Returns dictionary of resource type -> number of blocked requests
+	def collect(self):
+		counts = collections.Counter()
+		if self.browser == 'chrome':
+			for entry in self.driver.get_log('performance'):
+				message = json.loads(entry['message'])['message']
+				params = message.get('params', {})
+				if message.get('method') == 'Network.loadingFailed' and params.get('blockedReason'):
+					counts[params.get('type', 'Other').lower()] += 1
+		elif self.browser == 'firefox':
+			# images that finished without loading; lazy images may not have started
+			images = self.driver.execute_script(
+				"return Array.prototype.filter.call(document.images, function (img) {"
+				" return img.src && img.complete && img.naturalWidth === 0"
+				" && img.loading !== 'lazy'; }).length;")
+			if images:
+				counts['image'] = images
+
+		self.navigations.append({
+			'url': self.driver.current_url,
+			'blocked_requests': sum(counts.values()),
+			'blocked_bytes': estimate_bytes(counts),
+		})
+		return counts
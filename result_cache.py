@@ -0,0 +1,141 @@
+# result_cache module
+#   remembers the tests that passed in replay runs, so a later replay run can
+#   report them without starting a browser. a replayed test's outcome depends
+#   only on the code it runs and the recorded pages it reads, so a pass is
+#   reused while its key is unchanged. the key is a hash of
+#     - the test module and the modules of this project it imports, directly
+#       or through others (page objects, wait_for, ...)
+#     - the run options that change how the test runs, such as the browser
+#       and launch profile
+#     - the names, sizes and modification times of the fixture files
+#   tests decorated with uncached_result (in tests/wikipedia_common.py), e.g.
+#   those that depend on today's date or pick at random, always run
+#
+#   entries not used for the longest time are removed beyond max_entries
+
+import ast
+import hashlib
+import json
+import os
+import time
+
+root = os.path.dirname(os.path.abspath(__file__))
+
+# file of the cache
+path = os.path.join(root, '__pycache__', 'result_cache.json')
+
+# entries kept in the file
+max_entries = 2000
+
+# run options that are part of the key
+key_options = ('browser', 'remote_browser', 'launch_profile', 'backend', 'reuse_browser',
+	'navigation_timeout', 'block_resources', 'block_types', 'block_urls')
+
+# Files of this project a module imports, including itself
+# Parameter
+#   module - dotted module name, such as 'tests.test_main_page'
+# Returns sorted list of paths relative to the project
+def module_files(module):
+	found = set()
+	todo = [module]
+	while todo:
+		name = todo.pop()
+		relative = module_path(name)
+		if relative is None or relative in found:
+			continue
+		found.add(relative)
+		# importing a module of a package runs the package's __init__ first
+		if '.' in name:
+			todo.append(name.rsplit('.', 1)[0])
+		with open(os.path.join(root, relative), encoding='utf-8') as f:
+			tree = ast.parse(f.read())
+		for node in ast.walk(tree):
+			if isinstance(node, ast.Import):
+				todo.extend(alias.name for alias in node.names)
+			elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+				todo.append(node.module)
+				# from package import module
+				todo.extend(node.module + '.' + alias.name for alias in node.names)
+	return sorted(found)
+
+# Path of a module or package in this project, None for other modules
+def module_path(name):
+	base = name.replace('.', '/')
+	for relative in (base + '.py', base + '/__init__.py'):
+		if os.path.isfile(os.path.join(root, relative)):
+			return relative
+	return None
+
+# Hash of the fixture files of a directory
+def fixtures_digest(directory):
+	digest = hashlib.sha256()
+	for parent, dirs, files in sorted(os.walk(directory)):
+		dirs.sort()
+		for name in sorted(files):
+			stat = os.stat(os.path.join(parent, name))
+			digest.update('{}/{} {} {}\n'.format(
+				os.path.relpath(parent, directory), name, stat.st_size, stat.st_mtime_ns).encode())
+	return digest.hexdigest()
+
+# Computes the keys of the tests of a run
+class Keys(object):
+
+	# Parameter
+	#   options - run options with the 'replay' directory
+	def __init__(self, options):
+		settings = json.dumps([ options.get(name) for name in key_options ], sort_keys=True)
+		self.base = settings + fixtures_digest(options['replay'])
+		self.file_digests = {}
+		self.module_digests = {}
+
+	def file_digest(self, relative):
+		if relative not in self.file_digests:
+			with open(os.path.join(root, relative), 'rb') as f:
+				self.file_digests[relative] = hashlib.sha256(f.read()).hexdigest()
+		return self.file_digests[relative]
+
+	# Key of a test id such as 'tests.test_main_page.TestMainPage.test_mainpage_autosuggest'
+	def key(self, test_id):
+		module = test_id.rsplit('.', 2)[0]
+		if module not in self.module_digests:
+			self.module_digests[module] = ''.join(relative + self.file_digest(relative)
+				for relative in module_files(module))
+		return hashlib.sha256((test_id + self.base + self.module_digests[module]).encode()).hexdigest()
+
+def load():
+	if not os.path.exists(path):
+		return {}
+	with open(path) as f:
+		return json.load(f)
+
+# Write the entries, keeping the max_entries used most recently
+def save(entries):
+	kept = sorted(entries.items(), key=lambda item: item[1]['used'], reverse=True)[:max_entries]
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	temp = path + '.{}.tmp'.format(os.getpid())
+	with open(temp, 'w') as f:
+		json.dump(dict(kept), f)
+	os.replace(temp, path)
+
+# Remember a passing test
+# Parameters
+#   entries - dictionary from load()
+#   key - the test's key
+#   record - the runner's record of the test
+def add(entries, key, record):
+	entries[key] = {
+		'id': record['id'],
+		'description': record['description'],
+		'short_description': record['short_description'],
+		'properties': record['properties'],
+		'duration': record['duration'],
+		'used': time.time(),
+	}
+
+# Return the entry of a key, None when the test has to run
+#   a found entry is marked as used
+def find(entries, key):
+	entry = entries.get(key)
+	if entry is not None:
+		entry['used'] = time.time()
+	return entry
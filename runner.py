@@ -0,0 +1,582 @@
+# runner module
+#   runs the gathered test cases, either one after another in this process
+#   or split across a pool of worker processes that each drive their own browser.
+#   outcomes come back as plain dictionaries (records) and are merged into a
+#   single unittest style summary
+
+import collections
+import importlib
+import multiprocessing
+import queue
+import sys
+import time
+import unittest
+
+from fixture_server import FixtureServer
+import command_profiler
+import command_transport
+import content_cache
+import duration_history
+import event_log
+import grid
+import launch_profiles
+import resource_blocking
+import result_cache
+import select_tests
+from pages.base_page import BasePage
+import tests.wikipedia_common
+import wait_for
+
+
+# Flatten a test suite into the ids of its test cases
+# Parameter
+#   suite - unittest.TestSuite, possibly containing nested suites
+# Returns list of ids such as 'tests.test_home_page.TestHomePage.test_homepage_title'
+def test_ids(suite):
+	ids = []
+	for test in suite:
+		if isinstance(test, unittest.TestSuite):
+			ids.extend(test_ids(test))
+		else:
+			ids.append(test.id())
+	return ids
+
+
+# Apply the run options to this process
+#   called once in the main process for a serial run and once in each worker
+# Parameter
+#   options - dictionary of run options, 'browser' is required
+def configure(options):
+	tests.wikipedia_common.browser = options['browser']
+	tests.wikipedia_common.reuse_browser = options.get('reuse_browser', False)
+	tests.wikipedia_common.force_browser = options.get('backend') == 'browser'
+	tests.wikipedia_common.grid_url = options.get('grid_url')
+	tests.wikipedia_common.remote_browser = options.get('remote_browser', 'chrome')
+	if options.get('geckodriver'):
+		tests.wikipedia_common.geckodriver_path = options['geckodriver']
+	for name in ('pool_size', 'connect_timeout', 'read_timeout'):
+		if options.get(name) is not None:
+			setattr(command_transport, name, options[name])
+	profile = options.get('launch_profile', 'fidelity')
+	tests.wikipedia_common.launch_profile = profile
+	wait_for.ready_states = launch_profiles.ready_states(profile)
+	if options.get('navigation_timeout') is not None:
+		wait_for.timeout = options['navigation_timeout']
+	BasePage.site_port = options.get('site_port')
+	command_profiler.enabled = bool(options.get('command_profile'))
+	global trace_dependencies
+	trace_dependencies = bool(options.get('trace_dependencies'))
+	if options.get('content_cache_size') is not None:
+		content_cache.max_entries = options['content_cache_size']
+	content_cache.store_path = options.get('content_cache')
+	if options.get('block_resources'):
+		resource_blocking.blocklist = resource_blocking.Blocklist(
+			options.get('block_types', resource_blocking.default_blocklist.resource_types),
+			options.get('block_urls', resource_blocking.default_blocklist.url_patterns))
+
+
+# Release what the process holds once it has no more tests to run
+#   worker processes exit without running atexit handlers
+def finish():
+	tests.wikipedia_common.driver_pool.close()
+
+
+# Create the test case for a test id
+def load_test(test_id):
+	module_name, class_name, method_name = test_id.rsplit('.', 2)
+	module = importlib.import_module(module_name)
+	return getattr(module, class_name)(method_name)
+
+
+# when True run_test traces the page object methods each test calls, for
+#   select_tests. set by configure()
+trace_dependencies = False
+
+# Profile function (see sys.setprofile) passing Python calls and returns to
+#   each hook. calls into C functions are not passed on, none of the hooks use them
+def profile_calls(hooks):
+	def profile(frame, event, arg):
+		if event == 'call' or event == 'return':
+			for hook in hooks:
+				hook(frame, event, arg)
+	return profile
+
+# Run one test case in this process
+# Parameter
+#   test_id - id of the test to run
+# Returns a record, a dictionary with the test 'id', 'description',
+#   'short_description', 'status', 'detail' (formatted traceback or skip reason),
+#   'duration' in seconds, the stats of each of its 'navigation_waits' (with
+#   'blocked_requests' and estimated 'blocked_bytes' when blocking resources) and
+#   the 'element_cache' and 'content_cache' hits and misses of its pages, the
+#   'properties' the test recorded (see WikipediaCommon.record_property), the
+#   page object methods it called when 'traced' (see select_tests) and, when
+#   profiling, the WebDriver 'commands' it sent (see command_profiler), and the
+#   HTTP requests, new connections and command latency of its 'transport'
+#   (see command_transport). 'cached' is True for a pass reported from the result cache
+def run_test(test_id):
+	test = load_test(test_id)
+	result = unittest.TestResult()
+
+	waits = []
+	def record_wait(page, name, stats):
+		# kept by reference so observers after this one, such as
+		#   resource_blocking, can still add to the stats
+		stats['method'] = type(page).__name__ + '.' + name
+		waits.append(stats)
+		event_log.emit('navigation', test=test_id, method=stats['method'],
+			ms=round(stats['ms'], 1), polls=stats['polls'])
+
+	wait_for.observers.append(record_wait)
+	hits, misses = BasePage.element_cache_hits, BasePage.element_cache_misses
+	content_before = content_cache.stats()
+	transport_before = command_transport.stats()
+	command_profiler.drain()
+	trace = select_tests.CallTrace()
+	hooks = []
+	if trace_dependencies:
+		hooks.append(trace.profile)
+	if event_log.sink is not None:
+		hooks.append(event_log.CallTimer(test_id).profile)
+	event_log.emit('test_start', test=test_id)
+	start = time.time()
+	try:
+		if len(hooks) == 1:
+			sys.setprofile(hooks[0])
+		elif hooks:
+			sys.setprofile(profile_calls(hooks))
+		unittest.TestSuite([test]).run(result)
+	finally:
+		if hooks:
+			sys.setprofile(None)
+		wait_for.observers.remove(record_wait)
+	duration = time.time() - start
+	element_cache = {
+		'hits': BasePage.element_cache_hits - hits,
+		'misses': BasePage.element_cache_misses - misses,
+	}
+	content = {name: count - content_before[name]
+		for name, count in content_cache.stats().items()}
+
+	status, detail = 'success', ''
+	if result.errors:
+		status, detail = 'error', result.errors[0][1]
+	elif result.failures:
+		status, detail = 'failure', result.failures[0][1]
+	elif result.skipped:
+		status, detail = 'skip', result.skipped[0][1]
+	elif result.expectedFailures:
+		status, detail = 'expected_failure', result.expectedFailures[0][1]
+	elif result.unexpectedSuccesses:
+		status = 'unexpected_success'
+	if status in ('failure', 'error'):
+		event_log.emit('failure', test=test_id, status=status, detail=detail)
+	event_log.emit('test_end', test=test_id, status=status, ms=round(duration * 1000, 1))
+
+	return {
+		'id': test_id,
+		'description': str(test),
+		'short_description': test.shortDescription(),
+		'status': status,
+		'detail': detail,
+		'duration': duration,
+		'navigation_waits': waits,
+		'element_cache': element_cache,
+		'content_cache': content,
+		'properties': dict(getattr(test, 'properties', {})),
+		'traced': sorted(trace.symbols),
+		'cached': False,
+		'commands': command_profiler.drain(),
+		'transport': command_transport.since(transport_before),
+	}
+
+
+# Stand-in for a test case that ran elsewhere, so its record can be
+#   reported through the standard unittest result classes
+class RecordedTest(object):
+
+	def __init__(self, record):
+		self.record = record
+
+	def id(self):
+		return self.record['id']
+
+	def __str__(self):
+		return self.record['description']
+
+	def shortDescription(self):
+		return self.record['short_description']
+
+
+# Merged results of a run, printed in the same format as unittest.TextTestRunner
+class Summary(unittest.TextTestResult):
+
+	def __init__(self, stream=sys.stderr, verbosity=2):
+		super().__init__(unittest.runner._WritelnDecorator(stream), True, verbosity)
+		self.records = []
+		self.schedule = None
+
+	# Add the record of one test and print its status line
+	def add(self, record):
+		self.records.append(record)
+		test = RecordedTest(record)
+		self.startTest(test)
+		status = record['status']
+		if status == 'success':
+			self.addSuccess(test)
+		elif status == 'failure':
+			self.addFailure(test, record['detail'])
+		elif status == 'error':
+			self.addError(test, record['detail'])
+		elif status == 'skip':
+			self.addSkip(test, record['detail'])
+		elif status == 'expected_failure':
+			self.addExpectedFailure(test, record['detail'])
+		elif status == 'unexpected_success':
+			self.addUnexpectedSuccess(test)
+		self.stopTest(test)
+
+	# records already carry the formatted traceback
+	def _exc_info_to_string(self, err, test):
+		return err
+
+	# Print failure details and the closing totals
+	# Parameter
+	#   time_taken - wall time of the whole run in seconds
+	def print_summary(self, time_taken):
+		self.printErrors()
+		self.stream.writeln(self.separator2)
+		run = self.testsRun
+		self.stream.writeln("Ran %d test%s in %.3fs" % (run, run != 1 and "s" or "", time_taken))
+
+		waits = [wait for record in self.records for wait in record['navigation_waits']]
+		if waits:
+			msg = "Navigation waits: {}, {:.0f} ms in total, {} polls in total, longest {:.0f} ms"
+			self.stream.writeln(msg.format(len(waits),
+				sum(wait['ms'] for wait in waits), sum(wait['polls'] for wait in waits),
+				max(wait['ms'] for wait in waits)))
+		blocked = [wait for wait in waits if 'blocked_requests' in wait]
+		if blocked:
+			self.stream.writeln("Blocked requests: {} on {} navigations, about {:.0f} KB saved".format(
+				sum(wait['blocked_requests'] for wait in blocked), len(blocked),
+				sum(wait['blocked_bytes'] for wait in blocked) / 1024))
+		hits = sum(record['element_cache']['hits'] for record in self.records)
+		misses = sum(record['element_cache']['misses'] for record in self.records)
+		if hits or misses:
+			self.stream.writeln("Element cache: {} hits (lookups saved), {} misses".format(hits, misses))
+		hits = sum(record['content_cache']['hits'] for record in self.records)
+		misses = sum(record['content_cache']['misses'] for record in self.records)
+		if hits or misses:
+			self.stream.writeln("Content cache: {} hits (extractions saved), {} misses".format(hits, misses))
+		requests = sum(record['transport']['requests'] for record in self.records)
+		if requests:
+			connections = sum(record['transport']['connections'] for record in self.records)
+			commands = collections.Counter()
+			ms = collections.Counter()
+			for record in self.records:
+				for name, (count, total) in record['transport']['commands'].items():
+					commands[name] += count
+					ms[name] += total
+			slowest = sorted(commands, key=lambda name: ms[name] / commands[name], reverse=True)[:3]
+			self.stream.writeln("WebDriver requests: {} on {} new connections ({:.0%} reused),"
+				" {:.1f} ms per command; slowest {}".format(requests, connections,
+				1 - connections / requests, sum(ms.values()) / sum(commands.values()),
+				", ".join("{} {:.1f} ms".format(name, ms[name] / commands[name]) for name in slowest)))
+		cached = sum(1 for record in self.records if record['cached'])
+		if cached:
+			self.stream.writeln("Result cache: {} passes reported without running, {} tests run".format(
+				cached, run - cached))
+		if self.schedule:
+			msg = "Schedule: {workers} workers, predicted makespan {predicted:.1f}s longest first" \
+				" ({suite_order:.1f}s in suite order), actual {actual:.1f}s"
+			if self.schedule['unknown']:
+				msg += ", {unknown} tests without a recorded duration"
+			self.stream.writeln(msg.format(**self.schedule))
+		properties = collections.Counter((name, str(value))
+			for record in self.records for name, value in record['properties'].items())
+		if properties:
+			self.stream.writeln("Test properties: " + ", ".join("{}={} ({})".format(name, value, count)
+				for (name, value), count in sorted(properties.items())))
+		self.stream.writeln()
+
+		infos = []
+		if self.wasSuccessful():
+			self.stream.write("OK")
+		else:
+			self.stream.write("FAILED")
+			if self.failures:
+				infos.append("failures=%d" % len(self.failures))
+			if self.errors:
+				infos.append("errors=%d" % len(self.errors))
+		if self.skipped:
+			infos.append("skipped=%d" % len(self.skipped))
+		if self.expectedFailures:
+			infos.append("expected failures=%d" % len(self.expectedFailures))
+		if self.unexpectedSuccesses:
+			infos.append("unexpected successes=%d" % len(self.unexpectedSuccesses))
+		if infos:
+			self.stream.writeln(" (%s)" % ", ".join(infos))
+		else:
+			self.stream.writeln()
+		self.stream.flush()
+
+
+# Worker process loop
+#   runs each test id received on its task queue until it receives None
+#   results are sent as (index, 'record', record), and the events of the
+#   event log as (index, 'event', event)
+def worker_main(index, options, tasks, results):
+	configure(options)
+	event_log.worker = index + 1
+	if options.get('events'):
+		event_log.sink = lambda event: results.put((index, 'event', event))
+	while True:
+		test_id = tasks.get()
+		if test_id is None:
+			break
+		results.put((index, 'record', run_test(test_id)))
+	finish()
+
+
+# Record for a test that could not be reported by a worker process
+def lost_record(test_id, reason):
+	return {
+		'id': test_id,
+		'description': test_id,
+		'short_description': None,
+		'status': 'error',
+		'detail': reason + '\n',
+		'duration': 0.0,
+		'navigation_waits': [],
+		'element_cache': {'hits': 0, 'misses': 0},
+		'content_cache': {'hits': 0, 'misses': 0},
+		'properties': {},
+		'traced': [],
+		'cached': False,
+		'commands': [],
+		'transport': {'requests': 0, 'connections': 0, 'commands': {}},
+	}
+
+
+# Send the events of a test its worker could not report
+def report_lost(record):
+	event_log.emit('failure', test=record['id'], status='error', detail=record['detail'])
+	event_log.emit('test_end', test=record['id'], status='error', ms=0.0)
+
+
+# Record for a pass reported from the result cache without running the test
+def cached_record(entry):
+	record = lost_record(entry['id'], '')
+	record.update({
+		'description': entry['description'],
+		'short_description': entry['short_description'],
+		'status': 'success',
+		'detail': '',
+		'properties': entry['properties'],
+		'cached': True,
+	})
+	return record
+
+
+# Keys of the tests of a replay run whose passes can be cached
+#   tests decorated with uncached_result are left out
+def result_keys(ids, options):
+	keys = result_cache.Keys(options)
+	return dict((test_id, keys.key(test_id)) for test_id in ids
+		if not getattr(getattr(load_test(test_id), test_id.rsplit('.', 1)[1]),
+			'uncached_result', False))
+
+
+# Run tests one after another in this process
+def run_serial(ids, options, summary):
+	configure(options)
+	for test_id in ids:
+		summary.add(run_test(test_id))
+	finish()
+
+
+# Run tests across worker processes
+#   each worker is handed one test at a time and receives the next one as
+#   soon as it reports, so a slow test does not hold up the others
+# Parameters
+#   capacity - optional grid.Capacity, a test is handed out when the Grid has
+#     a free slot for it
+#   requeue - when True a test whose session was lost is run again, up to
+#     grid.max_requeues times, instead of being reported
+def run_parallel(ids, workers, options, summary, capacity=None, requeue=False):
+	ctx = multiprocessing.get_context()
+	results = ctx.Queue()
+	pending = collections.deque(ids)
+	procs = []
+	task_queues = []
+	in_flight = {}
+	requeued = collections.Counter()
+
+	# hand the next tests to idle workers that are alive, while the Grid has
+	#   a free slot for them
+	def dispatch():
+		idle = [ i for i in range(len(procs)) if i not in in_flight and procs[i].is_alive() ]
+		while pending and idle and (capacity is None or capacity.ready()):
+			index = idle.pop()
+			in_flight[index] = pending.popleft()
+			task_queues[index].put(in_flight[index])
+
+	def retry(record):
+		if requeue and requeued[record['id']] < grid.max_requeues:
+			requeued[record['id']] += 1
+			summary.stream.writeln("Session lost, queued again: " + record['id'])
+			pending.append(record['id'])
+			return True
+		return False
+
+	for index in range(min(workers, len(pending))):
+		tasks = ctx.Queue()
+		proc = ctx.Process(target=worker_main, args=(index, options, tasks, results))
+		proc.start()
+		procs.append(proc)
+		task_queues.append(tasks)
+	dispatch()
+
+	# tests are pending without any in flight while the Grid has no free slot
+	while in_flight or (pending and any(proc.is_alive() for proc in procs)):
+		try:
+			index, kind, record = results.get(timeout=1)
+		except queue.Empty:
+			# a worker that died cannot report its test, so report it here
+			for index in list(in_flight):
+				if not procs[index].is_alive():
+					reason = 'Worker process exited (exit code {}) while running the test'
+					record = lost_record(in_flight.pop(index), reason.format(procs[index].exitcode))
+					if not retry(record):
+						report_lost(record)
+						summary.add(record)
+		else:
+			if kind == 'event':
+				event_log.sink(record)
+			else:
+				del in_flight[index]
+				if not (grid.session_lost(record) and retry(record)):
+					summary.add(record)
+		# a test queued again after its worker died also goes to a live idle worker
+		if pending:
+			dispatch()
+
+	# every worker died before the queue was drained
+	for test_id in pending:
+		record = lost_record(test_id, 'No worker process left to run the test')
+		report_lost(record)
+		summary.add(record)
+
+	for tasks in task_queues:
+		tasks.put(None)
+	for proc in procs:
+		proc.join()
+
+
+# Run the tests and print the merged summary
+# Parameters
+#   ids - list of test ids to run
+#   workers - number of worker processes, 1 runs in this process. None runs
+#     in this process, or for the remote browser uses every Grid slot
+#   options - dictionary of run options passed to each worker, see configure()
+#     'record' or 'replay' names a fixture directory; a fixture server is then
+#     started in this process for the workers to open pages from. replay runs
+#     report tests that passed before with the same inputs from result_cache,
+#     unless 'rerun_all' is set. parallel runs start the tests expected to
+#     take longest first, see duration_history. 'events' names a JSON lines
+#     file the events of the run are appended to, see event_log
+# Returns the Summary
+def run(ids, workers, options):
+	summary = Summary()
+	server = None
+	fixtures = options.get('record') or options.get('replay')
+	if fixtures:
+		server = FixtureServer(fixtures, options.get('fixture_port', 8008),
+			recording=bool(options.get('record'))).start()
+		options = dict(options, site_port=server.port)
+	# everything after the server starts is inside the try, so the server and
+	#   the event file are closed when the run cannot start
+	writer = None
+	start = time.time()
+	try:
+		if options.get('events'):
+			writer = event_log.EventWriter(options['events'])
+			event_log.sink = writer.write
+		event_log.emit('run_start', tests=len(ids))
+
+		# in replay runs, report the tests that passed before with the same inputs
+		keys = result_keys(ids, options) if options.get('replay') else {}
+		entries = result_cache.load() if keys else {}
+		if not options.get('rerun_all'):
+			to_run = []
+			for test_id in ids:
+				entry = result_cache.find(entries, keys[test_id]) if test_id in keys else None
+				if entry is None:
+					to_run.append(test_id)
+				else:
+					event_log.emit('test_end', test=test_id, status='success', ms=0.0, cached=True)
+					summary.add(cached_record(entry))
+			ids = to_run
+
+		# remote runs use as many workers as the Grid has slots for the browser,
+		#   or fewer when asked
+		capacity = None
+		if options['browser'] == 'remote':
+			capacity = grid.Capacity(options['grid_url'], options.get('remote_browser', 'chrome'))
+			slots = capacity.total()
+			if not slots:
+				raise RuntimeError('The Grid at {} has no slots for {}'.format(
+					options['grid_url'], capacity.browser))
+			workers = min(workers or slots, slots)
+			summary.stream.writeln("Grid has {} slots for {}, running {} workers".format(
+				slots, capacity.browser, workers))
+			if options.get('reuse_browser'):
+				capacity = None  # workers keep their sessions and need no new slots
+		workers = workers or 1
+
+		# hand out the tests expected to take longest first, from the durations of
+		#   earlier runs, so no worker is left running a long test alone at the end
+		history = duration_history.load()
+		profile = duration_history.profile(options)
+		durations, unknown = duration_history.expected(history, profile, ids)
+		if workers > 1 and ids:
+			suite_order = duration_history.makespan(ids, durations, workers)
+			ids = duration_history.longest_first(ids, durations)
+			summary.schedule = {'workers': workers, 'unknown': unknown, 'suite_order': suite_order,
+				'predicted': duration_history.makespan(ids, durations, workers)}
+
+		start = time.time()
+		if workers > 1 or options['browser'] == 'remote':
+			run_parallel(ids, workers, options, summary, capacity,
+				requeue=options['browser'] == 'remote')
+		else:
+			run_serial(ids, options, summary)
+	finally:
+		if server:
+			server.stop()
+		event_log.emit('run_end', tests=summary.testsRun, failures=len(summary.failures),
+			errors=len(summary.errors), ms=round((time.time() - start) * 1000, 1))
+		if writer:
+			event_log.sink = None
+			writer.close()
+	if summary.schedule:
+		summary.schedule['actual'] = time.time() - start
+	duration_history.add(history, profile, summary.records)
+	duration_history.save(history)
+	if keys:
+		for record in summary.records:
+			if record['status'] == 'success' and not record['cached'] and record['id'] in keys:
+				result_cache.add(entries, keys[record['id']], record)
+		result_cache.save(entries)
+	summary.print_summary(time.time() - start)
+	if options.get('command_profile'):
+		command_profiler.write_report(options['command_profile'], summary.records)
+		summary.stream.writeln("WebDriver command profile written to " + options['command_profile'])
+	if options.get('trace_dependencies'):
+		select_tests.save_traces(summary.records)
+		summary.stream.writeln("Traced calls saved to the test selection index")
+	if server:
+		mode = 'recorded' if server.recording else 'replayed'
+		summary.stream.writeln("Fixtures {}: {} responses, {} not recorded".format(
+			mode, server.hits, server.misses))
+	return summary
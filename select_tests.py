@@ -0,0 +1,405 @@
+# select_tests module
+#   picks the tests a change can affect, so a run can skip the rest.
+#
+#   an index lists the symbols of the page object and test modules: each
+#   function, method, class, locator and other assignment, with its lines and
+#   the names it uses. a test depends on the symbols it uses, on those they
+#   use in turn, and on the page object methods it was seen calling when
+#   its calls were traced (runner option trace_dependencies). self.name and
+#   Class.name are looked up through the class and its bases, and self.name
+#   also in subclasses; other attributes match every symbol with the name.
+#   this can select a test that did not need to run but not miss one that did.
+#
+#   lines changed since a git revision are mapped to the symbols holding them.
+#   changes to comments and blank lines are ignored, and a change to any other
+#   Python file, such as the runner or wait_for.py, selects every test.
+#
+#   the index is cached in __pycache__ and only files whose contents changed
+#   are parsed again
+#
+#   usage: python3 select_tests.py <revision>     print the affected test ids
+
+import ast
+import collections
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import tokenize
+
+root = os.path.dirname(os.path.abspath(__file__))
+index_path = os.path.join(root, '__pycache__', 'select_tests_index.json')
+
+# directories whose modules are indexed, other Python files are infrastructure
+source_dirs = ('pages', 'tests')
+
+# methods unittest calls for every test
+implicit_uses = ('setUp', 'tearDown', 'setUpClass', 'tearDownClass')
+
+module_symbol = '<module>'
+
+index_version = 1
+
+# Symbols of a module's source
+# Returns dictionary of qualified name -> {'name', 'start', 'end', 'uses', 'parent'}
+#   the module itself is the symbol '<module>', holding the lines outside the others
+def parse_source(text):
+	tree = ast.parse(text)
+	symbols = {}
+
+	# names used by nodes. an attribute of a class is 'Class.name', and an
+	#   attribute of self inside a class is 'self:Class.name'. in a class body
+	#   (class_scope) a bare name can be an earlier class attribute
+	def names(nodes, cls=None, class_scope=False):
+		used = set()
+		for node in nodes:
+			for child in ast.walk(node):
+				if isinstance(child, ast.Name):
+					used.add('{}.{}'.format(cls, child.id) if class_scope else child.id)
+				elif isinstance(child, ast.Attribute):
+					owner = child.value.id if isinstance(child.value, ast.Name) else None
+					if owner in ('self', 'cls') and cls:
+						used.add('self:{}.{}'.format(cls, child.attr))
+					elif owner:
+						used.add('{}.{}'.format(owner, child.attr))
+					else:
+						used.add(child.attr)
+		return sorted(used)
+
+	def add(qualname, node, uses, parent):
+		decorators = getattr(node, 'decorator_list', [])
+		symbols[qualname] = {
+			'name': qualname.rsplit('.', 1)[-1],
+			'start': min([node.lineno] + [d.lineno for d in decorators]),
+			'end': node.end_lineno,
+			'uses': uses,
+			'parent': parent,
+		}
+
+	def assigned(node):
+		targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+		return [ t.id for t in targets if isinstance(t, ast.Name) ]
+
+	def add_body(body, prefix, parent):
+		other = []
+		for node in body:
+			if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+				add(prefix + node.name, node, names([node], parent), parent)
+			elif isinstance(node, ast.ClassDef):
+				if parent is not None:
+					add(prefix + node.name, node, names([node], parent), parent)
+					continue
+				statements = add_body(node.body, node.name + '.', node.name)
+				add(node.name, node, names(node.bases + node.decorator_list + statements, node.name), None)
+				symbols[node.name]['bases'] = [ base.id for base in node.bases if isinstance(base, ast.Name) ]
+			elif isinstance(node, (ast.Assign, ast.AnnAssign)) and assigned(node):
+				value = [ n for n in (node.value, getattr(node, 'annotation', None)) if n ]
+				for name in assigned(node):
+					add(prefix + name, node, names(value, parent, parent is not None), parent)
+			else:
+				other.append(node)
+		return other
+
+	other = add_body(tree.body, '', None)
+	symbols[module_symbol] = {'name': None, 'start': 1, 'end': len(text.splitlines()) or 1,
+		'uses': names(other), 'parent': None}
+	return symbols
+
+# Test methods of a test module, as qualified names such as 'TestMainPage.test_mainpage_autosuggest'
+def module_tests(symbols):
+	return sorted(qualname for qualname, symbol in symbols.items()
+		if symbol['parent'] and symbol['parent'].startswith('Test')
+			and symbol['name'].startswith('test'))
+
+# Symbol holding a line, the innermost when symbols are nested
+def symbol_at(symbols, line):
+	best = module_symbol
+	for qualname, symbol in symbols.items():
+		if symbol['start'] <= line <= symbol['end']:
+			span = symbol['end'] - symbol['start']
+			if span < symbols[best]['end'] - symbols[best]['start']:
+				best = qualname
+	return best
+
+def indexed_file(path):
+	parts = path.split('/')
+	return len(parts) == 2 and parts[0] in source_dirs and parts[1].endswith('.py')
+
+def module_name(path):
+	return os.path.splitext(path)[0].replace('/', '.')
+
+# Load the index and bring it up to date with the files on disk
+#   only files whose contents changed since the index was saved are parsed
+def load_index():
+	index = {'version': index_version, 'files': {}, 'traces': {}}
+	if os.path.exists(index_path):
+		with open(index_path) as f:
+			saved = json.load(f)
+		if saved.get('version') == index_version:
+			index = saved
+
+	changed = False
+	paths = set()
+	for directory in source_dirs:
+		for name in sorted(os.listdir(os.path.join(root, directory))):
+			path = directory + '/' + name
+			if not indexed_file(path):
+				continue
+			paths.add(path)
+			with open(os.path.join(root, path), 'rb') as f:
+				data = f.read()
+			digest = hashlib.sha1(data).hexdigest()
+			entry = index['files'].get(path)
+			if entry is None or entry['sha1'] != digest:
+				index['files'][path] = {'sha1': digest, 'symbols': parse_source(data.decode('utf-8'))}
+				changed = True
+	for path in set(index['files']) - paths:
+		del index['files'][path]
+		changed = True
+
+	if changed:
+		save_index(index)
+	return index
+
+def save_index(index):
+	os.makedirs(os.path.dirname(index_path), exist_ok=True)
+	temp = index_path + '.{}.tmp'.format(os.getpid())
+	with open(temp, 'w') as f:
+		json.dump(index, f)
+	os.replace(temp, index_path)
+
+# Dependencies between the symbols of the index
+# Returns (graph of symbol id -> set of symbol ids it depends on,
+#   dictionary of test id -> symbol id of the test method)
+#   symbol ids are 'path::qualified name', e.g. 'pages/base_page.py::BasePage.find'
+def build_graph(index):
+	by_name = collections.defaultdict(set)
+	classes = {}  # class name -> {'bases', 'members' of name -> symbol ids}
+	for path, entry in index['files'].items():
+		for qualname, symbol in entry['symbols'].items():
+			if symbol['name']:
+				by_name[symbol['name']].add(path + '::' + qualname)
+			if 'bases' in symbol:
+				classes.setdefault(qualname, {'bases': symbol['bases'], 'members': {}})
+	for path, entry in index['files'].items():
+		for qualname, symbol in entry['symbols'].items():
+			if symbol['parent'] in classes:
+				members = classes[symbol['parent']]['members']
+				members.setdefault(symbol['name'], set()).add(path + '::' + qualname)
+
+	# the definition a class attribute resolves to, searching the bases
+	def inherited(cls, name, seen=()):
+		if cls not in classes or cls in seen:
+			return set()
+		if name in classes[cls]['members']:
+			return classes[cls]['members'][name]
+		found = set()
+		for base in classes[cls]['bases']:
+			found |= inherited(base, name, seen + (cls,))
+		return found
+
+	# definitions in subclasses, which self can also be
+	def overrides(cls, name):
+		found = set()
+		for sub, info in classes.items():
+			if cls in info['bases'] and sub != cls:
+				found |= info['members'].get(name, set()) | overrides(sub, name)
+		return found
+
+	def resolve(use):
+		if '.' not in use:
+			return by_name.get(use, set())
+		owner, name = use.rsplit('.', 1)
+		polymorphic = owner.startswith('self:')
+		owner = owner[len('self:'):] if polymorphic else owner
+		if owner not in classes:
+			return by_name.get(name, set())
+		found = inherited(owner, name)
+		if polymorphic:
+			found = found | overrides(owner, name)
+		# not defined in the classes, e.g. a WebDriver method
+		return found or by_name.get(name, set())
+
+	graph = {}
+	tests = {}
+	for path, entry in index['files'].items():
+		for qualname, symbol in entry['symbols'].items():
+			symbol_id = path + '::' + qualname
+			deps = set()
+			for use in symbol['uses']:
+				deps |= resolve(use)
+			if symbol['parent']:
+				deps.add(path + '::' + symbol['parent'])
+			deps.add(path + '::' + module_symbol)
+			deps.discard(symbol_id)
+			graph[symbol_id] = deps
+
+		if os.path.basename(path).startswith('test_'):
+			for qualname in module_tests(entry['symbols']):
+				symbol_id = path + '::' + qualname
+				tests[module_name(path) + '.' + qualname] = symbol_id
+				for name in implicit_uses:
+					graph[symbol_id] |= resolve('self:{}.{}'.format(qualname.split('.')[0], name))
+
+	for test_id, traced in index['traces'].items():
+		if test_id in tests:
+			graph[tests[test_id]] |= set(traced) & set(graph)
+	return graph, tests
+
+# Symbols a symbol depends on, directly or through others, and itself
+def closure(graph, symbol_id):
+	seen = {symbol_id}
+	todo = [symbol_id]
+	while todo:
+		for dep in graph.get(todo.pop(), ()):
+			if dep not in seen:
+				seen.add(dep)
+				todo.append(dep)
+	return seen
+
+def git(*args):
+	return subprocess.run(('git',) + args, cwd=root, check=True,
+		stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout.decode('utf-8', 'replace')
+
+hunk_regex = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+# A line of source without its comment and trailing whitespace
+def code_text(line):
+	try:
+		for token in tokenize.generate_tokens(io.StringIO(line).readline):
+			if token.type == tokenize.COMMENT:
+				return line[:token.start[1]].rstrip()
+	except (tokenize.TokenError, SyntaxError):
+		pass  # part of a statement or string spanning lines
+	return line.rstrip()
+
+# Lines changed since a revision, in the working tree and index
+# Returns dictionary of (old path, new path) -> {'old': set of line numbers,
+#   'new': set of line numbers}. a path is None when the file was added or removed.
+#   lines that only hold a comment or whitespace are left out, and so are
+#   hunks whose code is the same once comments are removed
+def changed_lines(revision):
+	files = {}
+	hunks = []  # (lines of the file, hunk header match, list of '-' and '+' lines)
+	old_path = None
+	for line in git('diff', '--unified=0', '--no-color', '--no-ext-diff', '--no-renames',
+			revision, '--').splitlines():
+		if line.startswith('--- '):
+			old_path = None if line == '--- /dev/null' else line[6:]
+		elif line.startswith('+++ '):
+			new_path = None if line == '+++ /dev/null' else line[6:]
+			current = files.setdefault((old_path, new_path), {'old': set(), 'new': set()})
+		elif line.startswith('@@'):
+			hunks.append((current, hunk_regex.match(line), []))
+		elif hunks and line[:1] in ('-', '+'):
+			hunks[-1][2].append(line)
+
+	for current, m, lines in hunks:
+		removed = [ code_text(line[1:]) for line in lines if line[0] == '-' ]
+		added = [ code_text(line[1:]) for line in lines if line[0] == '+' ]
+		if [ code for code in removed if code ] == [ code for code in added if code ]:
+			continue  # comments and blank lines only
+		old_line, new_line = int(m[1]), int(m[3])
+		# a pure insertion or removal falls between two lines of the other side
+		if m[2] == '0':
+			current['old'].add(old_line)
+		if m[4] == '0':
+			current['new'].add(new_line)
+		for code in removed:
+			if code.strip():
+				current['old'].add(old_line)
+			old_line += 1
+		for code in added:
+			if code.strip():
+				current['new'].add(new_line)
+			new_line += 1
+
+	for path in git('ls-files', '--others', '--exclude-standard').splitlines():
+		if path.endswith('.py'):
+			with open(os.path.join(root, path), encoding='utf-8') as f:
+				count = len(f.read().splitlines())
+			files[(None, path)] = {'old': set(), 'new': set(range(1, count + 1))}
+	return files
+
+# Test ids affected by the changes since a revision
+# Parameters
+#   ids - test ids to choose from, such as runner.test_ids() returns
+#   revision - git revision to compare the working tree with
+# Returns the ids of the affected tests, in the order given
+def select(ids, revision):
+	index = load_index()
+	graph, tests = build_graph(index)
+
+	changed = set()
+	removed_names = set()
+	for (old_path, new_path), lines in changed_lines(revision).items():
+		for path, side in ((old_path, 'old'), (new_path, 'new')):
+			if path is None or not lines[side] or not path.endswith('.py'):
+				continue
+			if not indexed_file(path):
+				return list(ids)  # infrastructure, every test can be affected
+			if side == 'new':
+				symbols = index['files'][path]['symbols']
+			else:
+				symbols = parse_source(git('show', '{}:{}'.format(revision, path)))
+			for line in lines[side]:
+				qualname = symbol_at(symbols, line)
+				symbol_id = path + '::' + qualname
+				if symbol_id in graph:
+					changed.add(symbol_id)
+				elif symbols[qualname]['name']:
+					removed_names.add(symbols[qualname]['name'])
+				else:
+					changed.add(new_path + '::' + module_symbol if new_path else symbol_id)
+
+	# symbols still using a name that was removed
+	for path, entry in index['files'].items():
+		for qualname, symbol in entry['symbols'].items():
+			if removed_names.intersection(use.rsplit('.', 1)[-1] for use in symbol['uses']):
+				changed.add(path + '::' + qualname)
+
+	return [ test_id for test_id in ids
+		if test_id not in tests or changed & closure(graph, tests[test_id]) ]
+
+# Records the page object methods called, for the index
+#   profile is a profile function (see sys.setprofile) the runner installs
+#   while a test runs
+class CallTrace(object):
+
+	def __init__(self):
+		self.symbols = set()
+		self.pages_dir = os.path.join(root, 'pages')
+
+	def profile(self, frame, event, arg):
+		if event != 'call':
+			return
+		code = frame.f_code
+		if os.path.dirname(os.path.abspath(code.co_filename)) == self.pages_dir:
+			qualname = getattr(code, 'co_qualname', code.co_name).split('.<locals>')[0]
+			self.symbols.add('pages/' + os.path.basename(code.co_filename) + '::' + qualname)
+
+# Save the traced calls of each test in the index
+# Parameter
+#   records - runner records with their 'traced' symbol ids
+def save_traces(records):
+	index = load_index()
+	for record in records:
+		if record['traced']:
+			index['traces'][record['id']] = record['traced']
+	save_index(index)
+
+if __name__ == '__main__':
+	if len(sys.argv) != 2:
+		sys.exit('usage: python3 select_tests.py <revision>')
+	start = time.perf_counter()
+	index = load_index()
+	graph, tests = build_graph(index)
+	selected = select(sorted(tests), sys.argv[1])
+	for test_id in selected:
+		print(test_id)
+	print('Selected {} of {} tests in {:.0f} ms'.format(
+		len(selected), len(tests), (time.perf_counter() - start) * 1000), file=sys.stderr)
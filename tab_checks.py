@@ -0,0 +1,102 @@
+# tab_checks module
+#   runs the language link checks of TestHomePage and the infobox checks of
+#   TestArticlePage in tabs of a single browser (see tabs.py) instead of a
+#   browser launch for each. a page loading in one tab does not hold up the
+#   checks in the others
+#
+#   usage:
+#     python3 tab_checks.py [--browser chrome] [--tabs N] [--launch-profile fast]
+#                           [--replay DIRECTORY] [--fixture-port PORT]
+
+import argparse
+import sys
+import time
+
+from fixture_server import FixtureServer
+from pages.article_page import ArticlePage
+from pages.base_page import BasePage
+from pages.home_page import HomePage
+from pages.main_page import MainPage
+from tabs import TabScheduler
+from tests.test_article_page import TestArticlePage
+from tests.test_home_page import TestHomePage
+import launch_profiles
+import tests.wikipedia_common
+import wait_for
+
+# Flow that clicks a language link on the home page and checks the main page
+#   it opens. the flow returns a list of problems
+def language_link_flow(language, title_text, body_text):
+	def flow(driver):
+		home = HomePage(driver)
+		home.open_home_page()
+		home.click_language_link(language)
+		main = MainPage(driver)
+		problems = []
+		title = main.get_page_title()
+		if title != title_text:
+			problems.append('title {!r}, expected {!r}'.format(title, title_text))
+		if body_text not in main.get_body_text().replace("\n", ''):
+			problems.append('body text does not contain {!r}'.format(body_text))
+		return problems
+	return flow
+
+# Flow that opens an article and checks values in its infobox
+def infobox_flow(search_term, expected_values):
+	def flow(driver):
+		MainPage(driver).open_article(search_term)
+		article = ArticlePage(driver)
+		infobox = article.get_infobox_contents()
+		problems = []
+		for label, expected_value in expected_values:
+			found_value = article.get_value_from_infobox_contents(infobox, label)
+			if found_value is None or expected_value not in found_value:
+				problems.append('{}: expected {!r} in {!r}'.format(label, expected_value, found_value))
+		return problems
+	return flow
+
+# Every check, as a dictionary of name -> flow
+def all_flows():
+	flows = {}
+	for name, case in TestHomePage.language_links.items():
+		flows[name + '_link'] = language_link_flow(*case)
+	for name, case in TestArticlePage.infobox_cases.items():
+		flows[name + '_infobox'] = infobox_flow(*case)
+	return flows
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Run independent checks in tabs of one browser')
+	parser.add_argument('--browser', choices=['chrome', 'firefox'], default='chrome')
+	parser.add_argument('--tabs', type=int, default=4, help='tabs, and checks run at a time (default 4)')
+	parser.add_argument('--launch-profile', choices=launch_profiles.names, default='fast')
+	parser.add_argument('--replay', metavar='DIRECTORY',
+		help='serve pages from recorded fixtures instead of Wikipedia')
+	parser.add_argument('--fixture-port', type=int, default=8008)
+	args = parser.parse_args()
+
+	server = None
+	if args.replay:
+		server = FixtureServer(args.replay, args.fixture_port).start()
+		BasePage.site_port = server.port
+	wait_for.ready_states = launch_profiles.ready_states(args.launch_profile)
+
+	flows = all_flows()
+	start = time.time()
+	# see tabs.py for why the driver must not wait for page loads
+	driver = tests.wikipedia_common.start_driver(args.browser, args.launch_profile, 'none')
+	try:
+		results = TabScheduler(driver, args.tabs).run(list(flows.values()))
+	finally:
+		driver.quit()
+		if server:
+			server.stop()
+
+	failed = 0
+	for name, result in zip(flows, results):
+		if isinstance(result, Exception):
+			result = ['{}: {}'.format(type(result).__name__, result)]
+		failed += bool(result)
+		print('{:<18} {:<5} {}'.format(name, 'FAIL' if result else 'OK', '; '.join(result)))
+	print('Ran {} checks in {} tabs of one browser in {:.1f} s'.format(
+		len(flows), args.tabs, time.time() - start))
+	sys.exit(1 if failed else 0)
@@ -0,0 +1,125 @@
+# tabs module
+#   runs independent page object flows in separate tabs of one browser, so
+#   checks that never interact share a browser launch. each flow runs in its
+#   own thread bound to a tab's window handle; the driver's commands are sent
+#   one at a time, switching windows first when the command comes from a flow
+#   bound to another tab. page objects keep using the driver as usual
+#
+#   the driver must use the 'none' page load strategy. with the others the
+#   driver holds back commands, including window switches and scripts, until
+#   the current tab's page has loaded, and a load in one tab would hold up
+#   every other. with 'none' opening a URL starts the navigation and waits for
+#   it with the lock released, so other tabs send their commands while a page
+#   loads. clicks that navigate are waited for the same way by
+#   wait_for.new_url_and_title
+#
+#   flows must not switch windows, open or close tabs themselves
+#
+#     scheduler = TabScheduler(driver, tabs=4)
+#     results = scheduler.run([ lambda driver: check(driver, name) for name in names ])
+
+import concurrent.futures
+import queue
+import threading
+import types
+
+from selenium.webdriver.remote.command import Command
+
+import wait_for
+
+navigate_script = "window.location.href = arguments[0];"
+
+class TabScheduler(object):
+
+	# Parameters
+	#   driver - WebDriver whose browser the tabs are opened in
+	#   tabs - number of tabs, and of flows run at a time
+	def __init__(self, driver, tabs=4):
+		self.driver = driver
+		self.tabs = tabs
+		self.lock = threading.Lock()
+		self.bound = threading.local()  # .handle of the tab of the current thread
+		self.current = None             # handle of the window the driver sends commands to
+
+	# Run flows, each in one of the tabs
+	# Parameter
+	#   flows - list of functions taking the driver
+	# Returns list with the result of each flow, or the exception it raised
+	def run(self, flows):
+		strategy = self.driver.capabilities.get('pageLoadStrategy')
+		if strategy != 'none':
+			raise ValueError("Tabs need a driver with the 'none' page load strategy, not {!r}".format(strategy))
+		handles = self.open_tabs()
+		execute = self.driver.__dict__.get('execute')
+		self.execute_command = self.driver.execute
+		self.driver.execute = self.execute
+		try:
+			free = queue.Queue()
+			for handle in handles:
+				free.put(handle)
+			with concurrent.futures.ThreadPoolExecutor(len(handles)) as executor:
+				futures = [ executor.submit(self.run_flow, free, flow) for flow in flows ]
+			return [ future.exception() or future.result() for future in futures ]
+		finally:
+			if execute is None:
+				del self.driver.execute
+			else:
+				self.driver.execute = execute
+			self.close_tabs(handles)
+
+	def run_flow(self, free, flow):
+		handle = free.get()
+		self.bound.handle = handle
+		try:
+			return flow(self.driver)
+		finally:
+			self.bound.handle = None
+			free.put(handle)
+
+	# Open the tabs, the driver's current window being the first
+	def open_tabs(self):
+		handles = [ self.driver.current_window_handle ]
+		for _ in range(self.tabs - 1):
+			self.driver.switch_to.new_window('tab')
+			handles.append(self.driver.current_window_handle)
+		self.current = handles[-1]
+		return handles
+
+	def close_tabs(self, handles):
+		for handle in handles[1:]:
+			self.driver.switch_to.window(handle)
+			self.driver.close()
+		self.driver.switch_to.window(handles[0])
+		self.current = handles[0]
+
+	# The driver's execute while flows run
+	#   a command from a flow is sent to the flow's tab, other commands to the
+	#   current window
+	def execute(self, driver_command, params=None):
+		handle = getattr(self.bound, 'handle', None)
+		if handle is None:
+			with self.lock:
+				return self.execute_command(driver_command, params)
+		if driver_command == Command.GET:
+			return self.open(handle, params['url'])
+		return self.send(handle, driver_command, params)
+
+	def send(self, handle, driver_command, params):
+		with self.lock:
+			if self.current != handle:
+				self.execute_command(Command.SWITCH_TO_WINDOW, {'handle': handle})
+				self.current = handle
+			return self.execute_command(driver_command, params)
+
+	# Open a URL in a tab without holding the driver while the page loads
+	def open(self, handle, url):
+		page = types.SimpleNamespace(driver=self.driver)
+		before_url = self.driver.execute_script(wait_for.page_state_script)[0]
+		if before_url == url:
+			# the wait looks for a new URL, so leave the page before reloading it
+			self.driver.execute_script(navigate_script, 'about:blank')
+			wait_for.navigation(page, before_url)
+			before_url = 'about:blank'
+		self.driver.execute_script(navigate_script, url)
+		wait_for.navigation(page, before_url)
+		return {'value': None}
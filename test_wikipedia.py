@@ -1,3 +1,4 @@
+import argparse
 import sys
 
 import unittest
@@ -6,31 +7,128 @@ from tests.test_home_page import TestHomePage
 from tests.test_main_page import TestMainPage
 from tests.test_article_page import TestArticlePage
 from tests.test_current_events_page import TestCurrentEventsPage
-import tests.wikipedia_common
+import launch_profiles
+import resource_blocking
+import runner
+import select_tests
 
 if __name__ == '__main__':
-	supported_browsers = ['firefox', 'ie', 'chrome', 'safari']
-	if (len(sys.argv) == 2) and (sys.argv[1] in supported_browsers):
-		browser = sys.argv[1]
-		tests.wikipedia_common.browser = browser
-		del sys.argv[1]  # remove so that unittest doesn't attempt to process argument
-
-		# Gather one test suite
-		#tests = unittest.TestLoader().loadTestsFromTestCase(TestCurrentEventsPage)
-
-		# Gather set of test suites
-		suite_list = [
-			TestHomePage,
-			TestMainPage,
-			TestArticlePage,
-			TestCurrentEventsPage,
-		]
-		suites = map(unittest.TestLoader().loadTestsFromTestCase, suite_list)
-		tests = unittest.TestSuite(suites)
-
-		# Run gathered tests
-		unittest.TextTestRunner(verbosity=2).run(tests)
-
-	else:
-		print("Argument missing or invalid. Expected one of",str(supported_browsers)[1:-1])
+	supported_browsers = ['firefox', 'ie', 'chrome', 'safari', 'remote']
 
+	parser = argparse.ArgumentParser(description='Verify Wikipedia.org')
+	parser.add_argument('browser', choices=supported_browsers)
+	parser.add_argument('--workers', type=int,
+		help='number of worker processes, each driving its own browser '
+			'(default 1, or every Grid slot for the remote browser)')
+	parser.add_argument('--grid-url', default='http://localhost:4444',
+		help='Selenium Grid hub or standalone server for the remote browser (default http://localhost:4444)')
+	parser.add_argument('--remote-browser', choices=['chrome', 'firefox', 'safari'], default='chrome',
+		help='browser the remote browser requests from the Grid (default chrome)')
+	parser.add_argument('--geckodriver', metavar='PATH',
+		help='geckodriver executable for firefox (default /selenium_browser_drivers/geckodriver '
+			'when it exists, else found on the PATH)')
+	parser.add_argument('--reuse-browser', action='store_true',
+		help='keep browsers open between tests, resetting them instead of starting a new one')
+	parser.add_argument('--launch-profile', choices=launch_profiles.names, default='fidelity',
+		help="browser options: 'fidelity' keeps default headed browsers, 'fast' runs headless "
+			"with the eager page load strategy (default fidelity)")
+	parser.add_argument('--backend', choices=['per-class', 'browser'], default='per-class',
+		help="'browser' runs every test in a browser, including those whose class reads "
+			"pages as HTML without one (default per-class)")
+	parser.add_argument('--navigation-timeout', type=float,
+		help='seconds to wait for a new page to load after a click or search (default 30)')
+	parser.add_argument('--pool-size', type=int,
+		help='keep-alive connections kept open to each driver for WebDriver commands (default 4)')
+	parser.add_argument('--connect-timeout', type=float,
+		help='seconds to open a connection to a driver (default 10)')
+	parser.add_argument('--command-timeout', type=float,
+		help='seconds to wait for the response to a WebDriver command (default 120)')
+	fixtures = parser.add_mutually_exclusive_group()
+	fixtures.add_argument('--record', metavar='DIRECTORY',
+		help='save every response from Wikipedia as a fixture while the tests run')
+	fixtures.add_argument('--replay', metavar='DIRECTORY',
+		help='serve pages from recorded fixtures instead of Wikipedia')
+	parser.add_argument('--rerun-all', action='store_true',
+		help='with --replay, run every test instead of reporting earlier passes from the result cache')
+	parser.add_argument('--fixture-port', type=int, default=8008,
+		help='localhost port of the fixture server (default 8008)')
+	parser.add_argument('--command-profile', metavar='REPORT',
+		help='record every WebDriver command and write a report of commands per test and page object method')
+	parser.add_argument('--events', metavar='FILE',
+		help='append an event per line as it happens (test start and end, page object calls, '
+			'navigation waits and failures) to a JSON lines file')
+	parser.add_argument('--changed-since', metavar='REVISION',
+		help='run only the tests affected by changes since a git revision, see select_tests.py')
+	parser.add_argument('--trace-dependencies', action='store_true',
+		help='record the page object methods each test calls, to refine --changed-since')
+	parser.add_argument('--content-cache', metavar='FILE',
+		help='keep extracted article content in a sqlite file shared by workers and later runs')
+	parser.add_argument('--content-cache-size', type=int,
+		help='article extractions held in memory by each process, 0 turns the cache off (default 256)')
+	parser.add_argument('--block-resources', action='store_true',
+		help='stop browsers downloading images, fonts, media, analytics beacons and banners')
+	# comma separated names from resource_blocking.type_patterns
+	def resource_types(value):
+		names = value.split(',')
+		unknown = [ name for name in names if name not in resource_blocking.type_patterns ]
+		if unknown:
+			raise argparse.ArgumentTypeError('unknown resource type {}, choose from {}'.format(
+				', '.join(unknown), ', '.join(sorted(resource_blocking.type_patterns))))
+		return names
+
+	parser.add_argument('--block-types', type=resource_types,
+		default=resource_blocking.default_blocklist.resource_types,
+		help='comma separated resource types to block, from {} (default all)'.format(
+			', '.join(sorted(resource_blocking.type_patterns))))
+	parser.add_argument('--block-urls', type=lambda value: value.split(','),
+		default=resource_blocking.default_blocklist.url_patterns,
+		help='comma separated URL patterns to block, * matches any text (default analytics and banners)')
+	args = parser.parse_args()
+
+	# Gather one test suite
+	#tests = unittest.TestLoader().loadTestsFromTestCase(TestCurrentEventsPage)
+
+	# Gather set of test suites
+	suite_list = [
+		TestHomePage,
+		TestMainPage,
+		TestArticlePage,
+		TestCurrentEventsPage,
+	]
+	suites = map(unittest.TestLoader().loadTestsFromTestCase, suite_list)
+	tests = unittest.TestSuite(suites)
+
+	# Run gathered tests
+	options = {
+		'browser': args.browser,
+		'reuse_browser': args.reuse_browser,
+		'launch_profile': args.launch_profile,
+		'backend': args.backend,
+		'navigation_timeout': args.navigation_timeout,
+		'record': args.record,
+		'replay': args.replay,
+		'fixture_port': args.fixture_port,
+		'rerun_all': args.rerun_all,
+		'command_profile': args.command_profile,
+		'content_cache': args.content_cache,
+		'content_cache_size': args.content_cache_size,
+		'block_resources': args.block_resources,
+		'block_types': args.block_types,
+		'block_urls': args.block_urls,
+		'trace_dependencies': args.trace_dependencies,
+		'grid_url': args.grid_url,
+		'remote_browser': args.remote_browser,
+		'geckodriver': args.geckodriver,
+		'pool_size': args.pool_size,
+		'connect_timeout': args.connect_timeout,
+		'read_timeout': args.command_timeout,
+		'events': args.events,
+	}
+	ids = runner.test_ids(tests)
+	if args.changed_since:
+		selected = select_tests.select(ids, args.changed_since)
+		print("Running {} of {} tests affected by changes since {}".format(
+			len(selected), len(ids), args.changed_since))
+		ids = selected
+	summary = runner.run(ids, args.workers, options)
+	sys.exit(not summary.wasSuccessful())
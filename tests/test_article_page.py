@@ -1,41 +1,52 @@
 import unittest
 
 from pages.article_page import ArticlePage
+from pages.main_page import MainPage
 
 from tests.wikipedia_common import WikipediaCommon
 
 class TestArticlePage(WikipediaCommon):
 
+	backend = 'html'
+
+	# 'direct' opens articles by title in one navigation, 'search' goes through
+	#   the main page's header search as a person would
+	article_navigation = 'direct'
+
+	# search term and expected (label, value) pairs of the article of each
+	#   infobox test
+	infobox_cases = {
+		'country': ("Peru", (('Currency', "Sol"), ('Capital', "Lima"))),
+		'chemistry': ("Oxygen", (('atomic weight', "15.999"), ('Phase at STP', "gas"))),
+		'person': ("Charlie Chaplin", (('Born', '1889'), ('Relatives', 'Chaplin'))),
+		'movie': ("north by northwest",
+			(('Directed', 'Alfred Hitchcock'), ('Starring', 'Cary Grant'))),
+		'holiday': ("april fool's day",
+			(('Significance', 'pranks'), ('Frequency', 'Annual'))),
+		'song': ("rocky raccoon",
+			(('Recorded', '1968'), ('Songwriter(s)', 'Lennon'))),
+	}
+
 	def test_infobox_for_country(self):
-		self.infobox_test(
-			"Peru", (('Currency', "Sol"), ('Capital', "Lima")))
+		self.infobox_test(*self.infobox_cases['country'])
 
 	def test_infobox_for_chemistry(self):
-		self.infobox_test(
-			"Oxygen", (('atomic weight', "15.999"), ('Phase at STP', "gas")))
+		self.infobox_test(*self.infobox_cases['chemistry'])
 
 	def test_infobox_for_person(self):
-		self.infobox_test(
-			"Charlie Chaplin", (('Born', '1889'), ('Relatives', 'Chaplin')))
+		self.infobox_test(*self.infobox_cases['person'])
 
 	def test_infobox_for_movie(self):
-		self.infobox_test(
-			"north by northwest",
-			(('Directed', 'Alfred Hitchcock'), ('Starring', 'Cary Grant')))
+		self.infobox_test(*self.infobox_cases['movie'])
 
 	def test_infobox_for_holiday(self):
-		self.infobox_test(
-			"april fool's day",
-			(('Significance', 'pranks'), ('Frequency', 'Annual')))
+		self.infobox_test(*self.infobox_cases['holiday'])
 
 	def test_infobox_for_song(self):
-		self.infobox_test(
-			"rocky raccoon",
-			(('Recorded', '1968'), ('Songwriter(s)', 'Lennon')))
+		self.infobox_test(*self.infobox_cases['song'])
 
 	def test_compare_toc_and_headlines(self):
-		main = self.open_main_page()
-		article = self.open_article_by_search(main, "Douglas Adams")
+		article = self.open_article("Douglas Adams")
 		self.verify_article_toc_and_headers(article)
 
 	####################
@@ -50,8 +61,7 @@ class TestArticlePage(WikipediaCommon):
 	#     label is a string contained in the left side of a row in info box
 	#     value is a string contained in value on the right side
 	def infobox_test(self, search_term, expected_values):
-		main_page = self.open_main_page()
-		article = self.open_article_by_search(main_page, search_term)
+		article = self.open_article(search_term)
 		infobox = article.get_infobox_contents()
 
 		# check expected values are in info box
@@ -59,13 +69,24 @@ class TestArticlePage(WikipediaCommon):
 			found_value = article.get_value_from_infobox_contents(infobox, label)
 			self.assertIn(expected_value, found_value)
 
+	# Open an article in the class's article_navigation mode
+	#   the mode is recorded in the test's properties
+	# parameter
+	#   search_term - string, title or search text of the article
+	def open_article(self, search_term):
+		self.record_property('article_navigation', self.article_navigation)
+		if self.article_navigation == 'direct':
+			self.new_page(MainPage).open_article(search_term)
+			return self.new_page(ArticlePage)
+		return self.open_article_by_search(self.open_main_page(), search_term)
+
 	# Submits a search from the main page
 	# parameter
 	#   main_page - MainPage object
 	#   search_term - string, text to enter for search
 	def open_article_by_search(self, main_page, search_term):
 		main_page.open_article_by_search(search_term)
-		return ArticlePage(self.driver)
+		return self.new_page(ArticlePage)
 
 	def verify_article_toc_and_headers(self, article):
 		toc = article.get_toc_items_text()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import content_cache
+
+# Page object stand-in with a revision and a cached extraction
+class FakePage(object):
+
+	def __init__(self, url='https://en.wikipedia.org/wiki/Peru', revision=1):
+		self.key = (url, revision)
+		self.calls = 0
+
+	def content_key(self):
+		return self.key
+
+	@content_cache.cached
+	def get_rows(self, label=None):
+		self.calls += 1
+		return [ [self.key[0], label] ]
+
+class TestContentCache(unittest.TestCase):
+
+	settings = ('max_entries', 'store_path', 'max_store_entries', 'pages_dir', '_store', '_digest')
+
+	def setUp(self):
+		self.saved = dict((name, getattr(content_cache, name)) for name in self.settings)
+		self.directory = tempfile.mkdtemp()
+		content_cache.store_path = None
+		content_cache.clear()
+
+	def tearDown(self):
+		if content_cache._store is not None and content_cache._store is not self.saved['_store']:
+			content_cache._store[1].close()
+		for name, value in self.saved.items():
+			setattr(content_cache, name, value)
+		content_cache.clear()
+		shutil.rmtree(self.directory)
+
+	def test_same_revision_is_extracted_once(self):
+		page = FakePage()
+		first = page.get_rows('Capital')
+		first.append('changed by the caller')
+		self.assertEqual(page.get_rows('Capital'), [ [page.key[0], 'Capital'] ])
+		self.assertEqual(page.calls, 1)
+		self.assertEqual(content_cache.stats(), {'hits': 1, 'misses': 1})
+
+	def test_arguments_and_revisions_are_kept_apart(self):
+		page = FakePage()
+		page.get_rows('Capital')
+		page.get_rows('Currency')
+		page.key = (page.key[0], 2)
+		page.get_rows('Capital')
+		self.assertEqual(page.calls, 3)
+
+	def test_least_recently_used_is_evicted(self):
+		content_cache.max_entries = 2
+		pages = [ FakePage('https://en.wikipedia.org/wiki/{}'.format(n)) for n in range(3) ]
+		pages[0].get_rows()
+		pages[1].get_rows()
+		pages[0].get_rows()  # page 1 is now the least recently used
+		pages[2].get_rows()
+		self.assertEqual(len(content_cache.entries), 2)
+		pages[0].get_rows()
+		pages[1].get_rows()
+		self.assertEqual([ page.calls for page in pages ], [1, 2, 1])
+
+	def test_zero_entries_turns_the_cache_off(self):
+		content_cache.max_entries = 0
+		page = FakePage()
+		page.get_rows()
+		page.get_rows()
+		self.assertEqual(page.calls, 2)
+		self.assertEqual(len(content_cache.entries), 0)
+		self.assertEqual(content_cache.stats(), {'hits': 0, 'misses': 0})
+
+	def test_store_is_shared_through_the_file(self):
+		content_cache.store_path = os.path.join(self.directory, 'content.sqlite')
+		FakePage().get_rows('Capital')
+
+		content_cache.clear()  # as another process would start, with no entries in memory
+		page = FakePage()
+		self.assertEqual(page.get_rows('Capital'), [ [page.key[0], 'Capital'] ])
+		self.assertEqual(page.calls, 0)
+		self.assertEqual(content_cache.stats(), {'hits': 1, 'misses': 0})
+
+	def test_store_keeps_most_recently_used(self):
+		content_cache.store_path = os.path.join(self.directory, 'content.sqlite')
+		content_cache.max_store_entries = 2
+		for n in range(3):
+			FakePage('https://en.wikipedia.org/wiki/{}'.format(n)).get_rows()
+		rows = content_cache.open_store().execute('SELECT COUNT(*) FROM entries').fetchone()
+		self.assertEqual(rows[0], 2)
+
+	def test_changed_page_code_is_not_served_old_results(self):
+		content_cache.store_path = os.path.join(self.directory, 'content.sqlite')
+		FakePage().get_rows()
+
+		content_cache.clear()
+		content_cache._digest = 'edited extraction'
+		page = FakePage()
+		page.get_rows()
+		self.assertEqual(page.calls, 1)
+
+	def test_code_digest_follows_page_source(self):
+		content_cache._digest = None
+		digest = content_cache.code_digest()
+		content_cache.pages_dir = self.directory
+		with open(os.path.join(self.directory, 'article_page.py'), 'w') as f:
+			f.write('# edited\n')
+		content_cache._digest = None
+		self.assertNotEqual(content_cache.code_digest(), digest)
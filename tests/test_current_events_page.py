@@ -1,15 +1,22 @@
 from datetime import datetime
 import unittest
 import random
+import re
 
 from pages.main_page import MainPage
 from pages.current_events_page import CurrentEventsPage
 
-from tests.wikipedia_common import WikipediaCommon
+from tests.wikipedia_common import WikipediaCommon, needs_browser, uncached_result
 
 class TestCurrentEventsPage(WikipediaCommon):
 
+	# the date header tests click through the main page and the archive
+	#   links and keep the browser; the link text test only reads the page
+	backend = 'html'
+
 	#@unittest.skip('')
+	@needs_browser
+	@uncached_result  # expects the current month
 	def test_main_current_events_page(self):
 		ce_page = self.navigate_to_current_events_page()
 		now = datetime.now()
@@ -17,6 +24,8 @@ class TestCurrentEventsPage(WikipediaCommon):
 			now.strftime('%B'), now.strftime('%Y'), days_ascending=False)
 
 	#@unittest.skip('')
+	@needs_browser
+	@uncached_result  # checks a random month
 	def test_main_archived_current_events_page(self):
 #		if browser == "safari":
 #			self.skipTest('Safari does not locate month_year link')
@@ -25,6 +34,7 @@ class TestCurrentEventsPage(WikipediaCommon):
 		month, year = self.select_random_month_year(ce_page)
 		self.verify_date_headers(ce_page, month, year, days_ascending=True)
 
+	@uncached_result  # expects years up to the current one
 	def test_archived_months_link_text(self):
 		ce_page = self.navigate_to_current_events_page()
 		self.verify_archives_link_text(ce_page)
@@ -36,10 +46,10 @@ class TestCurrentEventsPage(WikipediaCommon):
 	# Click link to Current Events on left panel
 	#   returns an CurrentEvents page object
 	def navigate_to_current_events_page(self):
-		self.main = MainPage(self.driver)
+		self.main = self.new_page(MainPage)
 		self.main.open_main_page()
 		self.main.click_left_panel_link("Current events")
-		return CurrentEventsPage(self.driver)
+		return self.new_page(CurrentEventsPage)
 
 	# Return the expected first and last month of an archived year
 	#   parameter
@@ -87,39 +97,61 @@ class TestCurrentEventsPage(WikipediaCommon):
 	#   ce_page - CurrentEventsPage object
 	# Expects groups of links from the current year to the first archived year
 	#   each group has one link for the year and links for each month
+	#   every year is checked and all mismatches are reported together
 	def verify_archives_link_text(self, ce_page):
-		current_year = datetime.now().year
-
-		years = ce_page.get_archive_links_by_year()
-		for yr in years:
+		mismatches = self.archive_grid_mismatches(ce_page, ce_page.get_archive_grid())
+		if mismatches:
+			self.fail("{} archive link mismatches:\n{}".format(
+				len(mismatches), "\n".join(mismatches)))
 
-			links = ce_page.parse_archive_links(yr)
+	# Check the archive grid against the expected years and months
+	# parameters
+	#   ce_page - CurrentEventsPage object
+	#   grid - list of rows from get_archive_grid()
+	# returns
+	#   list of strings describing each mismatch, empty when all links match
+	def archive_grid_mismatches(self, ce_page, grid):
+		mismatches = []
 
-			# verify the first link is the year
-			yr_str = str(current_year)
-			self.assertEqual(links[0]["text"], yr_str)
-			self.assertEqual(links[0]["title"], yr_str)
-			self.assertRegex(links[0]["href"], ".*/wiki/" + yr_str)
+		def check(ok, year, link, message):
+			if not ok:
+				mismatches.append("{}: {} {}".format(year, message, link))
 
-			# verify the remaining links are months
+		# one row for each year from the current one back to the first archived
+		current_year = datetime.now().year
+		expected_years = list(range(current_year, ce_page.first_archived_year - 1, -1))
+		for year in expected_years[len(grid):]:
+			mismatches.append("{}: row is missing".format(year))
+		for links in grid[len(expected_years):]:
+			mismatches.append("{}: extra row {}".format(links[0][0] if links else "empty", links))
+
+		for links, expected_year in zip(grid, expected_years):
+			yr_str = str(expected_year)
+			year = links[0][0] if links else "row for " + yr_str
+			if not links:
+				check(False, year, [], "has no links")
+				continue
+
+			# the first link is the year
+			text, title, href = links[0]
+			check(text == yr_str and title == yr_str, year, links[0], "year link is not " + yr_str)
+			check(re.match(".*/wiki/" + yr_str, href or ''), year, links[0], "year link href")
+
+			# the remaining links are months in order
 			#   while most years will be months# 1-12
 			#   the first archived and current year will be fewer months
-			first_month, last_month = self.get_month_range(ce_page, current_year)
-			current_month = first_month
-
-			for i in range(1, len(links)):
-				month_name = ce_page.month_name(current_month)
-
-				self.assertEqual(links[i]["text"], month_name)
-				regex = ".*{} {}$".format(month_name, yr_str)
-				self.assertRegex(links[i]["title"], regex)
-				regex = ".*/{}_{}$".format(month_name, yr_str)
-				self.assertRegex(links[i]["href"], regex)
-
-				current_month += 1
-
-			current_year -= 1
-
+			first_month, last_month = self.get_month_range(ce_page, expected_year)
+			months = [ ce_page.month_name(m) for m in range(first_month, last_month + 1) ]
+			texts = [ link[0] for link in links[1:] ]
+			check(texts == months, year, texts, "months are not " + ", ".join(months))
+
+			for (text, title, href), month_name in zip(links[1:], months):
+				check(re.match(".*{} {}$".format(month_name, yr_str), title or ''),
+					year, (text, title, href), "month title")
+				check(re.match(".*/{}_{}$".format(month_name, yr_str), href or ''),
+					year, (text, title, href), "month href")
+
+		return mismatches
 
 	# Verify the headers for dates
 	#   verify headers are the expected format (ex: Janurary 1, 1999 (Monday))
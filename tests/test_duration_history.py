@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import duration_history
+
+def record(test_id, duration, cached=False):
+	return {'id': test_id, 'duration': duration, 'cached': cached}
+
+class TestDurationHistory(unittest.TestCase):
+
+	def test_expected_is_median_of_samples(self):
+		history = {'chrome/per-class/fast': {'a': [1.0, 9.0, 2.0], 'b': [4.0]}}
+		durations, unknown = duration_history.expected(history, 'chrome/per-class/fast', ['a', 'b'])
+		self.assertEqual(durations, {'a': 2.0, 'b': 4.0})
+		self.assertEqual(unknown, 0)
+
+	def test_unknown_tests_take_median_of_known(self):
+		history = {'p': {'a': [1.0], 'b': [3.0], 'c': [8.0]}}
+		durations, unknown = duration_history.expected(history, 'p', ['a', 'b', 'c', 'new'])
+		self.assertEqual(durations['new'], 3.0)
+		self.assertEqual(unknown, 1)
+
+	def test_without_history_tests_take_default(self):
+		durations, unknown = duration_history.expected({}, 'p', ['a', 'b'])
+		self.assertEqual(durations, {'a': duration_history.default_duration,
+			'b': duration_history.default_duration})
+		self.assertEqual(unknown, 2)
+
+	def test_longest_first_keeps_order_between_ties(self):
+		durations = {'a': 1.0, 'b': 5.0, 'c': 1.0, 'd': 5.0, 'e': 3.0}
+		self.assertEqual(duration_history.longest_first(list('abcde'), durations),
+			['b', 'd', 'e', 'a', 'c'])
+
+	def test_makespan_of_central_queue(self):
+		# two workers each take the next test when they are free. in suite order
+		#   worker 1 runs a, c and then e (1 + 1 + 4), worker 2 runs b and d
+		durations = {'a': 1.0, 'b': 1.0, 'c': 1.0, 'd': 1.0, 'e': 4.0}
+		self.assertEqual(duration_history.makespan(list('abcde'), durations, 2), 6.0)
+		# longest first, worker 1 runs e while worker 2 runs a, b, c and d
+		order = duration_history.longest_first(list('abcde'), durations)
+		self.assertEqual(order, ['e', 'a', 'b', 'c', 'd'])
+		self.assertEqual(duration_history.makespan(order, durations, 2), 4.0)
+
+	def test_makespan_with_more_workers_than_tests(self):
+		self.assertEqual(duration_history.makespan(['a', 'b'], {'a': 3.0, 'b': 1.0}, 8), 3.0)
+		self.assertEqual(duration_history.makespan([], {}, 4), 0.0)
+
+	def test_add_keeps_last_samples_of_tests_that_ran(self):
+		history = {}
+		for n in range(1, 8):
+			duration_history.add(history, 'p', [record('a', float(n))])
+		duration_history.add(history, 'p', [record('b', 2.0, cached=True), record('c', 0.0)])
+		self.assertEqual(history, {'p': {'a': [3.0, 4.0, 5.0, 6.0, 7.0]}})
+		self.assertEqual(len(history['p']['a']), duration_history.max_samples)
+
+	def test_profile_names_browser_backend_and_launch_profile(self):
+		self.assertEqual(duration_history.profile({'browser': 'chrome'}), 'chrome/per-class/fidelity')
+		self.assertEqual(duration_history.profile({'browser': 'remote', 'remote_browser': 'firefox',
+			'backend': 'browser', 'launch_profile': 'fast'}), 'remote-firefox/browser/fast')
+
+	def test_save_and_load(self):
+		directory = tempfile.mkdtemp()
+		saved = duration_history.path
+		duration_history.path = os.path.join(directory, 'history.json')
+		try:
+			self.assertEqual(duration_history.load(), {})
+			duration_history.save({'p': {'a': [1.5]}})
+			self.assertEqual(duration_history.load(), {'p': {'a': [1.5]}})
+		finally:
+			duration_history.path = saved
+			shutil.rmtree(directory)
@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+import unittest
+
+import urllib3
+
+from fixture_server import FixtureServer, local_url
+from pages import html_backend
+from pages.base_page import BasePage
+
+# Replays a recorded article through the fixture server to the html backend,
+#   without a browser or the network
+@unittest.skipUnless(html_backend.available, 'the html backend needs lxml')
+class TestFixtureServer(unittest.TestCase):
+
+	article_url = 'https://en.wikipedia.org/wiki/Peru'
+	article_html = (b'<html><head><title>Peru - Wikipedia</title></head><body>'
+		b'<h1 id="firstHeading">Peru</h1><table class="infobox">'
+		b'<tr><th>Capital</th><td>Lima</td></tr>'
+		b'<tr><th>Currency</th><td>Sol</td></tr></table></body></html>')
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.server = FixtureServer(self.directory, port=0).start()
+		self.server.store.save('GET', self.article_url, 200,
+			[['Content-Type', 'text/html; charset=UTF-8']], self.article_html)
+		self.site_port = BasePage.site_port
+		BasePage.site_port = self.server.port
+
+	def tearDown(self):
+		BasePage.site_port = self.site_port
+		self.server.stop()
+		shutil.rmtree(self.directory)
+
+	def test_html_backend_replays_article(self):
+		article = html_backend.HtmlArticlePage(html_backend.HtmlSession())
+		article.open_url(self.article_url)
+		self.assertEqual(article.get_article_header(), 'Peru')
+		infobox = article.get_infobox_contents()
+		self.assertEqual(article.get_value_from_infobox_contents(infobox, 'Capital'), 'Lima')
+		self.assertEqual((self.server.hits, self.server.misses), (1, 0))
+
+	def test_unrecorded_page_is_not_found(self):
+		session = html_backend.HtmlSession()
+		with self.assertRaises(urllib3.exceptions.HTTPError):
+			session.get(local_url('https://en.wikipedia.org/wiki/Chile', self.server.port))
+		self.assertEqual((self.server.hits, self.server.misses), (0, 1))
@@ -0,0 +1,205 @@
+import http.server
+import io
+import json
+import threading
+import time
+import unittest
+
+import grid
+import runner
+
+# /status of a hub with two nodes, recorded from Selenium Grid 4. the first
+#   node runs a chrome session, the second is draining and its slots are not counted
+recorded_status = {
+	'ready': True,
+	'message': 'Selenium Grid ready.',
+	'nodes': [
+		{
+			'id': '2f1c7e2a-5d0b-4b52-9a8e-0f6d1c3b7a10',
+			'uri': 'http://172.18.0.3:5555',
+			'maxSessions': 3,
+			'osInfo': {'arch': 'amd64', 'name': 'Linux', 'version': '6.1.0'},
+			'heartbeatPeriod': 60000,
+			'availability': 'UP',
+			'version': '4.21.0 (revision 79ed462ef4)',
+			'slots': [
+				{
+					'id': {'hostId': '2f1c7e2a-5d0b-4b52-9a8e-0f6d1c3b7a10', 'id': '9b1e0c4d-1'},
+					'lastStarted': '2024-05-21T09:14:02.511Z',
+					'session': {
+						'sessionId': '4d8e2f5a0b6c4e1d9f3a7b2c5e8d1f0a',
+						'start': '2024-05-21T09:14:02.511Z',
+						'stereotype': {'browserName': 'chrome', 'platformName': 'linux'},
+						'capabilities': {'browserName': 'chrome', 'browserVersion': '125.0.6422.60'},
+						'uri': 'http://172.18.0.3:5555',
+					},
+					'stereotype': {'browserName': 'chrome', 'platformName': 'linux'},
+				},
+				{
+					'id': {'hostId': '2f1c7e2a-5d0b-4b52-9a8e-0f6d1c3b7a10', 'id': '9b1e0c4d-2'},
+					'lastStarted': '1970-01-01T00:00:00Z',
+					'session': None,
+					'stereotype': {'browserName': 'chrome', 'platformName': 'linux'},
+				},
+				{
+					'id': {'hostId': '2f1c7e2a-5d0b-4b52-9a8e-0f6d1c3b7a10', 'id': '9b1e0c4d-3'},
+					'lastStarted': '1970-01-01T00:00:00Z',
+					'session': None,
+					'stereotype': {'browserName': 'firefox', 'platformName': 'linux'},
+				},
+			],
+		},
+		{
+			'id': '7a3d9e41-0c2b-4f6e-8d15-3b9c2a7e4f21',
+			'uri': 'http://172.18.0.4:5555',
+			'maxSessions': 1,
+			'osInfo': {'arch': 'amd64', 'name': 'Linux', 'version': '6.1.0'},
+			'heartbeatPeriod': 60000,
+			'availability': 'DRAINING',
+			'version': '4.21.0 (revision 79ed462ef4)',
+			'slots': [
+				{
+					'id': {'hostId': '7a3d9e41-0c2b-4f6e-8d15-3b9c2a7e4f21', 'id': '5c0f7b2e-1'},
+					'lastStarted': '1970-01-01T00:00:00Z',
+					'session': None,
+					'stereotype': {'browserName': 'chrome', 'platformName': 'linux'},
+				},
+			],
+		},
+	],
+}
+
+# tracebacks of test errors, as they appear in a record's 'detail'
+invalid_session = '''Traceback (most recent call last):
+  File "tests/test_main_page.py", line 31, in test_mainpage_autosuggest
+    main.enter_search_term("Peru")
+  File "pages/main_page.py", line 44, in enter_search_term
+    self.find(self.search_input_locator).send_keys(term)
+  File "selenium/webdriver/remote/errorhandler.py", line 229, in check_response
+    raise exception_class(message, screen, stacktrace)
+selenium.common.exceptions.InvalidSessionIdException: Message: Unable to find session with ID: 4d8e2f5a0b6c4e1d9f3a7b2c5e8d1f0a
+'''
+
+node_gone = '''Traceback (most recent call last):
+  File "urllib3/connectionpool.py", line 793, in urlopen
+    response = self._make_request(
+ConnectionRefusedError: [Errno 111] Connection refused
+
+The above exception was the direct cause of the following exception:
+
+Traceback (most recent call last):
+  File "tests/test_home_page.py", line 22, in test_homepage_title
+    home.open_home_page()
+  File "urllib3/util/retry.py", line 515, in increment
+    raise MaxRetryError(_pool, url, reason) from reason
+urllib3.exceptions.MaxRetryError: HTTPConnectionPool(host='localhost', port=4444): Max retries exceeded with url: /session/4d8e2f5a/url
+'''
+
+element_missing = '''Traceback (most recent call last):
+  File "tests/test_article_page.py", line 40, in test_article_infobox
+    article.get_infobox_contents()
+  File "selenium/webdriver/remote/errorhandler.py", line 229, in check_response
+    raise exception_class(message, screen, stacktrace)
+selenium.common.exceptions.NoSuchElementException: Message: no such element: Unable to locate element: {"method":"css selector","selector":".infobox"}
+'''
+
+def record(status, detail):
+	return {'id': 'tests.test_main_page.TestMainPage.test_mainpage_autosuggest',
+		'status': status, 'detail': detail}
+
+class TestGridStatus(unittest.TestCase):
+
+	def test_slots_count_nodes_that_are_up(self):
+		total, free = grid.slots(recorded_status)
+		self.assertEqual(total, {'chrome': 2, 'firefox': 1})
+		self.assertEqual(free, {'chrome': 1, 'firefox': 1})
+		self.assertEqual(free['safari'], 0)
+
+	def test_slots_of_grid_without_nodes(self):
+		total, free = grid.slots({'ready': False, 'message': 'Selenium Grid not ready.', 'nodes': []})
+		self.assertEqual((total, free), ({}, {}))
+
+	def test_lost_session_errors(self):
+		self.assertTrue(grid.session_lost(record('error', invalid_session)))
+		self.assertTrue(grid.session_lost(record('error', node_gone)))
+
+	def test_other_errors_and_failures_are_not_lost_sessions(self):
+		self.assertFalse(grid.session_lost(record('error', element_missing)))
+		# only the exception that ended the test counts, not one it was caused by
+		self.assertFalse(grid.session_lost(record('error',
+			node_gone.replace('urllib3.exceptions.MaxRetryError', 'AssertionError'))))
+		self.assertFalse(grid.session_lost(record('failure', invalid_session)))
+		self.assertFalse(grid.session_lost(record('success', '')))
+		self.assertFalse(grid.session_lost(record('error', '')))
+
+# Serves the current status of a fake Grid and counts the requests for it
+class StatusHandler(http.server.BaseHTTPRequestHandler):
+
+	def do_GET(self):
+		self.server.requests += 1
+		body = json.dumps({'value': self.server.status()}).encode('utf-8')
+		self.send_response(200)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+def chrome_status(free):
+	slot = lambda session: {'session': session, 'stereotype': {'browserName': 'chrome'}}
+	return {'nodes': [{'availability': 'UP',
+		'slots': [slot(None)] * free + [slot({'sessionId': 'busy'})] * (2 - free)}]}
+
+class TestCapacity(unittest.TestCase):
+
+	def setUp(self):
+		self.saved = grid.poll_interval
+		self.free = 0
+		self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StatusHandler)
+		self.server.requests = 0
+		self.server.status = lambda: chrome_status(self.free)
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.grid_url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+	def tearDown(self):
+		grid.poll_interval = self.saved
+		self.server.shutdown()
+		self.server.server_close()
+
+	def test_ready_does_not_wait_for_a_slot(self):
+		grid.poll_interval = 0
+		capacity = grid.Capacity(self.grid_url, 'chrome', timeout=60)
+		start = time.monotonic()
+		self.assertFalse(capacity.ready())
+		self.assertFalse(capacity.ready())
+		self.assertLess(time.monotonic() - start, 5)
+		self.free = 2
+		self.assertEqual([ capacity.ready() for _ in range(2) ], [True, True])
+		self.assertEqual(capacity.total(), 2)
+
+	def test_each_free_slot_is_handed_out_once(self):
+		grid.poll_interval = 60
+		self.free = 2
+		capacity = grid.Capacity(self.grid_url, 'chrome')
+		self.assertEqual([ capacity.ready() for _ in range(3) ], [True, True, False])
+		self.assertEqual(self.server.requests, 1)  # not read again within poll_interval
+
+	def test_ready_after_timeout(self):
+		grid.poll_interval = 0
+		capacity = grid.Capacity(self.grid_url, 'chrome', timeout=0)
+		self.assertFalse(capacity.ready())
+		self.assertTrue(capacity.ready())  # left to the Grid's session queue
+
+	def test_runner_hands_out_tests_when_slots_free(self):
+		grid.poll_interval = 0.1
+		self.server.status = lambda: chrome_status(1 if self.server.requests > 3 else 0)
+		ids = [ 'tests.test_duration_history.TestDurationHistory.' + name for name in
+			('test_expected_is_median_of_samples', 'test_makespan_with_more_workers_than_tests') ]
+		summary = runner.Summary(io.StringIO())
+		runner.run_parallel(ids, 2, {'browser': 'remote', 'grid_url': self.grid_url}, summary,
+			grid.Capacity(self.grid_url, 'chrome'))
+		self.assertEqual(sorted(record['id'] for record in summary.records), ids)
+		self.assertTrue(summary.wasSuccessful())
+		self.assertGreater(self.server.requests, 3)
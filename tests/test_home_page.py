@@ -28,58 +28,51 @@ class TestHomePage(WikipediaCommon):
 		self.type_search(home_page, "er")
 		self.verify_suggestions_start_with(home_page, "buster")
 
+	# link text of each language link, and the title and body text expected
+	#   on the main page it opens
+	language_links = {
+		'english': ('English', "Wikipedia, the free encyclopedia",
+			"the free encyclopedia that anyone can edit"),
+		'french': ('Français', "Wikipédia, l'encyclopédie libre",
+			"L'encyclopédie libre que chacun peut améliorer"),
+		'german': ('Deutsch', "Wikipedia – Die freie Enzyklopädie",
+			"Wikipedia ist ein Projekt zum Aufbau einer Enzyklopädie aus freien Inhalten"),
+		'spanish': ('Español', "Wikipedia, la enciclopedia libre",
+			"la enciclopedia de contenido libreque todos pueden editar"),
+	}
+
 	#@unittest.skip('')
 	def test_homepage_english_link(self):
-#		if browser == "safari":
-#			self.skipTest('Safari does not click on home page language link as expected')
-
-		home_page = self.open_home_page()
-		main_page = self.click_language_link(home_page, 'English')
-		self.verify_main_page_text(
-			main_page,
-			title_text="Wikipedia, the free encyclopedia",
-			body_text="the free encyclopedia that anyone can edit")
+		self.language_link_test(*self.language_links['english'])
 
 	#@unittest.skip('')
 	def test_homepage_french_link(self):
-#		if browser == "safari":
-#			self.skipTest('Safari does not click on home page language link as expected')
-
-		home_page = self.open_home_page()
-		main_page = self.click_language_link(home_page, 'Français')
-		self.verify_main_page_text(
-			main_page,
-			title_text="Wikipédia, l'encyclopédie libre",
-			body_text="L'encyclopédie libre que chacun peut améliorer")
+		self.language_link_test(*self.language_links['french'])
 
 	#@unittest.skip('')
 	def test_homepage_german_link(self):
-#		if browser == "safari":
-#			self.skipTest('Safari does not click on home page language link as expected')
-
-		home_page = self.open_home_page()
-		main_page = self.click_language_link(home_page, 'Deutsch')
-		self.verify_main_page_text(
-			main_page,
-			title_text="Wikipedia – Die freie Enzyklopädie",
-			body_text="Wikipedia ist ein Projekt zum Aufbau einer Enzyklopädie aus freien Inhalten")
+		self.language_link_test(*self.language_links['german'])
 
 	#@unittest.skip('')
 	def test_homepage_spanish_link(self):
-#		if browser == "safari":
-#			self.skipTest('Safari does not click on home page language link as expected')
-
-		home_page = self.open_home_page()
-		main_page = self.click_language_link(home_page, 'Español')
-		self.verify_main_page_text(
-			main_page,
-			title_text="Wikipedia, la enciclopedia libre",
-			body_text="la enciclopedia de contenido libreque todos pueden editar")
+		self.language_link_test(*self.language_links['spanish'])
 
 	####################
 	# Helper functions
 	####################
 
+	# Template for testing a language link
+	# parameters
+	#   language - text of the language link to click
+	#   title_text, body_text - expected on the main page it opens
+	def language_link_test(self, language, title_text, body_text):
+#		if browser == "safari":
+#			self.skipTest('Safari does not click on home page language link as expected')
+
+		home_page = self.open_home_page()
+		main_page = self.click_language_link(home_page, language)
+		self.verify_main_page_text(main_page, title_text=title_text, body_text=body_text)
+
 	# Verify the home page title
 	# parameter
 	#   home_page - HomePage object
@@ -0,0 +1,53 @@
+import http.server
+import threading
+import unittest
+
+from fixture_server import local_url
+from pages import html_backend
+
+# Serves an empty page and keeps the headers of each request
+class HeaderHandler(http.server.BaseHTTPRequestHandler):
+
+	protocol_version = 'HTTP/1.1'
+
+	def do_GET(self):
+		self.server.received.append(self.headers)
+		body = b'<html><head><title>Empty</title></head><body></body></html>'
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/html')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+# The headers the html backend sends, to live sites and to the fixture server
+@unittest.skipUnless(html_backend.available, 'the html backend needs lxml')
+class TestHtmlSessionHeaders(unittest.TestCase):
+
+	def setUp(self):
+		self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), HeaderHandler)
+		self.server.received = []
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.port = self.server.server_address[1]
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+	def assert_pool_headers(self, headers):
+		self.assertEqual(headers['User-Agent'], html_backend.http.headers['user-agent'])
+		self.assertIn('gzip', headers['Accept-Encoding'])
+
+	def test_site_request_keeps_pool_headers(self):
+		html_backend.HtmlSession().get('http://127.0.0.1:{}/wiki/Peru'.format(self.port))
+		self.assert_pool_headers(self.server.received[0])
+
+	def test_fixture_request_adds_host(self):
+		session = html_backend.HtmlSession()
+		session.get(local_url('https://en.wikipedia.org/wiki/Peru', self.port))
+		headers = self.server.received[0]
+		self.assertEqual(headers['Host'], 'en.wikipedia.localhost:{}'.format(self.port))
+		self.assert_pool_headers(headers)
+		self.assertEqual(session.title, 'Empty')
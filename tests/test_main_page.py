@@ -37,7 +37,7 @@ class TestMainPage(WikipediaCommon):
 
 	def search_for_article(self, main_page, search_term):
 		main_page.open_article_by_search(search_term)
-		return ArticlePage(self.driver)
+		return self.new_page(ArticlePage)
 
 	# Type a search term without submitting search
 	# parameters
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import result_cache
+import runner
+
+# Module files of a small project
+#   app imports helper; helper imports pkg.mod with 'from pkg import mod';
+#   pkg.mod imports base. unused is not imported
+project = {
+	'app.py': 'import os\nimport helper\n',
+	'helper.py': 'from pkg import mod\n',
+	'pkg/__init__.py': '',
+	'pkg/mod.py': 'from base import value\n',
+	'base.py': 'value = 1\n',
+	'unused.py': 'import app\n',
+}
+
+class TestResultCache(unittest.TestCase):
+
+	def setUp(self):
+		self.saved = (result_cache.root, result_cache.path, result_cache.max_entries)
+		self.directory = tempfile.mkdtemp()
+		self.fixtures = os.path.join(self.directory, 'fixtures')
+		os.makedirs(os.path.join(self.fixtures, 'en.wikipedia.org'))
+		self.write('fixtures/en.wikipedia.org/page.body', 'Peru')
+		for relative, source in project.items():
+			self.write(relative, source)
+		result_cache.root = self.directory
+		result_cache.path = os.path.join(self.directory, 'result_cache.json')
+
+	def tearDown(self):
+		result_cache.root, result_cache.path, result_cache.max_entries = self.saved
+		shutil.rmtree(self.directory)
+
+	def write(self, relative, text):
+		path = os.path.join(self.directory, relative)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(path, 'w') as f:
+			f.write(text)
+
+	def key(self, **options):
+		return result_cache.Keys(dict({'browser': 'chrome', 'replay': self.fixtures},
+			**options)).key('app.TestApp.test_app')
+
+	def test_module_files_follow_imports(self):
+		self.assertEqual(result_cache.module_files('app'),
+			['app.py', 'base.py', 'helper.py', 'pkg/__init__.py', 'pkg/mod.py'])
+
+	def test_dependency_change_changes_key(self):
+		before = self.key()
+		self.assertEqual(self.key(), before)
+		self.write('base.py', 'value = 2\n')
+		self.assertNotEqual(self.key(), before)
+
+	def test_file_not_imported_does_not_change_key(self):
+		before = self.key()
+		self.write('unused.py', 'import app\nimport base\n')
+		self.assertEqual(self.key(), before)
+
+	def test_option_change_changes_key(self):
+		before = self.key()
+		self.assertNotEqual(self.key(launch_profile='fast'), before)
+		self.assertEqual(self.key(workers=4), before)  # not a key option
+
+	def test_fixture_change_changes_key(self):
+		before = self.key()
+		page = os.path.join(self.fixtures, 'en.wikipedia.org', 'page.body')
+		stat = os.stat(page)
+		os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+		self.assertNotEqual(self.key(), before)
+
+	def test_save_keeps_most_recently_used(self):
+		result_cache.max_entries = 2
+		entries = dict((name, {'id': name, 'used': used})
+			for name, used in (('old', 1.0), ('newest', 3.0), ('newer', 2.0)))
+		result_cache.save(entries)
+		self.assertEqual(sorted(result_cache.load()), ['newer', 'newest'])
+
+	def test_find_marks_entry_used(self):
+		entries = {'key': {'id': 'test', 'used': 1.0}}
+		self.assertIs(result_cache.find(entries, 'key'), entries['key'])
+		self.assertGreater(entries['key']['used'], 1.0)
+		self.assertIsNone(result_cache.find(entries, 'other'))
+
+# Tests decorated with uncached_result get no key, so they always run
+class TestResultKeys(unittest.TestCase):
+
+	def test_uncached_results_are_left_out(self):
+		directory = tempfile.mkdtemp()
+		try:
+			cached = 'tests.test_main_page.TestMainPage.test_mainpage_autosuggest'
+			uncached = 'tests.test_current_events_page.TestCurrentEventsPage.test_main_current_events_page'
+			keys = runner.result_keys([cached, uncached], {'browser': 'chrome', 'replay': directory})
+			self.assertEqual(list(keys), [cached])
+		finally:
+			shutil.rmtree(directory)
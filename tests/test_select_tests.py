@@ -0,0 +1,71 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import select_tests
+
+# browser test modules copied to the temporary repository, with the pages package
+test_modules = ('__init__.py', 'wikipedia_common.py', 'test_home_page.py',
+	'test_main_page.py', 'test_article_page.py', 'test_current_events_page.py')
+
+# Selects tests for changes to a copy of the page objects and browser tests,
+#   committed to a temporary git repository
+@unittest.skipIf(shutil.which('git') is None, 'needs git')
+class TestSelectTests(unittest.TestCase):
+
+	def setUp(self):
+		self.saved = (select_tests.root, select_tests.index_path)
+		self.directory = tempfile.mkdtemp()
+		shutil.copytree(os.path.join(self.saved[0], 'pages'), os.path.join(self.directory, 'pages'),
+			ignore=shutil.ignore_patterns('__pycache__'))
+		os.makedirs(os.path.join(self.directory, 'tests'))
+		for name in test_modules:
+			shutil.copy(os.path.join(self.saved[0], 'tests', name), os.path.join(self.directory, 'tests'))
+		shutil.copy(os.path.join(self.saved[0], 'wait_for.py'), self.directory)
+		for args in (('init', '-q'), ('add', '.'),
+				('-c', 'user.name=test', '-c', 'user.email=test@localhost', 'commit', '-q', '-m', 'base')):
+			subprocess.run(('git',) + args, cwd=self.directory, check=True, stdout=subprocess.DEVNULL)
+
+		select_tests.root = self.directory
+		select_tests.index_path = os.path.join(self.directory, '__pycache__', 'index.json')
+		graph, tests = select_tests.build_graph(select_tests.load_index())
+		self.ids = sorted(tests)
+
+	def tearDown(self):
+		select_tests.root, select_tests.index_path = self.saved
+		shutil.rmtree(self.directory)
+
+	def edit(self, relative, old, new):
+		path = os.path.join(self.directory, relative)
+		with open(path) as f:
+			text = f.read()
+		self.assertIn(old, text)
+		with open(path, 'w') as f:
+			f.write(text.replace(old, new, 1))
+
+	def test_locator_change_selects_its_tests(self):
+		self.edit('pages/home_page.py', "'#typeahead-suggestions a'", "'#typeahead-suggestions li a'")
+		self.assertEqual(select_tests.select(self.ids, 'HEAD'), [
+			'tests.test_home_page.TestHomePage.test_homepage_article_search',
+			'tests.test_home_page.TestHomePage.test_homepage_autosuggest'])
+
+	def test_test_method_change_selects_that_test(self):
+		self.edit('tests/test_main_page.py', 'def test_mainpage_autosuggest(self):',
+			'def test_mainpage_autosuggest(self):\n\t\tself.assertTrue(True)')
+		self.assertEqual(select_tests.select(self.ids, 'HEAD'),
+			['tests.test_main_page.TestMainPage.test_mainpage_autosuggest'])
+
+	def test_comment_changes_select_nothing(self):
+		self.edit('pages/article_page.py', 'import content_cache',
+			'# cached extractions\nimport content_cache')
+		self.edit('pages/home_page.py', "'#typeahead-suggestions a')",
+			"'#typeahead-suggestions a')  # the portal's search box")
+		self.edit('pages/main_page.py', '\n\n', '\n\n\n')
+		self.assertEqual(select_tests.select(self.ids, 'HEAD'), [])
+
+	def test_root_module_change_selects_every_test(self):
+		self.edit('wait_for.py', 'timeout = 30', 'timeout = 40')
+		self.assertEqual(select_tests.select(self.ids, 'HEAD'), self.ids)
+		self.assertGreater(len(self.ids), 10)
@@ -0,0 +1,88 @@
+import time
+import types
+import unittest
+
+from selenium.webdriver.remote.command import Command
+
+from tabs import TabScheduler, navigate_script
+import wait_for
+
+# Stand-in for a driver with the 'none' page load strategy
+#   each tab's page takes load_seconds to load after a navigation; commands
+#   return at once, as they do while a page loads with that strategy
+class FakeTabDriver(object):
+
+	load_seconds = 0.3
+	title_script = "return document.title;"
+
+	def __init__(self, strategy='none'):
+		self.capabilities = {'pageLoadStrategy': strategy}
+		self.current_window_handle = 'tab-0'
+		self.pages = {'tab-0': ['about:blank', 0.0]}  # handle -> [url, time loaded]
+		self.loads = 0
+		self.switch_to = types.SimpleNamespace(new_window=self.new_window, window=self.window)
+
+	def new_window(self, kind):
+		self.current_window_handle = 'tab-{}'.format(len(self.pages))
+		self.pages[self.current_window_handle] = ['about:blank', 0.0]
+
+	def window(self, handle):
+		self.current_window_handle = handle
+
+	def close(self):
+		del self.pages[self.current_window_handle]
+
+	def get(self, url):
+		self.execute(Command.GET, {'url': url})
+
+	def execute_script(self, script, *args):
+		return self.execute(Command.W3C_EXECUTE_SCRIPT, {'script': script, 'args': list(args)})['value']
+
+	def execute(self, driver_command, params=None):
+		page = self.pages[self.current_window_handle]
+		if driver_command == Command.SWITCH_TO_WINDOW:
+			self.current_window_handle = params['handle']
+		elif driver_command == Command.GET:
+			raise AssertionError('a blocking get was sent')
+		elif params['script'] == navigate_script:
+			page[:] = [params['args'][0], time.time() + self.load_seconds]
+			self.loads += 1
+		elif params['script'] == wait_for.page_state_script:
+			return {'value': [page[0], 'complete' if time.time() >= page[1] else 'loading']}
+		elif params['script'] == self.title_script:
+			return {'value': 'Title of ' + page[0]}
+		return {'value': None}
+
+# Flow that opens a page and returns the title of the page its tab shows
+def open_flow(url):
+	def flow(driver):
+		driver.get(url)
+		return driver.execute_script(FakeTabDriver.title_script)
+	return flow
+
+class TestTabScheduler(unittest.TestCase):
+
+	urls = [ 'https://en.wikipedia.org/wiki/{}'.format(title)
+		for title in ('Peru', 'Oxygen', 'Charlie_Chaplin', 'Rocky_Raccoon') ]
+
+	def test_page_loads_in_tabs_overlap(self):
+		driver = FakeTabDriver()
+		start = time.time()
+		titles = TabScheduler(driver, tabs=4).run([ open_flow(url) for url in self.urls ])
+		elapsed = time.time() - start
+
+		self.assertEqual(titles, [ 'Title of ' + url for url in self.urls ])
+		# one after another the loads would take 4 * load_seconds
+		self.assertLess(elapsed, 2 * FakeTabDriver.load_seconds)
+		self.assertEqual(list(driver.pages), ['tab-0'])
+
+	def test_same_url_is_reloaded(self):
+		driver = FakeTabDriver()
+		driver.pages['tab-0'][0] = self.urls[0]
+		titles = TabScheduler(driver, tabs=1).run([ open_flow(self.urls[0]) ])
+		self.assertEqual(titles, [ 'Title of ' + self.urls[0] ])
+		self.assertEqual(driver.loads, 2)  # leaving the page, then loading it again
+
+	def test_driver_that_waits_for_loads_is_refused(self):
+		with self.assertRaises(ValueError):
+			TabScheduler(FakeTabDriver('eager')).run([ open_flow(self.urls[0]) ])
@@ -1,34 +1,158 @@
+import atexit
+import os
 import unittest
 
 from selenium import webdriver
+from selenium.webdriver.firefox.service import Service as FirefoxService
 
+from pages import html_backend
 from pages.home_page import HomePage
 from pages.main_page import MainPage
+from driver_pool import DriverPool
+import command_profiler
+import command_transport
+import launch_profiles
+import resource_blocking
 
 global browser
 
+# when True tests share browser sessions from driver_pool instead of
+#   starting a new browser for each test. set by the test runner
+reuse_browser = False
+
+# name of the launch profile browsers start with, see launch_profiles.py.
+#   set by the test runner
+launch_profile = 'fidelity'
+
+# when True every test uses the browser, even in classes with backend = 'html'.
+#   set by the test runner
+force_browser = False
+
+# address of the Selenium Grid the 'remote' browser runs on, e.g.
+#   http://localhost:4444, and the browser the Grid starts. set by the test runner
+grid_url = None
+remote_browser = 'chrome'
+
+# geckodriver executable for Firefox, None finds it on the PATH.
+#   set by the test runner
+geckodriver_path = '/selenium_browser_drivers/geckodriver'
+if not os.path.exists(geckodriver_path):
+	geckodriver_path = None
+
+# Start a new browser session
+# Parameters
+#   browser - one of firefox, ie, chrome, safari or remote
+#   profile - launch profile name, default is the launch_profile setting
+#   page_load_strategy - 'normal', 'eager' or 'none' in place of the profile's
+# Returns the WebDriver
+def start_driver(browser, profile=None, page_load_strategy=None):
+	profile = profile or launch_profile
+	target = remote_browser if browser == 'remote' else browser
+	options = launch_profiles.options(target, profile)
+	if page_load_strategy:
+		options = options or launch_profiles.default_options(target)
+		options.page_load_strategy = page_load_strategy
+	options = resource_blocking.apply(target, options)
+	if browser == 'remote':
+		if not grid_url:
+			raise ValueError('The remote browser needs the address of a Selenium Grid')
+		driver = webdriver.Remote(command_executor=command_transport.PooledConnection(grid_url),
+			options=options or launch_profiles.default_options(target))
+	elif browser == 'firefox':
+		driver = webdriver.Firefox(service=FirefoxService(executable_path=geckodriver_path), options=options)
+	elif browser == 'ie':
+		driver = webdriver.Ie(options=options)
+	elif browser == 'chrome':
+		driver = webdriver.Chrome(options=options)  # use driver in system path /usr/local/bin on Unix
+		#driver = webdriver.Chrome(executable_path='/path_to/chromedriver')
+	elif browser == 'safari':
+		driver = webdriver.Safari(options=options)
+		if profile == 'fidelity':
+			driver.set_window_position(20,20)
+			driver.set_window_size(1200,800)
+	else:
+		raise ValueError('Browser parameter not recognized: {}'.format(browser))
+
+	size = launch_profiles.window_size(target, profile)
+	if size:
+		driver.set_window_size(*size)
+	# The implicit wait is not normally necessary
+	#driver.implicitly_wait(5)
+	command_transport.install(driver)
+	if command_profiler.enabled:
+		command_profiler.install(driver)
+	resource_blocking.install(driver, target)
+	return driver
+
+driver_pool = DriverPool(start_driver)
+atexit.register(driver_pool.close)
+
+# Decorator for a test that needs a new browser even when browsers are reused
+def needs_fresh_browser(func):
+	func.fresh_browser = True
+	return func
+
+# Decorator for a test that needs the browser in a class with backend = 'html',
+#   such as one that clicks through pages. the html backend follows a link's
+#   href without running the page's scripts or checking the link can be
+#   scrolled to and clicked, and treats only inline display:none as hidden
+def needs_browser(func):
+	func.backend = 'browser'
+	return func
+
+# Decorator for a test whose outcome can change without its code or fixtures
+#   changing, e.g. one that depends on today's date. the runner does not
+#   reuse its earlier passes from result_cache
+def uncached_result(func):
+	func.uncached_result = True
+	return func
+
 class WikipediaCommon(unittest.TestCase):
 
+	# set True in a test class to give each of its tests a new browser
+	#   even when browsers are reused
+	fresh_browser = False
+
+	# 'browser' drives the pages in a browser, 'html' reads their server rendered
+	#   HTML without one (see pages/html_backend.py). set 'html' in a test class
+	#   whose tests only read pages; the browser is used when lxml is not installed
+	backend = 'browser'
+
 	def setUp(self):
 		global browser
-		if browser == 'firefox':
-			self.driver = webdriver.Firefox(executable_path='/selenium_browser_drivers/geckodriver')
-		elif browser == 'ie':
-			self.driver = webdriver.Ie()
-		elif browser == 'chrome':
-			self.driver = webdriver.Chrome()  # use driver in system path /usr/local/bin on Unix
-			#self.driver = webdriver.Chrome(executable_path='/path_to/chromedriver')
-		elif browser == 'safari':
-			self.driver = webdriver.Safari()
-			self.driver.set_window_position(20,20)
-			self.driver.set_window_size(1200,800)
+		self.properties = {}
+		test_method = getattr(self, self._testMethodName)
+		self.html_backend = (getattr(test_method, 'backend', self.backend) == 'html'
+			and not force_browser and html_backend.available)
+		self.pooled_driver = reuse_browser and not self.html_backend and not getattr(
+			test_method, 'fresh_browser', self.fresh_browser)
+
+		if self.html_backend:
+			self.driver = html_backend.HtmlSession()
+		elif self.pooled_driver:
+			self.driver = driver_pool.acquire(browser)
 		else:
-			print('Browser parameter not recognized')
-		# The implicit wait is not normally necessary
-		#self.driver.implicitly_wait(5)
+			self.driver = start_driver(browser)
 
 	def tearDown(self):
-		self.driver.quit()
+		if self.pooled_driver:
+			driver_pool.release(browser, self.driver)
+		else:
+			self.driver.quit()
+
+	# Record a name and value about how the test ran, e.g. the navigation
+	#   mode it used. the test runner adds the properties to the test's record
+	def record_property(self, name, value):
+		self.properties[name] = value
+
+	# Create a page object for the test's backend
+	# Parameter
+	#   page_class - Selenium page class, such as ArticlePage
+	# Returns page object of the class, or of its html_backend mirror
+	def new_page(self, page_class):
+		if self.html_backend:
+			page_class = html_backend.page_classes[page_class]
+		return page_class(self.driver)
 
 	# Open the home page
 	# returns
@@ -42,6 +166,6 @@ class WikipediaCommon(unittest.TestCase):
 	# returns
 	#   MainPage object
 	def open_main_page(self):
-		main = MainPage(self.driver)
+		main = self.new_page(MainPage)
 		main.open_main_page()
 		return main
@@ -2,23 +2,127 @@
 #   decorators that wait for conditions/changes around an action
 #   intended to be imported into page classes
 
-# wait for the page url and title to change around a navigation
-#   parameter: func - a web navigation method, such as a click 
+import asyncio
+import functools
+import inspect
+import time
+
+from selenium.common import exceptions as SelExc
+
+# settings for navigation waits, may be changed by the test runner
+timeout = 30                  # seconds before a navigation wait gives up
+first_poll = 0.05             # seconds between the first polls
+max_poll = 0.5                # longest interval between polls
+backoff = 1.5                 # factor the poll interval grows by after each poll
+ready_states = ('complete',)  # document.readyState values that end a wait
+
+# functions called after each navigation wait with parameters
+#   page - the page object, name - the navigation method's name
+#   stats - dictionary with the number of 'polls' and the 'ms' waited
+observers = []
+
+# one command returns both the address and the load state of the document
+page_state_script = "return [document.URL, document.readyState];"
+
+# errors of a poll that reaches the old document while it is being replaced.
+#   other errors, such as a lost session or closed window, end the wait
+replaced_document_errors = (SelExc.JavascriptException, SelExc.StaleElementReferenceException)
+
+# Call each observer about a completed navigation
+def notify(page, name, stats):
+	for observer in observers:
+		observer(page, name, stats)
+
+# Wait for a new document to be loaded in the browser
+#   polls the document's URL and readyState, backing off between polls
+# Parameters
+#   page - page object whose driver navigated
+#   before_url - URL of the document before the navigation
+# Returns dictionary with the number of 'polls' and the 'ms' waited
+#   raises selenium TimeoutException if the navigation does not complete in time
+def navigation(page, before_url):
+	start = time.time()
+	deadline = start + timeout
+	interval = first_poll
+	polls = 0
+
+	while True:
+		polls += 1
+		try:
+			url, state = page.driver.execute_script(page_state_script)
+		except replaced_document_errors:
+			url, state = None, None  # the old document is being replaced
+		if url is not None and url != before_url and state in ready_states:
+			break
+
+		remaining = deadline - time.time()
+		if remaining <= 0:
+			msg = "Navigation from {} did not complete within {} seconds ({} polls)"
+			raise SelExc.TimeoutException(msg.format(before_url, timeout, polls))
+		time.sleep(min(interval, remaining))
+		interval = min(interval * backoff, max_poll)
+
+	return {'polls': polls, 'ms': (time.time() - start) * 1000}
+
+# Wait for a new document to be loaded without blocking the event loop
+#   the counterpart of navigation() for async page objects (pages/async_pages.py)
+async def navigation_async(page, before_url):
+	start = time.time()
+	deadline = start + timeout
+	interval = first_poll
+	polls = 0
+
+	while True:
+		polls += 1
+		try:
+			url, state = await page.driver.execute_script(page_state_script)
+		except replaced_document_errors:
+			url, state = None, None
+		if url is not None and url != before_url and state in ready_states:
+			break
+
+		remaining = deadline - time.time()
+		if remaining <= 0:
+			msg = "Navigation from {} did not complete within {} seconds ({} polls)"
+			raise SelExc.TimeoutException(msg.format(before_url, timeout, polls))
+		await asyncio.sleep(min(interval, remaining))
+		interval = min(interval * backoff, max_poll)
+
+	return {'polls': polls, 'ms': (time.time() - start) * 1000}
+
+# wait for the page url to change and the new page to load around a navigation
+#   the wait's stats are kept in the page's last_navigation_wait attribute
+#   and the page's element cache is cleared
+#   parameter: func - a web navigation method, such as a click. a coroutine
+#     method of an async page object is awaited, and so is the wait
 def new_url_and_title(func):
 
-	def wrapper(self, *args):
-		before_url = self.get_current_url()
-		before_title = self.get_page_title()
+	if inspect.iscoroutinefunction(func):
+		@functools.wraps(func)
+		async def async_wrapper(self, *args, **kwargs):
+			before_url = (await self.driver.execute_script(page_state_script))[0]
+
+			result = await func(self, *args, **kwargs)
+
+			self.clear_element_cache()
+			stats = await navigation_async(self, before_url)
+			self.last_navigation_wait = stats
+			notify(self, func.__name__, stats)
+			return result
+
+		return async_wrapper
+
+	@functools.wraps(func)
+	def wrapper(self, *args, **kwargs):
+		before_url = self.driver.execute_script(page_state_script)[0]
 
-		if len(args) == 0:
-			func(self)
-		else:
-			func(self, *args)
+		result = func(self, *args, **kwargs)
 
-		while True:
-			after_url = self.get_current_url()
-			after_title = self.get_page_title()
-			if before_url != after_url and before_title != after_title:
-				break
+		# elements found on the old page are no use on the new one
+		self.clear_element_cache()
+		stats = navigation(self, before_url)
+		self.last_navigation_wait = stats
+		notify(self, func.__name__, stats)
+		return result
 
 	return wrapper